@@ -0,0 +1,150 @@
+import asyncio
+import importlib
+import threading
+
+import run_manifest
+import section_runner
+
+# Blocking fetches in flight at once, across all sources
+CONCURRENCY = 16
+
+# Section name -> (module, function, resource) of the synchronous fetcher
+# run for it. Each takes the run context and memoizes its result on it
+# (ctx.memo), so the section, when it calls the same function, gets the
+# prefetched value or waits for the fetch still in flight instead of
+# starting another. The resource is the section's slot: a "yfinance" source
+# is fetched holding section_runner.YFINANCE_LOCK, like its section runs.
+SOURCES = {
+    "gold": ("gold", "get_chennai_gold_rates", "http"),
+    "silver": ("silver", "get_chennai_silver_rates", "http"),
+    "fii_dii": ("fii_dii_data", "fii_dii_days", "http"),
+    "news": ("bulletin", "get_market_headlines", "http"),
+    "bulletin": ("bulletin", "get_moneycontrol_news", "http"),
+    "pcr": ("get_nifty_pcr", "get_current_pcr", "http"),
+    "global": ("global", "get_global_indices_data", "yfinance"),
+    "currency": ("currency", "get_currency_exchange_rates", "yfinance"),
+}
+
+_loop = None
+_loop_lock = threading.Lock()
+_limit = None
+
+
+# --- Async fetch engine ---
+# The non-browser sources are read with blocking libraries: requests (through
+# the run's HttpClient), yfinance and nsepython. The engine runs every such
+# call on a worker thread from one event loop, at most CONCURRENCY at a time,
+# so dozens of network waits overlap and a deadline stops waiting for
+# whatever has not finished. The synchronous fetchers stay the entry points
+# sections call, and the async variants offload them rather than
+# reimplementing them on an async HTTP library; prefetch() runs them ahead
+# of the sections that need them.
+#
+# Cancelling a source only cancels waiting for it: a fetch already running
+# on a worker thread cannot be interrupted and runs to completion (its
+# result still lands in the memo). Sources not yet started are not run.
+
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="fetch-loop", daemon=True).start()
+        return _loop
+
+
+def run(coroutine, timeout=None):
+    """Runs a coroutine on the engine's event loop from synchronous code and returns its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop()).result(timeout)
+
+
+async def offload(func, *args, stats=None):
+    """
+    Awaits a blocking call (a requests or nsepython fetch) run on a worker
+    thread, within the engine's concurrency limit. The call counts against
+    `stats`, the statistics of the section it is made for, if given; the
+    loop thread itself never runs inside a section.
+    """
+    global _limit
+    if _limit is None:
+        _limit = asyncio.Semaphore(CONCURRENCY)  # Created on the loop that uses it
+
+    def call():
+        run_manifest.adopt(stats)
+        try:
+            return func(*args)
+        finally:
+            run_manifest.adopt(None)
+
+    async with _limit:
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def fetch(ctx, name):
+    """
+    The async variant of a source's fetcher (see SOURCES). Its work counts
+    against the section `name` (see RunContext.prefetch_stats).
+
+    Returns:
+        What the synchronous fetcher returns; None when it failed.
+    """
+    module_name, function, resource = SOURCES[name]
+
+    def call():
+        # Imported on the worker thread: importing yfinance or pandas would stall the loop
+        fetcher = getattr(importlib.import_module(module_name), function)
+        if resource != "yfinance":
+            return fetcher(ctx)
+        # Taken before the fetcher's memo entry, in the same order as a
+        # section of the slot (which holds the lock while it runs)
+        with section_runner.YFINANCE_LOCK:
+            return fetcher(ctx)
+
+    try:
+        return await offload(call, stats=ctx.prefetch_stats(name))
+    except Exception as e:
+        print(f"Warning: prefetch of '{name}' failed: {e}")
+        return None
+
+
+async def fetch_all(ctx, names, timeout=None):
+    """
+    Fetches several sources concurrently. Sources not done within `timeout`
+    seconds are cancelled (their worker thread finishes in the background).
+
+    Returns:
+        dict: The result per source name, None for failed or cancelled ones.
+    """
+    tasks = {name: asyncio.ensure_future(fetch(ctx, name)) for name in names if name in SOURCES}
+    if not tasks:
+        return {}
+    try:
+        done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"Warning: prefetch cancelled {len(pending)} unfinished source(s)")
+    return {name: task.result() if task in done else None for name, task in tasks.items()}
+
+
+def prefetch(ctx, names, timeout=None):
+    """Fetches the sources of the named sections concurrently and waits for them."""
+    return run(fetch_all(ctx, names, timeout))
+
+
+def start_prefetch(ctx, names):
+    """
+    Starts fetching the sources of the named sections in the background.
+
+    Returns:
+        concurrent.futures.Future of the fetch_all() result, or None when
+        none of the sections has a source the engine knows.
+    """
+    names = [name for name in names if name in SOURCES]
+    if not names:
+        return None
+    return asyncio.run_coroutine_threadsafe(fetch_all(ctx, names), _event_loop())
@@ -0,0 +1,523 @@
+import json
+import base64
+import asyncio
+import itertools
+import threading
+import collections
+import urllib.request
+from types import SimpleNamespace
+
+import dom_extract
+import network_capture
+import page_capture
+import page_readiness
+import request_blocking
+import run_manifest
+
+_CLICK_JS = """
+const [selector, xpath] = arguments;
+const el = xpath
+    ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(selector);
+if (!el) return false;
+el.click();
+return true;
+"""
+
+_FIND_JS = """
+const [selector, xpath] = arguments;
+const matches = xpath
+    ? (() => {
+        const found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        return Array.from({length: found.snapshotLength}, (_, i) => found.snapshotItem(i));
+    })()
+    : Array.from(document.querySelectorAll(selector));
+"""
+
+# Whether any matching element has a visible area
+_VISIBLE_JS = _FIND_JS + """
+return matches.some(el => {
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+});
+"""
+
+# Scrolls the first matching element with a visible area into view
+_SCROLL_INTO_VIEW_JS = _FIND_JS + """
+const el = matches.find(el => { const r = el.getBoundingClientRect(); return r.width > 0 || r.height > 0; });
+if (!el) return false;
+el.scrollIntoView(true);
+return true;
+"""
+
+# Virtual key codes of the keys press() sends, and the text a key types
+_KEY_CODES = {"ArrowDown": 40, "ArrowUp": 38, "ArrowLeft": 37, "ArrowRight": 39, "Enter": 13, "Escape": 27,
+              "Tab": 9}
+_KEY_TEXT = {"Enter": "\r"}
+
+
+# --- The interface sections use ---
+# A Page is one browser tab a section drives. Engines only supply a handful
+# of primitives, named after their WebDriver counterparts (get,
+# execute_script, execute_async_script, execute_cdp_cmd, ...), so the
+# existing helpers (page_readiness, page_capture, dom_extract,
+# request_blocking, network_capture) run unchanged on every engine and the
+# section-level methods below are shared.
+
+class Page:
+    """
+    A browser tab: navigate, wait, extract, screenshot and intercept.
+
+    Get one from RunContext.new_page() and hand it back with close().
+    """
+
+    # --- Engine primitives ---
+
+    def get(self, url):
+        raise NotImplementedError
+
+    def execute_script(self, script, *args):
+        raise NotImplementedError
+
+    def execute_async_script(self, script, *args):
+        raise NotImplementedError
+
+    def execute_cdp_cmd(self, command, params):
+        raise NotImplementedError
+
+    def get_screenshot_as_png(self):
+        raise NotImplementedError
+
+    def set_viewport(self, width, height):
+        raise NotImplementedError
+
+    def set_page_load_timeout(self, seconds):
+        raise NotImplementedError
+
+    def intercept(self, url_patterns):
+        """Starts recording the page's JSON API responses; returns a network_capture.NetworkCapture."""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    # --- Navigate and wait ---
+
+    def navigate(self, url):
+        """Loads a URL and returns once its load event fired."""
+        self.get(url)
+
+    def wait_for(self, selector, xpath=False, visible=False, placeholder=None, timeout=page_readiness.DEFAULT_TIMEOUT,
+                 label="element"):
+        """Waits for an element; see page_readiness.wait_for_element."""
+        return page_readiness.wait_for_element(self, selector, xpath, visible, placeholder, timeout, label)
+
+    def settle(self, target="body", timeout=page_readiness.DEFAULT_TIMEOUT, label="page settled"):
+        """Waits for the target to appear and stop changing; see page_readiness.settle."""
+        return page_readiness.settle(self, target, timeout, label)
+
+    def wait_for_dom_quiet(self, target="body", timeout=page_readiness.DEFAULT_TIMEOUT, label="DOM quiet"):
+        return page_readiness.wait_for_dom_quiet(self, target, timeout=timeout, label=label)
+
+    def wait_for_stable_svg(self, selector, timeout=page_readiness.DEFAULT_TIMEOUT, label="chart render"):
+        return page_readiness.wait_for_stable_svg(self, selector, timeout=timeout, label=label)
+
+    # --- Act and read ---
+
+    @property
+    def url(self):
+        return self.execute_script("return location.href;")
+
+    def html(self):
+        """The page's current HTML, as rendered (what WebDriver calls page_source)."""
+        return self.execute_script("return document.documentElement.outerHTML;")
+
+    def click(self, selector, xpath=False):
+        """Clicks the first matching element from inside the page. Returns False if there is none."""
+        return bool(self.execute_script(_CLICK_JS, selector, xpath))
+
+    def visible(self, selector, xpath=False):
+        """Whether an element matching the selector is displayed."""
+        return bool(self.execute_script(_VISIBLE_JS, selector, xpath))
+
+    def scroll_into_view(self, selector, xpath=False):
+        """Scrolls the first displayed matching element into view. Returns False if there is none."""
+        return bool(self.execute_script(_SCROLL_INTO_VIEW_JS, selector, xpath))
+
+    def press(self, key, times=1):
+        """
+        Presses a key ("ArrowDown", "Enter", "Escape", ...) in the focused
+        element, as real keyboard input (DevTools Input events).
+        """
+        code = _KEY_CODES[key]
+        for _ in range(times):
+            self.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                "type": "keyDown", "key": key, "code": key, "text": _KEY_TEXT.get(key, ""),
+                "windowsVirtualKeyCode": code, "nativeVirtualKeyCode": code,
+            })
+            self.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                "type": "keyUp", "key": key, "code": key,
+                "windowsVirtualKeyCode": code, "nativeVirtualKeyCode": code,
+            })
+
+    def extract(self, fields):
+        """Reads dom_extract Fields in one round trip."""
+        return dom_extract.extract(self, fields)
+
+    def rect(self, selector, xpath=False, index=0):
+        """Bounding box of the index-th matching element in page coordinates, or None."""
+        return page_capture.selector_rect(self, selector, xpath, index)
+
+    def block(self, profile):
+        """Applies a request_blocking profile to the tab."""
+        return request_blocking.apply(self, profile)
+
+    # --- Screenshots (PNG bytes) ---
+
+    def screenshot_element(self, selector, padding=0, fallback=None, xpath=False):
+        return page_capture.capture_selector(self, selector, padding, fallback, xpath)
+
+    def screenshot_clip(self, clip):
+        return page_capture.capture_clip(self, clip)
+
+    def screenshot_fraction(self, left, top, right, bottom):
+        return page_capture.capture_viewport_fraction(self, left, top, right, bottom)
+
+
+# --- Selenium engine ---
+
+class SeleniumPage(Page):
+    """
+    Page over a WebDriver from RunContext.new_driver (plain Selenium or
+    undetected_chromedriver). The driver stays reachable as .driver for
+    the steps that still need WebElements.
+    """
+
+    def __init__(self, driver, release):
+        self.driver = driver
+        self._release = release
+
+    @property
+    def timeouts(self):
+        return self.driver.timeouts
+
+    def set_script_timeout(self, seconds):
+        self.driver.set_script_timeout(seconds)
+
+    def get(self, url):
+        self.driver.get(url)
+
+    def execute_script(self, script, *args):
+        return self.driver.execute_script(script, *args)
+
+    def execute_async_script(self, script, *args):
+        return self.driver.execute_async_script(script, *args)
+
+    def execute_cdp_cmd(self, command, params):
+        return self.driver.execute_cdp_cmd(command, params)
+
+    def get_screenshot_as_png(self):
+        return self.driver.get_screenshot_as_png()
+
+    def set_viewport(self, width, height):
+        self.driver.set_window_size(width, height)
+
+    def set_page_load_timeout(self, seconds):
+        self.driver.set_page_load_timeout(seconds)
+
+    def intercept(self, url_patterns):
+        # Needs the performance log: new_page(..., network_log=True)
+        return network_capture.NetworkCapture(self.driver, url_patterns)
+
+    def close(self):
+        self._release(self.driver)
+
+
+# --- CDP engine ---
+# Talks to Chrome's DevTools websocket directly (the optional 'websockets'
+# package), without a chromedriver session in between. One connection per
+# browser multiplexes every tab attached to it (flattened sessions), and all
+# of them are driven from a single asyncio event loop, so the waits of many
+# pages interleave instead of each holding a thread. AsyncPage is the engine
+# itself, usable from async code; CdpPage adapts it to the synchronous Page
+# interface the sections use.
+
+class CdpError(Exception):
+    """A DevTools command failed or the connection was lost."""
+
+
+def _browser_websocket_url(debugger_address):
+    with urllib.request.urlopen(f"http://{debugger_address}/json/version", timeout=10) as response:
+        return json.load(response)['webSocketDebuggerUrl']
+
+
+class CdpConnection:
+    """One DevTools websocket to a browser, shared by the pages attached through it."""
+
+    def __init__(self, websocket):
+        self._websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}    # message id -> future of the reply
+        self._listeners = {}  # session id -> callback(method, params) for its events
+        self.closed = False
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def open(cls, debugger_address):
+        import websockets
+
+        url = await asyncio.get_running_loop().run_in_executor(None, _browser_websocket_url, debugger_address)
+        return cls(await websockets.connect(url, max_size=None))
+
+    async def send(self, method, params=None, session_id=None):
+        if self.closed:
+            raise CdpError("DevTools connection is closed")
+        message_id = next(self._ids)
+        reply = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = reply
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        await self._websocket.send(json.dumps(message))
+        return await reply
+
+    async def _read(self):
+        try:
+            async for raw in self._websocket:
+                message = json.loads(raw)
+                if 'id' in message:
+                    reply = self._pending.pop(message['id'], None)
+                    if reply is None or reply.done():
+                        continue
+                    if 'error' in message:
+                        reply.set_exception(CdpError(message['error'].get('message', "command failed")))
+                    else:
+                        reply.set_result(message.get('result', {}))
+                else:
+                    listener = self._listeners.get(message.get('sessionId'))
+                    if listener is not None:
+                        listener(message.get('method'), message.get('params', {}))
+        except Exception as e:
+            print(f"Warning: DevTools connection lost: {e}")
+        finally:
+            self.closed = True
+            for reply in self._pending.values():
+                if not reply.done():
+                    reply.set_exception(CdpError("DevTools connection closed"))
+            self._pending.clear()
+
+    async def attach(self, target_id):
+        """Attaches to a tab and returns its AsyncPage."""
+        result = await self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        page = AsyncPage(self, result['sessionId'])
+        self._listeners[page.session_id] = page._on_event
+        await page.cdp("Page.enable")
+        return page
+
+    def detach(self, page):
+        self._listeners.pop(page.session_id, None)
+
+    async def close(self):
+        await self._websocket.close()
+
+
+class AsyncPage:
+    """One tab driven over a CdpConnection, for async code."""
+
+    def __init__(self, connection, session_id):
+        self.connection = connection
+        self.session_id = session_id
+        self._loaded = asyncio.Event()
+        self._recording = False
+        self.network_events = collections.deque()  # (method, params) while intercepting
+
+    def _on_event(self, method, params):
+        # A fragment-only navigation (e.g. heatmap's #{...} view state on a
+        # reused tab) stays in the document and fires no load event
+        if method in ("Page.loadEventFired", "Page.navigatedWithinDocument"):
+            self._loaded.set()
+        elif self._recording and method.startswith("Network."):
+            self.network_events.append((method, params))
+
+    async def cdp(self, method, params=None):
+        return await self.connection.send(method, params, self.session_id)
+
+    async def navigate(self, url, timeout):
+        self._loaded.clear()
+        result = await self.cdp("Page.navigate", {"url": url})
+        if result.get('errorText'):
+            raise CdpError(f"could not load {url}: {result['errorText']}")
+        if not result.get('loaderId'):
+            return  # Same-document navigation: nothing is loaded
+        await asyncio.wait_for(self._loaded.wait(), timeout)
+
+    async def evaluate(self, script, *args):
+        """Runs a script body that reads `arguments` and may `return` a JSON value."""
+        expression = f"(function() {{\n{script}\n}}).apply(null, {json.dumps(list(args))})"
+        return await self._evaluate(expression)
+
+    async def evaluate_async(self, script, *args, timeout=30):
+        """Runs a script body that reports its result through the callback passed as its last argument."""
+        expression = (f"new Promise(done => (function() {{\n{script}\n}})"
+                      f".apply(null, {json.dumps(list(args))}.concat([done])))")
+        try:
+            return await asyncio.wait_for(self._evaluate(expression), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"script did not finish within {timeout}s")
+
+    async def _evaluate(self, expression):
+        result = await self.cdp("Runtime.evaluate", {"expression": expression, "returnByValue": True,
+                                                     "awaitPromise": True})
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise CdpError(details.get('exception', {}).get('description') or details.get('text'))
+        return result['result'].get('value')
+
+    async def screenshot(self):
+        result = await self.cdp("Page.captureScreenshot", {"format": "png"})
+        return base64.b64decode(result['data'])
+
+    async def intercept(self):
+        self._recording = True
+        await self.cdp("Network.enable")
+
+    async def apply_stealth(self):
+        """What browser_pool.attach does for stealth tabs: no HeadlessChrome UA, no navigator.webdriver."""
+        from browser_pool import STEALTH_SCRIPT
+
+        user_agent = await self.evaluate("return navigator.userAgent")
+        await self.cdp("Network.setUserAgentOverride", {"userAgent": user_agent.replace("HeadlessChrome", "Chrome")})
+        await self.cdp("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_SCRIPT})
+
+    async def set_viewport(self, width, height):
+        await self.cdp("Emulation.setDeviceMetricsOverride", {"width": width, "height": height,
+                                                              "deviceScaleFactor": 1, "mobile": False})
+
+    async def detach(self):
+        self.connection.detach(self)
+        await self.connection.send("Target.detachFromTarget", {"sessionId": self.session_id})
+
+
+# --- Running the CDP engine from synchronous code ---
+
+_loop = None
+_loop_lock = threading.Lock()
+_connections = {}  # debugger address -> CdpConnection, used on the loop thread only
+_connect_lock = None
+
+
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="cdp-loop", daemon=True).start()
+        return _loop
+
+
+def run(coroutine, timeout=None):
+    """Runs a coroutine on the process-wide CDP event loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop()).result(timeout)
+
+
+async def connect(debugger_address):
+    """The shared CdpConnection to a browser, opened on first use."""
+    global _connect_lock
+    if _connect_lock is None:
+        _connect_lock = asyncio.Lock()
+    async with _connect_lock:
+        connection = _connections.get(debugger_address)
+        if connection is None or connection.closed:
+            connection = _connections[debugger_address] = await CdpConnection.open(debugger_address)
+        return connection
+
+
+class _NetworkCapture(network_capture.NetworkCapture):
+    """NetworkCapture reading the events the CDP engine queued instead of a performance log."""
+
+    def _events(self):
+        events = self.driver.page.network_events
+        while events:
+            yield events.popleft()
+
+
+class CdpPage(Page):
+    """Synchronous Page over an AsyncPage, for the sections."""
+
+    def __init__(self, page, release, timeout=30):
+        self.page = page
+        self._release = release
+        self.page_load_timeout = timeout
+        self.timeouts = SimpleNamespace(script=timeout)
+
+    def set_script_timeout(self, seconds):
+        self.timeouts.script = seconds
+
+    def _run(self, coroutine, timeout=None):
+        # Bounded, so a browser that stops answering fails the section instead of hanging it
+        run_manifest.count("cdp_round_trips")
+        return run(coroutine, (timeout or self.page_load_timeout) + 5)
+
+    def get(self, url):
+        run_manifest.count("page_loads")
+        self._run(self.page.navigate(url, self.page_load_timeout))
+
+    def execute_script(self, script, *args):
+        return self._run(self.page.evaluate(script, *args))
+
+    def execute_async_script(self, script, *args):
+        return self._run(self.page.evaluate_async(script, *args, timeout=self.timeouts.script),
+                         self.timeouts.script)
+
+    def execute_cdp_cmd(self, command, params):
+        return self._run(self.page.cdp(command, params))
+
+    def get_screenshot_as_png(self):
+        return self._run(self.page.screenshot())
+
+    def set_viewport(self, width, height):
+        self._run(self.page.set_viewport(width, height))
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    def intercept(self, url_patterns):
+        self._run(self.page.intercept())
+        return _NetworkCapture(self, url_patterns)
+
+    def quit(self):
+        """Ends the DevTools session; the tab itself belongs to the browser pool."""
+        try:
+            run(self.page.detach(), timeout=10)
+        except Exception:
+            pass  # The connection is gone, and the session with it
+
+    def close(self):
+        self._release(self)
+
+
+def open_cdp_page(lease, release, timeout=30):
+    """
+    Drives a browser_pool Lease's tab with the CDP engine.
+
+    Args:
+        lease (Lease): The tab to drive.
+        release (callable): Called with the page when the section closes it.
+        timeout (float): Page load and script timeout in seconds.
+
+    Returns:
+        A CdpPage.
+    """
+    async def attach():
+        page = await (await connect(lease.debugger_address)).attach(lease.target_id)
+        try:
+            if lease.kind[0] == "stealth":
+                await page.apply_stealth()
+            if isinstance(lease.window, tuple):
+                await page.set_viewport(*lease.window)
+        except Exception:
+            await page.detach()
+            raise
+        return page
+
+    return CdpPage(run(attach(), timeout), release, timeout)
@@ -0,0 +1,324 @@
+import time
+import threading
+from dataclasses import dataclass
+
+# A browser process serves this many leased tabs at once...
+MAX_TABS_PER_BROWSER = 4
+# ...and each kind of browser is started at most this many times.
+MAX_BROWSERS_PER_KIND = 2
+# Browsers are restarted after this many leases to shed leaked memory.
+MAX_LEASES_PER_BROWSER = 50
+
+# undetected_chromedriver only hides automation in the tab it drives itself,
+# so leased stealth tabs get the same treatment when they are attached.
+STEALTH_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+
+
+@dataclass
+class Lease:
+    """
+    A browser tab leased from the pool, in its own browser context (its own
+    cookies, cache and storage).
+
+    A lease only describes where the tab lives, so it is picklable and can be
+    handed to an isolated section in a child process, which attaches its own
+    WebDriver session to the tab with attach().
+
+    Attributes:
+        kind (tuple): The kind of browser the tab lives in, see browser_kind.
+        debugger_address (str): host:port of the browser's DevTools endpoint.
+        driver_path (str): chromedriver binary able to attach to the browser.
+        target_id (str): DevTools target of the tab (its window handle).
+        context_id (str): The browser context created for the tab.
+        window: (width, height), "maximized" or None.
+    """
+    kind: tuple
+    debugger_address: str
+    driver_path: str
+    target_id: str
+    context_id: str
+    window: object = None
+
+
+def browser_kind(options, stealth=False):
+    """Tabs can share a browser when both are stealth or not, and both headless or not."""
+    headless = any(arg.startswith("--headless") for arg in options.arguments)
+    return ("stealth" if stealth else "plain", "headless" if headless else "visible")
+
+
+def window_of(options):
+    """The window a section asked for in its options: (width, height), "maximized" or None."""
+    for arg in options.arguments:
+        if arg.startswith("--window-size="):
+            width, height = arg.split("=", 1)[1].split(",")
+            return int(width), int(height)
+        if arg == "--start-maximized":
+            return "maximized"
+    return None
+
+
+def attach(lease, network_log=False):
+    """
+    Attaches a new WebDriver session to a leased tab. Quitting the returned
+    driver ends the session only; the browser and the tab stay with the pool.
+    With network_log the session records the performance log that
+    network_capture reads.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
+    options = webdriver.ChromeOptions()
+    options.debugger_address = lease.debugger_address
+    if network_log:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    driver = webdriver.Chrome(service=ChromeService(lease.driver_path), options=options)
+    try:
+        driver.switch_to.window(lease.target_id)
+        if lease.kind[0] == "stealth":
+            user_agent = driver.execute_script("return navigator.userAgent")
+            driver.execute_cdp_cmd("Network.setUserAgentOverride",
+                                   {"userAgent": user_agent.replace("HeadlessChrome", "Chrome")})
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_SCRIPT})
+        if lease.window == "maximized":
+            driver.maximize_window()
+        elif lease.window:
+            driver.set_window_size(*lease.window)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+def _debugger_address(anchor):
+    address = anchor.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    if not address:
+        # undetected_chromedriver attaches to the browser it started itself
+        address = getattr(getattr(anchor, "options", None), "debugger_address", None)
+    if not address:
+        raise RuntimeError("browser does not expose a DevTools address")
+    return address
+
+
+class _Browser:
+    """One pooled Chrome process, driven through its 'anchor' WebDriver session."""
+
+    def __init__(self, kind, anchor, driver_path):
+        self.kind = kind
+        self.anchor = anchor
+        self.driver_path = driver_path
+        self.debugger_address = _debugger_address(anchor)
+        self.lock = threading.Lock()
+        self.tabs = 0
+        self.leases = 0
+        self.healthy = True
+
+    def cdp(self, command, params=None):
+        with self.lock:
+            return self.anchor.execute_cdp_cmd(command, params or {})
+
+    def alive(self):
+        try:
+            self.cdp("Browser.getVersion")
+            return True
+        except Exception:
+            return False
+
+
+class BrowserPool:
+    """
+    Shares a few Chrome processes between the sections of a run.
+
+    Instead of starting its own Chrome (a few seconds and roughly 300 MB
+    each), a section leases a tab in a pooled browser of the right kind.
+    Every tab gets its own browser context, which is disposed of when the
+    lease is returned, so no cookies or storage leak between sections.
+    Browsers are health-checked before a tab is leased from them and
+    retired when they stop answering or have served MAX_LEASES_PER_BROWSER
+    leases.
+    """
+
+    def __init__(self, launch, chromedriver_path, max_browsers=MAX_BROWSERS_PER_KIND,
+                 max_tabs=MAX_TABS_PER_BROWSER):
+        """
+        Args:
+            launch (callable): launch(options, stealth) starts a Chrome
+                WebDriver, e.g. RunContext's launcher.
+            chromedriver_path (callable): Returns the chromedriver binary
+                used to attach to plain browsers. Stealth browsers are
+                attached to with the binary undetected_chromedriver patched.
+        """
+        self._launch = launch
+        self._chromedriver_path = chromedriver_path
+        self.max_browsers = max_browsers
+        self.max_tabs = max_tabs
+        self._cond = threading.Condition()
+        self._browsers = {}  # kind -> [_Browser]
+        self._starting = {}  # kind -> browsers being started
+        self._closed = False
+        self.stats = {"browsers_started": 0, "browsers_retired": 0, "leases": 0,
+                      "resets": 0, "health_failures": 0}
+
+    # --- Browsers ---
+
+    def _start(self, kind, options, stealth):
+        anchor = self._launch(options, stealth)
+        try:
+            if stealth:
+                driver_path = anchor.patcher.executable_path
+            else:
+                driver_path = self._chromedriver_path()
+            browser = _Browser(kind, anchor, driver_path)
+        except Exception:
+            anchor.quit()
+            raise
+        with self._cond:
+            self.stats['browsers_started'] += 1
+        return browser
+
+    def _retire(self, browser):
+        with self._cond:
+            browsers = self._browsers.get(browser.kind, [])
+            if browser in browsers:
+                browsers.remove(browser)
+                self.stats['browsers_retired'] += 1
+            self._cond.notify_all()
+        try:
+            browser.anchor.quit()
+        except Exception:
+            print("Warning: Could not close pooled browser cleanly")
+
+    def _fail(self, browser):
+        """
+        Gives back the tab slot reserved in a browser that failed. It takes
+        no new leases, and is retired once no other lease is using it.
+        """
+        with self._cond:
+            browser.tabs -= 1
+            browser.healthy = False
+            retire = browser.tabs == 0
+            self._cond.notify_all()
+        if retire:
+            self._retire(browser)
+
+    def prewarm(self, options, stealth=False):
+        """Starts a browser of this kind unless one is already running or starting."""
+        kind = browser_kind(options, stealth)
+        with self._cond:
+            if self._closed or self._browsers.get(kind) or self._starting.get(kind):
+                return
+            self._starting[kind] = 1
+        try:
+            self._add_started(kind, options, stealth)
+        except Exception as e:
+            print(f"Warning: could not prewarm a {'/'.join(kind)} browser: {e}")
+
+    def _add_started(self, kind, options, stealth, tabs=0):
+        try:
+            browser = self._start(kind, options, stealth)
+        finally:
+            with self._cond:
+                self._starting[kind] -= 1
+                self._cond.notify_all()
+        browser.tabs = tabs
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._browsers.setdefault(kind, []).append(browser)
+        if closed:
+            self._retire(browser)
+            raise RuntimeError("browser pool is closed")
+        return browser
+
+    # --- Leases ---
+
+    def acquire(self, options, stealth=False, timeout=None):
+        """
+        Leases a fresh tab in a browser matching the section's options,
+        starting a browser if none has room. Waits (up to timeout seconds)
+        when every browser of the kind is full.
+
+        Returns:
+            A Lease. Give it back with release().
+        """
+        kind = browser_kind(options, stealth)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            browser = self._reserve(kind, options, stealth, deadline)
+            if browser.alive():
+                break
+            print(f"Warning: pooled {'/'.join(kind)} browser stopped responding - replacing it")
+            with self._cond:
+                self.stats['health_failures'] += 1
+            self._fail(browser)
+        try:
+            context_id = browser.cdp("Target.createBrowserContext")['browserContextId']
+            target_id = browser.cdp("Target.createTarget", {
+                "url": "about:blank", "browserContextId": context_id,
+            })['targetId']
+        except Exception:
+            self._fail(browser)
+            raise
+        with self._cond:
+            browser.leases += 1
+            self.stats['leases'] += 1
+        return Lease(kind, browser.debugger_address, browser.driver_path, target_id, context_id,
+                     window_of(options))
+
+    def _reserve(self, kind, options, stealth, deadline):
+        """
+        Takes a tab slot in a browser of the kind, starting one when allowed.
+        Waits until the deadline (a time.monotonic() value; None waits for
+        as long as it takes) for one to free up.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("browser pool is closed")
+                healthy = [browser for browser in self._browsers.setdefault(kind, []) if browser.healthy]
+                for browser in healthy:
+                    if browser.tabs < self.max_tabs:
+                        browser.tabs += 1
+                        return browser
+                # A browser already starting will have room soon: wait for it
+                # rather than paying for another one. Failed browsers still
+                # finishing their leases do not count against the limit.
+                if not self._starting.get(kind) and len(healthy) < self.max_browsers:
+                    self._starting[kind] = 1
+                    break
+                # Notifications do not restart the wait: it ends at the deadline
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"no {'/'.join(kind)} browser tab free in time")
+                self._cond.wait(remaining)
+        return self._add_started(kind, options, stealth, tabs=1)
+
+    def release(self, lease):
+        """Closes a leased tab and disposes of its browser context."""
+        with self._cond:
+            browser = next((b for b in self._browsers.get(lease.kind, [])
+                            if b.debugger_address == lease.debugger_address), None)
+        if browser is None:
+            return  # Its browser was retired meanwhile
+        try:
+            browser.cdp("Target.closeTarget", {"targetId": lease.target_id})
+            browser.cdp("Target.disposeBrowserContext", {"browserContextId": lease.context_id})
+            with self._cond:
+                self.stats['resets'] += 1
+        except Exception as e:
+            print(f"Warning: could not reset pooled tab: {e}")
+            browser.healthy = False
+        with self._cond:
+            browser.tabs -= 1
+            retire = browser.tabs == 0 and (not browser.healthy or browser.leases >= MAX_LEASES_PER_BROWSER)
+            self._cond.notify_all()
+        if retire:
+            self._retire(browser)
+
+    def close(self):
+        """Quits every pooled browser."""
+        with self._cond:
+            self._closed = True
+            browsers = [browser for pending in self._browsers.values() for browser in pending]
+            self._cond.notify_all()
+        for browser in browsers:
+            self._retire(browser)
@@ -0,0 +1,252 @@
+import os
+import re
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import subprocess
+
+# Where drivers and warm profiles are kept between runs
+CACHE_DIR = os.environ.get("REPORT_BROWSER_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "stock_market_report"))
+DRIVERS_FILE = "drivers.json"
+
+# Where Chrome is usually found, when it is not on the PATH
+CHROME_COMMANDS = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+CHROME_PATHS = [
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+]
+
+# Profile contents that are caches, locks or crash dumps rather than site state
+PROFILE_SKIP = ("Cache", "Code Cache", "GPUCache", "GrShaderCache", "ShaderCache", "DawnCache",
+                "Crashpad", "SingletonLock", "SingletonSocket", "SingletonCookie", "*.tmp")
+
+# Cookie fields Network.setCookies accepts
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+_lock = threading.Lock()
+_chrome_version = None
+_detected = False
+
+stats = {"chrome_version": None, "driver_cache_hits": 0, "driver_installs": 0,
+         "profile_restores": 0, "profile_snapshots": 0}
+
+
+# --- Chrome version ---
+
+def _version_from(command):
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+    return match.group(0) if match else None
+
+
+def _detect_chrome_version():
+    if sys.platform == "win32":
+        # chrome.exe --version prints nothing on Windows; the updater records it
+        version = _version_from(["reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+                                 "/v", "version"])
+        if version:
+            return version
+    binaries = [shutil.which(command) for command in CHROME_COMMANDS]
+    binaries += [path for path in CHROME_PATHS if os.path.exists(path)]
+    for binary in filter(None, binaries):
+        version = _version_from([binary, "--version"])
+        if version:
+            return version
+    return None
+
+
+def chrome_version():
+    """The installed Chrome's version, e.g. '137.0.7151.68', detected once per process. None if not found."""
+    global _chrome_version, _detected
+    with _lock:
+        if not _detected:
+            _chrome_version = _detect_chrome_version()
+            _detected = True
+            stats['chrome_version'] = _chrome_version
+            if _chrome_version is None:
+                print("Warning: could not detect the installed Chrome version")
+        return _chrome_version
+
+
+def chrome_major():
+    """The installed Chrome's major version (e.g. 137), or None if not found."""
+    version = chrome_version()
+    return int(version.split(".")[0]) if version else None
+
+
+# --- Driver binaries ---
+
+def _write_json(path, data):
+    """Writes JSON through a temporary file, so readers never see half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(handle, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def chromedriver_path():
+    """
+    The chromedriver matching the installed Chrome. It is installed through
+    webdriver_manager the first time a Chrome version is seen and read from
+    the cache afterwards, without importing webdriver_manager or going to
+    the network.
+    """
+    major = chrome_major()
+    drivers_file = os.path.join(CACHE_DIR, DRIVERS_FILE)
+    with _lock:
+        drivers = _read_json(drivers_file, {})
+        path = drivers.get(str(major))
+        if major is not None and path and os.path.exists(path):
+            stats['driver_cache_hits'] += 1
+            return path
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        stats['driver_installs'] += 1
+        if major is not None:
+            drivers[str(major)] = path
+            _write_json(drivers_file, drivers)
+        return path
+
+
+def stealth_driver_path():
+    """
+    A chromedriver copy kept for undetected_chromedriver, which patches it
+    on its first launch and reuses it afterwards, instead of downloading and
+    patching a fresh binary at every launch.
+
+    Returns:
+        str: The binary's path, or None when Chrome's version is unknown
+        (undetected_chromedriver then provisions its own).
+    """
+    major = chrome_major()
+    if major is None:
+        return None
+    name = "undetected_chromedriver.exe" if sys.platform == "win32" else "undetected_chromedriver"
+    path = os.path.join(CACHE_DIR, "drivers", str(major), name)
+    if not os.path.exists(path):
+        source = chromedriver_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(handle)
+        shutil.copy2(source, temp)
+        os.replace(temp, path)
+    return path
+
+
+# --- Warm per-site profiles ---
+# Sites remember cookie banners and consent choices in cookies and local
+# storage. Each site keeps a saved profile that every browser for the site
+# starts from: a browser of its own gets a private copy of the saved
+# user-data directory (restore_profile) whose state is saved back when it
+# quits (snapshot_profile); a tab in a pooled browser, which shares the
+# browser's profile, gets the site's saved cookies instead (load_cookies /
+# save_cookies). Either way sections never write into a profile another
+# browser is using.
+
+def profile_dir(site):
+    """Directory holding the saved profile of a site."""
+    return os.path.join(CACHE_DIR, "profiles", site)
+
+
+def restore_profile(site):
+    """
+    Makes a private working copy of a site's saved profile.
+
+    Returns:
+        str: The user-data directory to start Chrome with (empty when the
+        site has no saved profile yet). Remove it with discard_profile().
+    """
+    work = tempfile.mkdtemp(prefix=f"profile-{site}-")
+    saved = os.path.join(profile_dir(site), "user-data")
+    if os.path.isdir(saved):
+        try:
+            shutil.copytree(saved, work, dirs_exist_ok=True)
+            stats['profile_restores'] += 1
+        except (OSError, shutil.Error) as e:
+            print(f"Warning: could not restore the {site} profile, starting from an empty one: {e}")
+    return work
+
+
+def snapshot_profile(site, user_data_dir):
+    """Saves the profile of a browser that has quit as the site's new saved profile."""
+    target = os.path.join(profile_dir(site), "user-data")
+    try:
+        os.makedirs(profile_dir(site), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="snapshot-", dir=profile_dir(site))
+        shutil.copytree(user_data_dir, staging, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns(*PROFILE_SKIP))
+        with _lock:
+            previous = None
+            if os.path.isdir(target):
+                previous = tempfile.mkdtemp(prefix="previous-", dir=profile_dir(site))
+                os.rmdir(previous)
+                os.rename(target, previous)
+            os.rename(staging, target)
+            stats['profile_snapshots'] += 1
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    except (OSError, shutil.Error) as e:
+        print(f"Warning: could not save the {site} profile: {e}")
+
+
+def discard_profile(user_data_dir):
+    """Removes a working copy made by restore_profile()."""
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+
+
+def load_cookies(driver, site):
+    """
+    Sets a site's saved cookies in the driver's tab. Call it before the
+    section navigates.
+
+    Returns:
+        int: The number of cookies set.
+    """
+    cookies = _read_json(os.path.join(profile_dir(site), "cookies.json"), [])
+    if not cookies:
+        return 0
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+    except Exception as e:
+        print(f"Warning: could not restore the {site} cookies: {e}")
+        return 0
+    stats['profile_restores'] += 1
+    return len(cookies)
+
+
+def save_cookies(driver, site):
+    """Saves the cookies of the page open in the driver's tab as the site's cookies."""
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getCookies", {})['cookies']
+    except Exception as e:
+        print(f"Warning: could not read the {site} cookies: {e}")
+        return
+    if not cookies:
+        return
+    kept = []
+    for cookie in cookies:
+        cookie = {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+        if cookie.get('expires', -1) <= 0:
+            cookie.pop('expires', None)  # Session cookie
+        kept.append(cookie)
+    try:
+        _write_json(os.path.join(profile_dir(site), "cookies.json"), kept)
+        stats['profile_snapshots'] += 1
+    except OSError as e:
+        print(f"Warning: could not save the {site} cookies: {e}")
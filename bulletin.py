@@ -1,8 +1,15 @@
-import requests
 import time
-from bs4 import BeautifulSoup
+import html_parse
 from docx import Document
 from docx.shared import Inches, Pt
+from run_context import default_context
+
+MARKET_NEWS_URL = "https://www.livemint.com/market/stock-market-news"
+MONEYCONTROL_NEWS_URL = "https://www.moneycontrol.com/news/business/markets/"
+
+# The containers the news listings are read from
+MARKET_NEWS_TARGET = html_parse.Target("h2.headline", "div.listingNew")
+MONEYCONTROL_TARGET = html_parse.Target("ul#cagetory", "ul.article_listing", "div.article-list")
 
 # --- Functions for Word Document Formatting ---
 # These are needed for the title's background shading.
@@ -22,72 +29,169 @@ except ImportError:
     def add_shading_to_paragraph(paragraph, color): pass
 
 
-def create_filtered_market_bulletin(output_filename="Market_Bulletin_Filtered.docx"):
+def _parse_market_news(response):
+    """The first 10 non-empty headlines of the livemint listing (None when it has none)."""
+    soup = html_parse.parse(response.content, MARKET_NEWS_TARGET, label="livemint news")
+    headlines_items = []
+    
+    # Find all h2 headings first
+    h2_items = soup.find_all('h2', class_='headline')
+    if h2_items:
+        headlines_items.extend(h2_items)
+        
+    # Also look for article headlines in list items
+    article_items = soup.find_all('div', class_='listingNew')
+    if article_items:
+        headlines_items.extend(article_items)
+
+    if not headlines_items:
+        return None
+
+    # Keep the first 10 non-empty headlines
+    return [text for text in (item.get_text(strip=True) for item in headlines_items[:10]) if text]
+
+
+def get_market_headlines(ctx=None):
+    """
+    Reads the top 10 headlines of livemint's market news listing.
+
+    Args:
+        ctx (RunContext): Shared run context; the listing is fetched once
+            per context. Defaults to the process-wide context.
+
+    Returns:
+        list: The headlines, or None when the listing has none.
+    """
+    ctx = ctx or default_context()
+    return ctx.memo("market_news", lambda: _fetch_market_headlines(ctx))
+
+
+def _fetch_market_headlines(ctx):
+    response = ctx.http.get(MARKET_NEWS_URL)
+    response.raise_for_status()
+    # An unchanged listing is not parsed again
+    return ctx.http.parsed(response, "livemint_news", _parse_market_news)
+
+
+def _parse_news_items(response):
+    """
+    Reads the (headline, summary) pairs of the listing, skipping
+    Moneycontrol's own promotional articles.
+
+    Returns:
+        list: Up to 10 pairs, or None when the page has no usable news.
+    """
+    soup = html_parse.parse(response.content, MONEYCONTROL_TARGET, label="moneycontrol news")
+    # First try 'cagetory'
+    news_list = soup.find('ul', id='cagetory')
+    
+    # If not found, try other common containers
+    if not news_list:
+        print("Trying alternative selectors...")
+        news_list = soup.find('ul', class_='article_listing')
+        
+    if not news_list:
+        news_list = soup.find('div', class_='article-list')
+        
+    if not news_list:
+        print("Could not find the news list on the page.")
+        print("Page content preview:", response.text[:500])  # Print first 500 chars for debugging
+        return None
+        
+    # Fetch more headlines than we need, to account for filtering
+    headlines_items = news_list.find_all('li', class_='clearfix', limit=20)
+    if not headlines_items:
+        print("Could not find any news items."); return None
+
+    news_items = []
+    for item in headlines_items:
+        # Stop after we have found 10 good headlines
+        if len(news_items) >= 10:
+            break
+
+        headline_tag = item.find('h2')
+        summary_tag = item.find('p')
+        
+        if headline_tag and headline_tag.a and summary_tag:
+            headline_text = headline_tag.a.get_text(strip=True)
+            summary_text = summary_tag.get_text(strip=True)
+            
+            # --- THE FILTERING LOGIC IS HERE ---
+            # Check if 'moneycontrol' (case-insensitive) is in either text
+            if 'moneycontrol' in headline_text.lower() or 'moneycontrol' in summary_text.lower():
+                print(f"  > Skipping self-promotional article: '{headline_text[:50]}...'")
+                continue # Skip to the next item in the loop
+            news_items.append((headline_text, summary_text))
+
+    if not news_items:
+        print("Could not find any suitable news after filtering.")
+        return None
+    return news_items
+
+
+def get_moneycontrol_news(ctx=None):
+    """
+    Reads the (headline, summary) pairs of Moneycontrol's markets news,
+    without its promotional articles.
+
+    Args:
+        ctx (RunContext): Shared run context whose HTTP client (and its
+            cookies) is used; the listing is fetched once per context.
+            Defaults to the process-wide context.
+
+    Returns:
+        list: Up to 10 pairs, or None when the page has no usable news.
+    """
+    ctx = ctx or default_context()
+    return ctx.memo("moneycontrol_news", lambda: _fetch_moneycontrol_news(ctx))
+
+
+def _fetch_moneycontrol_news(ctx):
+    http = ctx.http
+    # Navigation headers on top of the shared client's User-Agent and Accept headers
+    headers = {
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0'
+    }
+    # A fresh cached listing needs no homepage visit; otherwise get the
+    # homepage first to set cookies
+    response = http.cached(MONEYCONTROL_NEWS_URL, headers=headers)
+    if response is None:
+        time.sleep(2)  # Add a small delay
+        http.get("https://www.moneycontrol.com", headers=headers, cache=False)
+        time.sleep(1)  # Small delay between requests
+        response = http.get(MONEYCONTROL_NEWS_URL, headers=headers)
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+
+    # An unchanged listing is not parsed again
+    return http.parsed(response, "moneycontrol_news", _parse_news_items)
+
+
+def create_filtered_market_bulletin(output_filename="Market_Bulletin_Filtered.docx", ctx=None):
     """
     Scrapes market news, filters out items containing 'Moneycontrol',
     formats the top 10 remaining items, and saves them to a .docx file.
 
     Args:
         output_filename (str): The name of the output .docx file.
+        ctx (RunContext): Shared run context whose HTTP client (and its
+            cookies) is used. Defaults to the process-wide context.
 
     Returns:
         bool: True if successful, False otherwise.
     """
     print("Fetching latest market news from MoneyControl...")
     
+    ctx = ctx or default_context()
     try:
-        url = "https://www.moneycontrol.com/news/business/markets/"
-        session = requests.Session()
-        time.sleep(2)  # Add a small delay
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        }
-        # First get the homepage to set cookies
-        session.get("https://www.moneycontrol.com", headers=headers, timeout=10)
-        time.sleep(1)  # Small delay between requests
-        response = session.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-
-        content = response.content
-
-        # Print response headers for debugging
-        #print("Response Headers:", dict(response.headers))
-        
-        # Print response content length
-        #print("Content Length:", len(response.content))
-
-        soup = BeautifulSoup(content, 'html.parser')
-        # First try 'cagetory'
-        news_list = soup.find('ul', id='cagetory')
-        
-        # If not found, try other common containers
-        if not news_list:
-            print("Trying alternative selectors...")
-            news_list = soup.find('ul', class_='article_listing')
-            
-        if not news_list:
-            news_list = soup.find('div', class_='article-list')
-            
-        if not news_list:
-            print("Could not find the news list on the page.")
-            print("Page content preview:", soup.get_text()[:500])  # Print first 500 chars for debugging
+        news_items = get_moneycontrol_news(ctx)
+        if not news_items:
             return False
-            
-        # Fetch more headlines than we need, to account for filtering
-        headlines_items = news_list.find_all('li', class_='clearfix', limit=20)
-        if not headlines_items:
-            print("Could not find any news items."); return False
 
         print(f"Filtering news and creating '{output_filename}'...")
         document = Document()
@@ -101,62 +205,39 @@ def create_filtered_market_bulletin(output_filename="Market_Bulletin_Filtered.do
         add_shading_to_paragraph(title_paragraph, color="000000")
         document.add_paragraph()
 
-        # --- Filter and Add News Items ---
+        # --- Add News Items ---
         news_count = 0
-        for item in headlines_items:
-            # Stop after we have found 10 good headlines
-            if news_count >= 10:
-                break
-
-            headline_tag = item.find('h2')
-            summary_tag = item.find('p')
+        for headline_text, summary_text in news_items:
+            # Add numbered headline in bold
+            # Add numbered headline with custom formatting
+            p_headline = document.add_paragraph()
+            number_run = p_headline.add_run(f"{news_count + 1}. ")  # Manual numbering
+            number_run.bold = True
+            number_run.font.size = Pt(12)
+            
+            p_headline.paragraph_format.left_indent = Inches(0.25)
+            p_headline.paragraph_format.first_line_indent = Inches(-0.25)
+            runner = p_headline.add_run(f"{headline_text}")
+            runner.bold = True
+            runner.font.size = Pt(12)
+            
+            # Add styled summary text below
+            p_summary = document.add_paragraph()
+            p_summary.paragraph_format.left_indent = Inches(0.5)
+            summary_run = p_summary.add_run(summary_text)
+            summary_run.italic = True  # Make summary italic
+            summary_run.font.size = Pt(11)  # Slightly smaller font
+            summary_run.font.color.rgb = docx.shared.RGBColor(89, 89, 89)  # Gray color
             
-            if headline_tag and headline_tag.a and summary_tag:
-                headline_text = headline_tag.a.get_text(strip=True)
-                summary_text = summary_tag.get_text(strip=True)
-                
-                # --- THE FILTERING LOGIC IS HERE ---
-                # Check if 'moneycontrol' (case-insensitive) is in either text
-                if 'moneycontrol' in headline_text.lower() or 'moneycontrol' in summary_text.lower():
-                    print(f"  > Skipping self-promotional article: '{headline_text[:50]}...'")
-                    continue # Skip to the next item in the loop
-                
-                # --- If the filter passes, add the content to the document ---
-                
-                # Add numbered headline in bold
-                # Add numbered headline with custom formatting
-                p_headline = document.add_paragraph()
-                number_run = p_headline.add_run(f"{news_count + 1}. ")  # Manual numbering
-                number_run.bold = True
-                number_run.font.size = Pt(12)
-                
-                p_headline.paragraph_format.left_indent = Inches(0.25)
-                p_headline.paragraph_format.first_line_indent = Inches(-0.25)
-                runner = p_headline.add_run(f"{headline_text}")
-                runner.bold = True
-                runner.font.size = Pt(12)
-                
-                # Add styled summary text below
-                p_summary = document.add_paragraph()
-                p_summary.paragraph_format.left_indent = Inches(0.5)
-                summary_run = p_summary.add_run(summary_text)
-                summary_run.italic = True  # Make summary italic
-                summary_run.font.size = Pt(11)  # Slightly smaller font
-                summary_run.font.color.rgb = docx.shared.RGBColor(89, 89, 89)  # Gray color
-                
-                # Adjust spacing
-                p_headline.paragraph_format.space_before = Pt(12)
-                p_headline.paragraph_format.space_after = Pt(6)
-                p_summary.paragraph_format.space_before = Pt(0)
-                p_summary.paragraph_format.space_after = Pt(18)  # More space between items
-                
-                # Increment the counter of news items we've added
-                news_count += 1
+            # Adjust spacing
+            p_headline.paragraph_format.space_before = Pt(12)
+            p_headline.paragraph_format.space_after = Pt(6)
+            p_summary.paragraph_format.space_before = Pt(0)
+            p_summary.paragraph_format.space_after = Pt(18)  # More space between items
+            
+            # Increment the counter of news items we've added
+            news_count += 1
         
-        if news_count == 0:
-            print("Could not find any suitable news after filtering.")
-            return False
-
         document.save(output_filename)
         print(f"Filtered Market Bulletin with {news_count} items created successfully.")
         #return True
@@ -1,13 +1,22 @@
 import yfinance as yf
+from run_context import default_context
 
-def get_currency_exchange_rates():
+def get_currency_exchange_rates(ctx=None):
     """
     Fetches the latest exchange rates for popular currencies against the INR.
 
+    Args:
+        ctx (RunContext): Shared run context; rates are fetched once per
+            context. Defaults to the process-wide context.
+
     Returns:
         A list of dictionaries, where each dictionary represents a currency
         with its name, country, and value against INR. Returns None on failure.
     """
+    ctx = ctx or default_context()
+    return ctx.memo("currency_rates", _fetch_currency_exchange_rates)
+
+def _fetch_currency_exchange_rates():
     print("Fetching latest currency exchange rates against INR...")
 
     # --- THE FIX IS HERE: Replaced KWD with AED ---
@@ -0,0 +1,121 @@
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+
+# --- Declarative extraction ---
+# Reading a page element by element costs one WebDriver round trip per
+# find_element and per .text. A section instead describes every value it
+# needs as a Field, and extract() reads all of them in a single
+# execute_script call that returns one JSON object. Parsing happens in
+# Python afterwards, on the returned strings.
+
+@dataclass
+class Field:
+    """
+    One value to read from the page.
+
+    Attributes:
+        selector (str): CSS selector, or an XPath expression with xpath=True.
+        xpath (bool): Whether selector is an XPath expression.
+        many (bool): Return a list with one entry per matching element
+            instead of the first match only.
+        attribute (str): Read this attribute instead of the rendered text.
+        children (str): CSS selector inside each match; the entry is then
+            the list of the texts of those children.
+        contains (str): Only keep matches whose text contains this.
+        after (str): Keep the text following this label inside the match,
+            as a list of its next `lines` non-empty lines.
+        lines (int): How many lines `after` returns.
+        parse (callable): Converts the raw value in Python. A value it
+            cannot parse (ValueError, TypeError, ...) becomes None.
+    """
+    selector: str
+    xpath: bool = False
+    many: bool = False
+    attribute: Optional[str] = None
+    children: Optional[str] = None
+    contains: Optional[str] = None
+    after: Optional[str] = None
+    lines: int = 3
+    parse: Optional[Callable] = None
+
+    def spec(self):
+        """The field as sent to the browser (everything but parse)."""
+        spec = asdict(self)
+        spec.pop('parse')
+        return spec
+
+
+_EXTRACT_JS = """
+const specs = arguments[0];
+const textOf = n => (n.innerText !== undefined ? n.innerText : n.textContent) || '';
+const find = spec => {
+    if (!spec.xpath) return Array.from(document.querySelectorAll(spec.selector));
+    const found = document.evaluate(spec.selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < found.snapshotLength; i++) nodes.push(found.snapshotItem(i));
+    return nodes;
+};
+const out = {};
+for (const [name, spec] of Object.entries(specs)) {
+    let values;
+    try {
+        const nodes = find(spec);
+        if (spec.children) {
+            values = nodes.map(n => Array.from(n.querySelectorAll(spec.children)).map(c => textOf(c).trim()));
+        } else {
+            values = nodes.map(n => (spec.attribute ? n.getAttribute(spec.attribute) : textOf(n)) || '');
+            if (spec.contains) values = values.filter(v => v.includes(spec.contains));
+            if (spec.after) {
+                values = values.filter(v => v.includes(spec.after)).map(v =>
+                    v.slice(v.indexOf(spec.after) + spec.after.length)
+                     .split('\\n').map(line => line.trim()).filter(line => line).slice(0, spec.lines));
+            }
+        }
+    } catch (e) {
+        values = [];  // Invalid selector, or the page changed underneath
+    }
+    out[name] = spec.many ? values : (values.length ? values[0] : null);
+}
+return out;
+"""
+
+
+def extract(driver, fields):
+    """
+    Reads every field in one round trip.
+
+    Args:
+        driver: A WebDriver with the page loaded.
+        fields (dict): Field per name.
+
+    Returns:
+        dict: The parsed value per name; None for a field that matched
+        nothing or could not be parsed.
+    """
+    raw = driver.execute_script(_EXTRACT_JS, {name: field.spec() for name, field in fields.items()}) or {}
+    values = {}
+    for name, field in fields.items():
+        value = raw.get(name)
+        if value is not None and field.parse is not None:
+            try:
+                value = field.parse(value)
+            except (ValueError, TypeError, AttributeError, IndexError, KeyError):
+                value = None
+        values[name] = value
+    return values
+
+
+# --- Parsers ---
+
+def number(text):
+    """Parses a number as pages show it, e.g. '24,850.35'."""
+    return float(text.replace(",", "").strip())
+
+
+def first_number(lines):
+    """The first of the lines that is a plain number, or None."""
+    for line in lines:
+        if line.replace('.', '').replace(',', '').strip().isdigit():
+            return number(line)
+    return None
@@ -1,70 +1,229 @@
-import os
-import time
+import io
 import requests
-from bs4 import BeautifulSoup
+import html_parse
 import pandas as pd
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from PIL import Image
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import network_capture
+import page_state
+import run_manifest
+from run_context import default_context
 
-def generate_fii_dii_summary():
-    def arrow(val: float) -> str:
-        return f"{val:,.2f} {'🟢↑' if val >= 0 else '🔴↓'}"
+FII_DII_URL = "https://groww.in/fii-dii-data"
+
+# Only the flows table of each page is parsed
+TABLE_TARGET = html_parse.Target("table")
+
+# The keys of a daily record in the page's embedded state: its date and the
+# FII and DII net flows (specific names only: 'net' alone appears in both)
+DATE_KEYS = ("date", "tradeDate", "tradingDate")
+FII_NET_KEYS = ("fiiNet", "fiiNetValue", "fiiNetBuySell", "fiiNetPurchaseSales")
+DII_NET_KEYS = ("diiNet", "diiNetValue", "diiNetBuySell", "diiNetPurchaseSales")
+DATE_FORMATS = ("%d %b %Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y")
+
+# A first guess at the trading days one table page lists, used to size the
+# first batch of page requests; the pages that arrive replace it
+DAYS_PER_PAGE = 10
 
-    def fetch_all_pages(min_unique_days=15, max_pages=4):
-        all_data = []
-        page = 1
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Connection": "keep-alive",
-        }
-        print("\nFetching FII/DII data...")
-
-        while page <= max_pages:
-            url = "https://groww.in/fii-dii-data" if page == 1 else f"https://groww.in/fii-dii-data?page={page}"
-            print(f"Fetching page {page}...")
-            try:
-                resp = requests.get(url, headers=headers, timeout=10)
-                resp.raise_for_status()
-            except requests.RequestException as e:
-                print(f"Error fetching page {page}: {str(e)}")
+def _parse_page(resp):
+    """The (date, FII net, DII net) rows of one table page, or None when it has no table."""
+    soup = html_parse.parse(resp.content, TABLE_TARGET, label="fii/dii page")
+    table = soup.find("table")
+    if not table:
+        return None
+    parsed = []
+    rows = table.select("tbody tr")
+    for row in rows:
+        cols = [td.get_text(strip=True).replace(",", "") for td in row.find_all("td")]
+        if len(cols) >= 7:
+            date_str = cols[0]
+            fii_net = float(cols[3].replace("+", "").replace("−", "-").replace("–", "-"))
+            dii_net = float(cols[6].replace("+", "").replace("−", "-").replace("–", "-"))
+            parsed_date = datetime.strptime(date_str, "%d %b %Y")
+            parsed.append((parsed_date, fii_net, dii_net))
+    return parsed
+
+def _parse_date(value):
+    """A record's date: epoch milliseconds or one of DATE_FORMATS (ISO timestamps included)."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000).replace(hour=0, minute=0, second=0, microsecond=0)
+    text = str(value).strip().split("T")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+def _days_frame(rows):
+    """The (date, FII net, DII net) rows as a DataFrame of unique days, newest first."""
+    df = pd.DataFrame(rows, columns=["Date", "FII_Net", "DII_Net"])
+    df = df.drop_duplicates(subset=['Date'], keep='first')
+    return df.sort_values("Date", ascending=False).reset_index(drop=True)
+
+def fii_dii_from_page_state(ctx):
+    """
+    Reads the daily FII/DII net flows from the state embedded in the Groww
+    FII/DII page, fetched over plain HTTP (see page_state).
+
+    Returns:
+        A DataFrame of unique days, newest first, or None when the page
+        state could not be fetched or holds no complete daily records.
+    """
+    state = page_state.fetch_page_state(ctx, FII_DII_URL)
+    if state is None:
+        return None
+    rows = []
+    for record in network_capture.find_records(state, DATE_KEYS, FII_NET_KEYS, DII_NET_KEYS):
+        date = _parse_date(network_capture.field_value(record, *DATE_KEYS))
+        fii_net = network_capture.field_number(record, *FII_NET_KEYS)
+        dii_net = network_capture.field_number(record, *DII_NET_KEYS)
+        if None not in (date, fii_net, dii_net):
+            rows.append((date, fii_net, dii_net))
+    if not rows:
+        print("Warning: no FII/DII records in the Groww page state")
+        return None
+    return _days_frame(rows)
+
+def _fetch_page(ctx, page, stats, stop):
+    """
+    Fetches and parses one table page on a helper thread; None when it
+    failed or has no table. Once `stop` is set (the lookback was covered
+    without this page) a response still arriving is dropped unparsed.
+    """
+    run_manifest.adopt(stats)
+    try:
+        url = FII_DII_URL if page == 1 else f"{FII_DII_URL}?page={page}"
+        print(f"Fetching page {page}...")
+        try:
+            resp = ctx.http.get(url)
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching page {page}: {str(e)}")
+            return None
+        if stop.is_set():
+            return None
+        # An unchanged page (e.g. served from the HTTP cache) is not parsed again
+        rows = ctx.http.parsed(resp, f"fii_dii_page{page}", _parse_page)
+        if rows is None:
+            print(f"No table found on page {page}")
+        else:
+            print(f"Processed data from page {page}")
+        return rows
+    finally:
+        # The pool thread may next run for another section
+        run_manifest.adopt(None)
+
+def _leading_rows(pages):
+    """The rows of pages 1, 2, ... up to the first page that has not arrived or failed."""
+    rows = []
+    page = 1
+    while pages.get(page) is not None:
+        rows.extend(pages[page])
+        page += 1
+    return rows
+
+def _pages_needed(pages, min_unique_days):
+    """
+    How many table pages, from page 1 on, the lookback is expected to take:
+    estimated from the days per page of the leading pages read so far, or
+    from DAYS_PER_PAGE before any has arrived.
+    """
+    leading = 0
+    while pages.get(leading + 1) is not None:
+        leading += 1
+    days = len({date for date, _, _ in _leading_rows(pages)})
+    per_page = days / leading if leading and days else DAYS_PER_PAGE
+    return max(leading + 1, math.ceil(min_unique_days / per_page))
+
+def fetch_all_pages(ctx, min_unique_days=15, max_pages=4):
+    """
+    Reads the FII/DII table pages into a DataFrame of unique days, newest
+    first.
+
+    The pages the lookback is expected to take are requested at once and
+    each is parsed as it arrives; more are requested only when the pages
+    read so far show they are needed (see _pages_needed). As soon as the
+    lookback is covered the result is returned: pages not started yet are
+    cancelled, and requests still in flight are abandoned (their responses
+    are dropped unparsed), so no slow page holds up the section.
+    """
+    print("\nFetching FII/DII data...")
+    pages = {}  # page -> its rows, or None when it failed
+    stats = run_manifest.current_stats()
+    stop = threading.Event()
+    futures = {}  # future -> page
+    executor = ThreadPoolExecutor(max_workers=max_pages, thread_name_prefix="fii-dii")
+    try:
+        while True:
+            wanted = min(max_pages, _pages_needed(pages, min_unique_days))
+            for page in range(len(futures) + 1, wanted + 1):
+                futures[executor.submit(_fetch_page, ctx, page, stats, stop)] = page
+            in_flight = [future for future, page in futures.items() if page not in pages]
+            if not in_flight:
                 break
-            soup = BeautifulSoup(resp.text, "html.parser")
-            table = soup.find("table")
-            if not table:
-                print(f"No table found on page {page}")
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                pages[futures[future]] = future.result()
+            days = {date for date, _, _ in _leading_rows(pages)}
+            failed = any(rows is None for rows in pages.values())
+            if len(days) >= min_unique_days or failed:
+                outstanding = [page for page in futures.values() if page not in pages]
+                if outstanding:
+                    print(f"Collected {len(days)} days - abandoning pages {outstanding}")
                 break
-            
-            print(f"Processing data from page {page}...")
-            rows = table.select("tbody tr")
-            for row in rows:
-                cols = [td.get_text(strip=True).replace(",", "") for td in row.find_all("td")]
-                if len(cols) >= 7:
-                    date_str = cols[0]
-                    fii_net = float(cols[3].replace("+", "").replace("−", "-").replace("–", "-"))
-                    dii_net = float(cols[6].replace("+", "").replace("−", "-").replace("–", "-"))
-                    parsed_date = datetime.strptime(date_str, "%d %b %Y")
-                    all_data.append((parsed_date, fii_net, dii_net))
-            page += 1
-
-        df = pd.DataFrame(all_data, columns=["Date", "FII_Net", "DII_Net"])
-        df = df.drop_duplicates(subset=['Date'], keep='first')
-        df = df.sort_values("Date", ascending=False).reset_index(drop=True)
-        
-        if len(df) < min_unique_days:
-            print(f"\nWarning: Could only fetch {len(df)} days of data, needed {min_unique_days}")
-        print(f"\nTotal trading days collected: {len(df)}")
-        print("\nAll dates in data:")
-        for date in df['Date']:
-            print(date.strftime("%d-%m-%Y"))
-        return df
-
-    df = fetch_all_pages(min_unique_days=10)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    df = _days_frame(_leading_rows(pages))
+    
+    if len(df) < min_unique_days:
+        print(f"\nWarning: Could only fetch {len(df)} days of data, needed {min_unique_days}")
+    print(f"\nTotal trading days collected: {len(df)}")
+    print("\nAll dates in data:")
+    for date in df['Date']:
+        print(date.strftime("%d-%m-%Y"))
+    return df
+
+def fii_dii_days(ctx):
+    """
+    The daily FII/DII net flows, fetched once per run context: from the
+    page's embedded state when it covers the lookback (and config
+    'http_first' is on), otherwise from the table pages. How far back to
+    look is set by the 'fii_dii_lookback_days' and 'fii_dii_max_pages'
+    config keys.
+    """
+    lookback = max(10, ctx.config['fii_dii_lookback_days'])  # The summary sums 10 days
+
+    def fetch():
+        if page_state.enabled(ctx):
+            df = fii_dii_from_page_state(ctx)
+            if df is not None and len(df) >= lookback:
+                return df
+        return fetch_all_pages(ctx, min_unique_days=lookback, max_pages=ctx.config['fii_dii_max_pages'])
+
+    return ctx.memo("fii_dii_days", fetch)
+
+def generate_fii_dii_summary(ctx=None):
+    """
+    Builds the FII/DII activity summary: the last 3 days plus 7- and 10-day
+    cumulative net flows.
+
+    Args:
+        ctx (RunContext): Shared run context; the pages are fetched once per
+            context. Defaults to the process-wide context.
+
+    Returns:
+        A list of dictionaries with 'Date', 'FII' and 'DII'.
+    """
+    ctx = ctx or default_context()
+
+    def arrow(val: float) -> str:
+        return f"{val:,.2f} {'🟢↑' if val >= 0 else '🔴↓'}"
+
+    df = fii_dii_days(ctx)
     results = []
 
     # Last 3 individual days
@@ -97,58 +256,110 @@ def generate_fii_dii_summary():
 
     return results
 
-def get_fii_dii_chart(output_filename="fii_dii_chart.png"):
+def render_fii_dii_chart(df, days=10):
+    """
+    Draws the FII and DII net flows of the latest days as grouped bars, like
+    the chart on the Groww page.
+
+    Returns:
+        bytes: The PNG of the chart, or None when there are too few days.
+    """
+    try:
+        from matplotlib.figure import Figure
+    except ImportError:
+        print("Warning: matplotlib is not installed - cannot draw the FII/DII chart")
+        return None
+
+    recent = df.head(days).iloc[::-1]  # Oldest first, left to right
+    if len(recent) < 3:
+        return None
+    positions = range(len(recent))
+    # Figure rather than pyplot: no global state, safe on worker threads
+    fig = Figure(figsize=(10, 5), dpi=100)
+    ax = fig.subplots()
+    ax.bar([x - 0.2 for x in positions], recent['FII_Net'], width=0.4, label="FII", color="#5367ff")
+    ax.bar([x + 0.2 for x in positions], recent['DII_Net'], width=0.4, label="DII", color="#00b386")
+    ax.axhline(0, color="grey", linewidth=0.8)
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels([date.strftime("%d %b") for date in recent['Date']], rotation=45)
+    ax.set_ylabel("Net buy/sell (₹ Cr)")
+    ax.set_title("FII / DII net activity")
+    ax.legend()
+    ax.grid(True, axis="y", alpha=0.3)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+def get_fii_dii_chart(output_filename="fii_dii_chart.png", ctx=None):
     """
-    Launches a stealth browser, navigates to the Groww FII/DII data page,
-    and takes a screenshot of the main activity chart.
+    Saves the FII/DII activity chart. When the Groww FII/DII page's
+    embedded state holds its daily figures (fetched over HTTP, see
+    fii_dii_from_page_state), the chart is drawn locally from them.
+    Otherwise a stealth browser opens the page and screenshots the page's
+    own chart; only when that fails too is the chart drawn from the table
+    pages' figures.
     """
+    ctx = ctx or default_context()
+    if page_state.enabled(ctx):
+        df = fii_dii_from_page_state(ctx)
+        png = render_fii_dii_chart(df) if df is not None else None
+        page_state.record(png is not None)
+        if png is not None:
+            _save_chart(png, output_filename)
+            return True
+        print("FII/DII page state unavailable - falling back to the browser")
+    if _capture_fii_dii_chart(output_filename, ctx):
+        return True
+
+    print("Drawing the FII/DII chart from the table pages instead")
+    try:
+        png = render_fii_dii_chart(fii_dii_days(ctx))
+    except Exception as e:
+        print(f"Warning: could not draw the FII/DII chart: {e}")
+        return False
+    if png is None:
+        return False
+    _save_chart(png, output_filename)
+    return True
+
+def _save_chart(png, output_filename):
+    with open(output_filename, 'wb') as f:
+        f.write(png)
+    print(f"Successfully saved chart to {output_filename}")
+
+def _capture_fii_dii_chart(output_filename, ctx):
+    """Screenshots the chart of the Groww FII/DII data page in a stealth browser."""
     print("Initializing stealth browser to capture FII/DII chart...")
     
-    driver = None
+    page = None
     try:
+        # Browser libraries are only needed for the fallback, not for the summary
+        import undetected_chromedriver as uc
+
         options = uc.ChromeOptions()
         options.add_argument("--headless")
         options.add_argument("--window-size=1920,1200")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
 
-        driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-        url = 'https://groww.in/fii-dii-data'
-        
-        print(f"Navigating to {url}...")
-        driver.get(url)
+        page = ctx.new_page(options, stealth=True, blocking="chart", profile="groww")
+        print(f"Navigating to {FII_DII_URL}...")
+        page.navigate(FII_DII_URL)
         
         print("Waiting for the chart element to load...")
-        wait = WebDriverWait(driver, 30)
         chart_element_selector = "svg.recharts-surface"
+        if not page.wait_for(chart_element_selector, timeout=30, label="fii/dii chart element"):
+            raise Exception("FII/DII chart did not load")
         
-        chart_element = wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, chart_element_selector))
-        )
-        
-        time.sleep(3)
-        print("Chart element found. Taking screenshot...")
-        
-        print("Changing page zoom level to 80%...")
-        driver.execute_script("document.body.style.zoom='80%'")
-        time.sleep(2)
-
-        temp_screenshot = "temp_full_page.png"
-        driver.save_screenshot(temp_screenshot)
-        
-        img = Image.open(temp_screenshot)
-        width, height = img.size
-        
-        left = width * 0.25
-        right = width * 0.75
-        top = height * 0.35
-        bottom = height * 0.75
-        
-        chart_area = img.crop((left, top, right, bottom))
-        chart_area.save(output_filename)
+        page.wait_for_stable_svg(chart_element_selector, timeout=ctx.config['readiness_timeout'],
+                                 label="fii/dii chart")
+        print("Chart element found. Capturing it...")
         
-        os.remove(temp_screenshot)
-        print(f"Successfully saved chart to {output_filename}")
+        # The chart is captured by its own rectangle, so the page no longer
+        # needs zooming out to fit a fixed crop
+        png = page.screenshot_element(chart_element_selector, padding=16, fallback=(0.25, 0.35, 0.75, 0.75))
+        _save_chart(png, output_filename)
         return True
 
     except Exception as e:
@@ -156,9 +367,9 @@ def get_fii_dii_chart(output_filename="fii_dii_chart.png"):
         return False
         
     finally:
-        if driver:
+        if page:
             print("Closing browser.")
-            driver.quit()
+            page.close()
 
 def main():
     try:
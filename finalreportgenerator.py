@@ -4,6 +4,7 @@ from fpdf import FPDF
 from temp_bulletin import create_filtered_market_bulletin_livemint
 from gold import get_chennai_gold_rates
 from silver import get_chennai_silver_rates
+from run_context import default_context
 import re
 import os
 
@@ -84,12 +85,21 @@ class PDF(FPDF):
                 clean_line = sanitize_text(line)
                 self.multi_cell(0, 8, f"- {clean_line}")
 
-def main():
+def published_or_fetch(ctx, section, fetch):
+    """Uses the result a report run already published for `section`, else fetches."""
+    result = ctx.bus.get(section)
+    if result:
+        return result.data
+    return fetch(ctx)
+
+def main(ctx=None):
+    # Pass the context of a stock_market_report run to reuse the rates it already fetched
+    ctx = ctx or default_context()
     pdf = PDF()
     pdf.set_auto_page_break(auto=True, margin=15)
 
     # 1. Gold
-    gold_data = get_chennai_gold_rates()
+    gold_data = published_or_fetch(ctx, "gold", get_chennai_gold_rates)
     gold_df = pd.DataFrame(gold_data["last_10_days"])
     gold_df.rename(columns={
         "date": "Date",
@@ -105,7 +115,7 @@ def main():
     pdf.add_image("gold_chart.png", "Gold Rate Chart")
 
     # 2. Silver
-    silver_data = get_chennai_silver_rates()
+    silver_data = published_or_fetch(ctx, "silver", get_chennai_silver_rates)
     silver_df = pd.DataFrame(silver_data["last_10_days"])
     silver_df.rename(columns={
         "date": "Date",
@@ -1,15 +1,24 @@
 import yfinance as yf
 import pandas as pd
+from run_context import default_context
 
-def get_nifty50_movers():
+def get_nifty50_movers(ctx=None):
     """
     Fetches the top 5 gainers and top 5 losers from the NIFTY 50 index
     for the last trading session.
 
+    Args:
+        ctx (RunContext): Shared run context; prices are downloaded once
+            per context. Defaults to the process-wide context.
+
     Returns:
         A dictionary containing two lists: 'gainers' and 'losers'.
         Returns None if data fetching fails.
     """
+    ctx = ctx or default_context()
+    return ctx.memo("nifty50_movers", _fetch_nifty50_movers)
+
+def _fetch_nifty50_movers():
     print("Fetching Nifty 50 constituents' data...")
     
     # A reasonably recent list of Nifty 50 tickers. 
@@ -91,6 +100,8 @@ def get_nifty50_movers():
         for loser in results['losers']:
             print(f"{loser['stock']:<15}{loser['price']:<12.2f}{loser['change']:.2f}%")
 
+        return results
+
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
@@ -1,46 +1,85 @@
 import os
-import time
-from PIL import Image
 import pandas as pd
 from nsepython import nse_optionchain_scrapper
 from datetime import datetime
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from run_context import default_context
 
 HISTORY_FILE = "pcr_history.csv"
 CHART_URL = "https://upstox.com/fno-discovery/open-interest-analysis/nifty-pcr/"
 SCREENSHOT_FILE = "nifty_pcr_chart.png"
 CROPPED_SCREENSHOT = "nifty_pcr_chart_cropped.png"
+OPTION_CHAIN_URL = "https://www.nseindia.com/api/option-chain-indices?symbol=NIFTY"
+OPTION_CHAIN_HEADERS = {"Accept": "application/json", "Referer": "https://www.nseindia.com/option-chain"}
 
-def get_nifty_pcr_and_history():
+def get_current_pcr(ctx=None):
     """
-    Fetches the latest NIFTY PCR value, displays the last two sessions from history,
-    and takes a screenshot of the PCR chart from a website.
+    Fetches the NIFTY option chain and computes the current put-call ratio.
+
+    Args:
+        ctx (RunContext): Shared run context; the option chain is fetched
+            once per context. Defaults to the process-wide context.
+
+    Returns:
+        A dictionary with 'pcr', 'total_pe_oi' and 'total_ce_oi', or None on failure.
     """
-    # --- Fetch and display current PCR ---
+    ctx = ctx or default_context()
+    return ctx.memo("nifty_pcr", lambda: _fetch_current_pcr(ctx))
+
+def _option_chain(ctx):
+    """
+    Fetches the NIFTY option chain over the shared NSE session (see
+    SharedResources.nse_session), which stays warm between daemon runs.
+    Falls back to nsepython's scraper, which opens a session of its own.
+    """
+    for refresh in (False, True):
+        try:
+            response = ctx.resources.nse_session(refresh).get(OPTION_CHAIN_URL, headers=OPTION_CHAIN_HEADERS,
+                                                                timeout=ctx.http_timeout)
+            if response.status_code in (401, 403):
+                continue  # Cookies expired: get fresh ones once
+            response.raise_for_status()
+            chain = response.json()
+            if chain.get('records', {}).get('data'):
+                return chain
+        except Exception as e:
+            print(f"Warning: NSE session could not fetch the option chain: {e}")
+        break
+    return nse_optionchain_scrapper('NIFTY')
+
+def _fetch_current_pcr(ctx):
     try:
         print("Fetching latest NIFTY option chain data...")
-        chain = nse_optionchain_scrapper('NIFTY')
+        chain = _option_chain(ctx)
         if not chain:
             print("Could not fetch NIFTY option chain data.")
-        else:
-            total_pe_oi = sum(float(strike.get('PE', {}).get('openInterest', 0))
-                             for strike in chain['records']['data'] if 'PE' in strike)
-            total_ce_oi = sum(float(strike.get('CE', {}).get('openInterest', 0))
-                             for strike in chain['records']['data'] if 'CE' in strike)
-
-            if total_ce_oi == 0:
-                print("Warning: Total Call OI is zero, cannot calculate PCR.")
-            else:
-                current_pcr = total_pe_oi / total_ce_oi
-                today_str = datetime.now().strftime('%d-%m-%Y')
-                print(f"\nNIFTY PCR for the latest trading session ({today_str}): {current_pcr:.2f}")
+            return None
+
+        total_pe_oi = sum(float(strike.get('PE', {}).get('openInterest', 0))
+                         for strike in chain['records']['data'] if 'PE' in strike)
+        total_ce_oi = sum(float(strike.get('CE', {}).get('openInterest', 0))
+                         for strike in chain['records']['data'] if 'CE' in strike)
+
+        if total_ce_oi == 0:
+            print("Warning: Total Call OI is zero, cannot calculate PCR.")
+            return None
+
+        return {"pcr": total_pe_oi / total_ce_oi, "total_pe_oi": total_pe_oi, "total_ce_oi": total_ce_oi}
 
     except Exception as e:
         print(f"An error occurred while fetching live NIFTY PCR: {e}")
+        return None
+
+def get_nifty_pcr_and_history(ctx=None):
+    """
+    Fetches the latest NIFTY PCR value, displays the last two sessions from history,
+    and takes a screenshot of the PCR chart from a website.
+    """
+    # --- Fetch and display current PCR ---
+    pcr_data = get_current_pcr(ctx)
+    if pcr_data:
+        today_str = datetime.now().strftime('%d-%m-%Y')
+        print(f"\nNIFTY PCR for the latest trading session ({today_str}): {pcr_data['pcr']:.2f}")
 
     # --- Read and display historical data ---
     if os.path.exists(HISTORY_FILE):
@@ -67,75 +106,75 @@ def get_nifty_pcr_and_history():
     else:
         print(f"\nHistory file '{HISTORY_FILE}' not found. Cannot display previous sessions.")
 
-def capture_pcr_chart():
+def capture_pcr_chart(output_filename=CROPPED_SCREENSHOT, ctx=None):
     """
     Captures a screenshot of the NIFTY PCR chart from the specified URL.
+
+    Args:
+        output_filename (str): Where to save the cropped chart.
+        ctx (RunContext): Shared run context that starts and tracks the
+            browser. Defaults to the process-wide context.
+    """
+    png = capture_pcr_chart_png(ctx)
+    if png is None:
+        return False
+    with open(output_filename, 'wb') as f:
+        f.write(png)
+    print(f"Chart screenshot saved to '{output_filename}'")
+    return True
+
+def chrome_options():
+    """Browser options of the PCR chart page (also used to prewarm its browser)."""
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    return options
+
+def capture_pcr_chart_png(ctx=None):
+    """
+    Captures the NIFTY PCR chart in memory.
+
+    Returns:
+        bytes: The cropped PNG image, or None on failure.
     """
     print(f"\nCapturing PCR chart from: {CHART_URL}")
-    driver = None
+    ctx = ctx or default_context()
+    page = None
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--no-sandbox")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.get(CHART_URL)
-        
-        # Wait for the chart container to be present
-        wait = WebDriverWait(driver, 20)
-        print("Waiting for chart to load...")
+        page = ctx.new_page(chrome_options(), blocking="chart", profile="upstox")
+        page.navigate(CHART_URL)
         
         # Wait for the main container and ensure chart is loaded
-        wait.until(
-            EC.presence_of_element_located((By.CLASS_NAME, "recharts-responsive-container"))
-        )
+        print("Waiting for chart to load...")
+        chart_selector = "div.recharts-responsive-container"
+        if not page.wait_for(chart_selector, timeout=20, label="pcr chart container"):
+            raise Exception("PCR chart did not load")
         
         # Set a larger window size for better chart visibility
-        driver.set_window_size(1920, 1080)
+        page.set_viewport(1920, 1080)
         
         # Hide any overlays and set theme
-        driver.execute_script("""
+        page.execute_script("""
             // Hide any overlays or popups
             document.querySelectorAll('.modal, .overlay').forEach(el => el.style.display = 'none');
             // Set theme
             document.documentElement.setAttribute('data-theme', 'light');
         """)
         
-        # Give chart time to stabilize
-        time.sleep(3)
-        
-        # Take full page screenshot
-        temp_screenshot = "temp_full_page.png"
-        driver.save_screenshot(temp_screenshot)
-        
-        # Open and crop the image
-        img = Image.open(temp_screenshot)
-        width, height = img.size
+        # Wait for the chart to finish drawing
+        page.wait_for_stable_svg(chart_selector, timeout=ctx.config['readiness_timeout'], label="pcr chart")
         
-        # Calculate crop dimensions for PCR chart
-        left = width * 0.15    # 20% from left
-        right = width * 0.67   # 80% from left
-        top = height * 0.30    # 15% from top
-        bottom = height * 0.81  # 55% from top
-        
-        # Crop and save
-        chart_area = img.crop((left, top, right, bottom))
-        chart_area.save(CROPPED_SCREENSHOT)
-        
-        # Clean up temporary file
-        os.remove(temp_screenshot)
-        
-        print(f"Chart screenshot saved to '{CROPPED_SCREENSHOT}'")
-        return True
+        # Capture just the chart (the fractions are its usual page region)
+        return page.screenshot_element(chart_selector, padding=16, fallback=(0.15, 0.30, 0.67, 0.81))
         
     except Exception as e:
         print(f"An error occurred while capturing the chart: {e}")
-        return False
+        return None
         
     finally:
-        if driver:
-            driver.quit()
+        if page:
+            page.close()
 
 if __name__ == "__main__":
     get_nifty_pcr_and_history()
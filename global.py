@@ -1,15 +1,24 @@
 import yfinance as yf
 import pandas as pd
+from run_context import default_context
 
-def get_global_indices_data():
+def get_global_indices_data(ctx=None):
     """
     Fetches the latest data for key global indices, now robustly handling
     potential missing data points from the source.
 
+    Args:
+        ctx (RunContext): Shared run context; indices are fetched once per
+            context. Defaults to the process-wide context.
+
     Returns:
         A list of dictionaries, where each dictionary represents an index
         with its name, LTP, change, and percentage change. Returns None on failure.
     """
+    ctx = ctx or default_context()
+    return ctx.memo("global_indices", _fetch_global_indices_data)
+
+def _fetch_global_indices_data():
     print("Fetching data for key global indices...")
 
     indices = {
@@ -1,275 +1,397 @@
+import json
 import time
+from urllib.parse import quote
 import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import traceback
+import page_readiness
+from run_context import default_context
 
-def get_tradingview_heatmap_price(output_filename="stock_heatmap_price.png"):
+HEATMAP_URL = "https://in.tradingview.com/heatmap/stock/"
+
+# View state the heatmap page reads from the JSON in its URL fragment. The
+# display value and colour depth are checked after loading (see
+# _VIEW_STATE_JS); whichever the page ignored is set through its control.
+HEATMAP_STATE = {
+    "dataSource": "NIFTY50",
+    "blockColor": "change",
+    "blockSize": "market_cap_basic",
+    "grouping": "no_group",
+    "displayValue": "price",
+    "colorMultiplier": 3,
+}
+
+# Fixed viewport of the headless capture, so every run renders the same layout
+HEADLESS_WINDOW = (1600, 1000)
+
+# Controls of the page's top and bottom bars
+SETTINGS_SELECTOR = "[data-qa-id='heatmap-top-bar_settings-button']"
+FULLSCREEN_SELECTOR = "[data-qa-id='heatmap-top-bar_fullscreen']"
+COLOR_DEPTH_SELECTOR = "[data-qa-id='heatmap-bottom-bar_button_multiplier']"
+DISPLAY_VALUE_XPATH = "//div[div[text()='Display value']]/following-sibling::div[1]"
+DIALOG_SELECTOR = "[data-dialog-name], .dialog-container, .tv-dialog"
+
+# The view the page shows, read without opening any dialog: the page keeps
+# its URL fragment in step with the view, and the colour depth button shows
+# the multiplier in use ("x3"), which wins over the fragment when readable.
+# Returns {displayValue, colorMultiplier}; a value it cannot read is null.
+_VIEW_STATE_JS = """
+let state = {};
+try { state = JSON.parse(decodeURIComponent(location.hash.slice(1))) || {}; } catch (e) {}
+const view = {displayValue: state.displayValue || null, colorMultiplier: state.colorMultiplier || null};
+const button = document.querySelector(arguments[0]);
+const depth = button && button.textContent.match(/(\\d+(?:\\.\\d+)?)/);
+if (depth) view.colorMultiplier = parseFloat(depth[1]);
+return view;
+"""
+
+# The treemap is the largest canvas or SVG the page draws; it is marked with
+# TREEMAP_SELECTOR so the capture can find it by selector
+TREEMAP_SELECTOR = "[data-heatmap-treemap]"
+_TREEMAP_JS = """
+let best = null, area = 0;
+document.querySelectorAll('canvas, svg').forEach(el => {
+    const r = el.getBoundingClientRect();
+    if (r.width * r.height > area) { best = el; area = r.width * r.height; }
+});
+if (area <= 10000) return false;
+best.setAttribute('data-heatmap-treemap', '');
+return true;
+"""
+
+
+def heatmap_url(state=HEATMAP_STATE):
+    """The heatmap URL with the view state encoded in its fragment."""
+    return HEATMAP_URL + "#" + quote(json.dumps(state, separators=(",", ":")))
+
+
+def chrome_options(headless=True):
     """
-    Launches a VISIBLE stealth browser and automates the clicks to change the
-    heatmap view to 'Price' with robust error handling and multiple fallback methods.
+    Browser options of the heatmap capture (also used to prewarm its browser).
+    Headless captures use a fixed viewport; the interactive mode opens a
+    visible, maximized window.
     """
-    print("Initializing VISIBLE stealth browser...")
-    
-    driver = None
-    try:
-        options = uc.ChromeOptions()
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={HEADLESS_WINDOW[0]},{HEADLESS_WINDOW[1]}")
+        options.add_argument("--force-device-scale-factor=1")
+        options.add_argument("--hide-scrollbars")
+    else:
         options.add_argument("--start-maximized")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-popup-blocking")
-        
-        # Ensure compatibility by using the correct ChromeDriver version
-        driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-        wait = WebDriverWait(driver, 30)
-        
-        # Load page
-        url = 'https://in.tradingview.com/heatmap/stock/#%7B%22dataSource%22%3A%22NIFTY50%22%2C%22blockColor%22%3A%22change%22%2C%22blockSize%22%3A%22market_cap_basic%22%2C%22grouping%22%3A%22no_group%22%7D'
-        print(f"Navigating to TradingView...")
-        driver.get(url)
-        time.sleep(5)
-        
-        # --- 1. Click Fullscreen Button ---
-        print("Waiting for the fullscreen button...")
-        fullscreen_button = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-top-bar_fullscreen']"))
-        )
-        fullscreen_button.click()
-        time.sleep(3)
-
-        # --- 2. Click Display Settings Button ---
-        print("Waiting for the display settings button...")
-        settings_button = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-top-bar_settings-button']"))
-        )
-        settings_button.click()
-        time.sleep(2)
-        
-        def verify_price_selected():
-            """Verify if Price is actually selected"""
-            try:
-                return driver.execute_script("""
-                    const spans = document.querySelectorAll('span[class*="nestedSlotItem"]');
-                    for (const span of spans) {
-                        if (span.textContent === 'Price') return true;
-                    }
-                    return false;
-                """)
-            except:
-                return False
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-popup-blocking")
+    return options
 
-        def select_dropdown():
-            """Try to find and click the Display Value dropdown"""
-            try:
-                # First try by XPath
-                dropdown = driver.find_element(By.XPATH, "//div[div[text()='Display value']]/following-sibling::div[1]")
-                dropdown.click()
-                return True
-            except:
-                try:
-                    # Try JavaScript fallback
-                    return driver.execute_script("""
-                        const el = Array.from(document.querySelectorAll('*')).find(el => 
-                            el.textContent === 'Display value' && 
-                            (el.closest('[role="button"]') || el.parentElement)
-                        );
-                        if (el) {
-                            el.click();
-                            return true;
-                        }
-                        return false;
-                    """)
-                except:
-                    return False
-
-        def select_price_option():
-            """Try to select the Price option using various methods"""
-            # Try JavaScript click
-            try:
-                success = driver.execute_script("""
-                    const options = document.querySelectorAll('[role="option"], [role="menuitem"]');
-                    const priceOption = Array.from(options).find(el => el.textContent === 'Price');
-                    if (priceOption) {
-                        priceOption.click();
-                        return true;
-                    }
-                    return false;
-                """)
-                if success:
-                    return True
-            except:
-                pass
 
-            # Try keyboard navigation
+# --- Settings dialog ---
+# Used by the interactive mode, and by the headless mode when the page did
+# not apply the view state from the URL.
+
+def _price_selected(page):
+    """Whether the open settings dialog shows 'Price' as the display value."""
+    try:
+        return page.execute_script("""
+            const spans = document.querySelectorAll('span[class*="nestedSlotItem"]');
+            for (const span of spans) {
+                if (span.textContent === 'Price') return true;
+            }
+            return false;
+        """)
+    except:
+        return False
+
+
+def _press_slowly(page, key, times):
+    """Presses a key a few times, giving the menu time to follow."""
+    for _ in range(times):
+        page.press(key)
+        time.sleep(0.5)
+
+
+def _open_dropdown(page):
+    """Try to find and click the Display Value dropdown"""
+    try:
+        # First try by XPath
+        if page.click(DISPLAY_VALUE_XPATH, xpath=True):
+            return True
+        # Try JavaScript fallback
+        return page.execute_script("""
+            const el = Array.from(document.querySelectorAll('*')).find(el =>
+                el.textContent === 'Display value' &&
+                (el.closest('[role="button"]') || el.parentElement)
+            );
+            if (el) {
+                el.click();
+                return true;
+            }
+            return false;
+        """)
+    except:
+        return False
+
+
+def _select_price_option(page, ready):
+    """Try to select the Price option using various methods"""
+    # Try JavaScript click
+    try:
+        success = page.execute_script("""
+            const options = document.querySelectorAll('[role="option"], [role="menuitem"]');
+            const priceOption = Array.from(options).find(el => el.textContent === 'Price');
+            if (priceOption) {
+                priceOption.click();
+                return true;
+            }
+            return false;
+        """)
+        if success:
+            return True
+    except:
+        pass
+
+    # Try keyboard navigation
+    try:
+        _press_slowly(page, "ArrowDown", 2)
+        page.press("Enter")
+        page.wait_for_dom_quiet(timeout=ready, label="heatmap price view")
+        if _price_selected(page):
+            return True
+    except:
+        pass
+
+    # Try force update
+    try:
+        success = page.execute_script("""
+            const spans = document.querySelectorAll('span[class*="nestedSlotItem"]');
+            for (const span of spans) {
+                if (span.textContent.includes('Change') || span.textContent.includes('Symbol')) {
+                    span.textContent = 'Price';
+                    span.dispatchEvent(new Event('change', { bubbles: true }));
+                    return true;
+                }
+            }
+            return false;
+        """)
+        if success:
+            return True
+    except:
+        pass
+
+    return False
+
+
+def _select_price(page, ready):
+    """Selects 'Price' in the open settings dialog, retrying up to three times."""
+    for attempt in range(3):
+        if attempt > 0:
+            print(f"\nRetrying Price selection (attempt {attempt + 1}/3)...")
             try:
-                actions = ActionChains(driver)
-                for _ in range(2):
-                    actions.send_keys(Keys.ARROW_DOWN).perform()
-                    time.sleep(0.5)
-                actions.send_keys(Keys.RETURN).perform()
-                time.sleep(1)
-                if verify_price_selected():
-                    return True
+                page.click(SETTINGS_SELECTOR)
+                page.wait_for_dom_quiet(timeout=ready, label="heatmap settings")
             except:
                 pass
 
-            # Try force update
+        print(f"Opening Display Value dropdown...")
+        if _open_dropdown(page):
+            page.wait_for_dom_quiet(timeout=ready, label="heatmap dropdown")
+            print("Selecting Price option...")
+            if _select_price_option(page, ready) and _price_selected(page):
+                print("Successfully selected Price!")
+                return True
+
+    print("Warning: Could not confirm Price selection")
+    return False
+
+
+def _dialog_closed(page):
+    try:
+        # Check if any dialog elements are visible
+        return not page.visible(DIALOG_SELECTOR)
+    except:
+        return False
+
+
+def _close_dialog(page, ready):
+    """Closes the settings dialog, trying several methods."""
+    methods = [
+        # Method 1: Click close button
+        lambda: page.click("[data-name='close']"),
+
+        # Method 2: Click settings button again
+        lambda: page.click(SETTINGS_SELECTOR),
+
+        # Method 3: Use ESC key
+        lambda: page.press("Escape"),
+
+        # Method 4: JavaScript close
+        lambda: page.execute_script("""
+            const dialogs = document.querySelectorAll('[data-dialog-name], .dialog-container');
+            dialogs.forEach(dialog => {
+                dialog.style.display = 'none';
+                dialog.remove();
+            });
+        """)
+    ]
+
+    print("Closing settings dialog...")
+    for attempt in range(3):
+        for method in methods:
             try:
-                success = driver.execute_script("""
-                    const spans = document.querySelectorAll('span[class*="nestedSlotItem"]');
-                    for (const span of spans) {
-                        if (span.textContent.includes('Change') || span.textContent.includes('Symbol')) {
-                            span.textContent = 'Price';
-                            span.dispatchEvent(new Event('change', { bubbles: true }));
-                            return true;
-                        }
-                    }
-                    return false;
-                """)
-                if success:
+                method()
+                page.wait_for_dom_quiet(timeout=ready, label="heatmap dialog closed")
+                if _dialog_closed(page):
+                    print("Successfully closed settings dialog")
                     return True
             except:
-                pass
+                continue
+        print(f"Dialog close attempt {attempt + 1} failed, retrying...")
 
-            return False
-
-        # --- 3. Try to select Price multiple times ---
-        success = False
-        for attempt in range(3):
-            if attempt > 0:
-                print(f"\nRetrying Price selection (attempt {attempt + 1}/3)...")
-                try:
-                    settings_button.click()
-                    time.sleep(1)
-                except:
-                    pass
-
-            print(f"Opening Display Value dropdown...")
-            if select_dropdown():
-                time.sleep(1)
-                print("Selecting Price option...")
-                if select_price_option():
-                    if verify_price_selected():
-                        success = True
-                        print("Successfully selected Price!")
-                        break
-            time.sleep(1)
-
-        if not success:
-            print("Warning: Could not confirm Price selection")
-
-        # Function to verify if dialog is closed
-        def is_dialog_closed():
-            try:
-                # Check if any dialog elements are visible
-                dialog_elements = driver.find_elements(By.CSS_SELECTOR, 
-                    "[data-dialog-name], .dialog-container, .tv-dialog")
-                for element in dialog_elements:
-                    if element.is_displayed():
-                        return False
-                return True
-            except:
-                return False
-
-        # Function to attempt dialog close
-        def try_close_dialog():
-            methods = [
-                # Method 1: Click close button
-                lambda: driver.find_element(By.CSS_SELECTOR, "[data-name='close']").click(),
-                
-                # Method 2: Click settings button again
-                lambda: settings_button.click(),
-                
-                # Method 3: Use ESC key
-                lambda: ActionChains(driver).send_keys(Keys.ESCAPE).perform(),
-                
-                # Method 4: JavaScript close
-                lambda: driver.execute_script("""
-                    const dialogs = document.querySelectorAll('[data-dialog-name], .dialog-container');
-                    dialogs.forEach(dialog => {
-                        dialog.style.display = 'none';
-                        dialog.remove();
-                    });
-                """)
-            ]
-            
-            for method in methods:
-                try:
-                    method()
-                    time.sleep(0.5)
-                    if is_dialog_closed():
-                        return True
-                except:
-                    continue
-            return False
-
-        print("Closing settings dialog...")
-        for attempt in range(3):
-            if try_close_dialog():
-                print("Successfully closed settings dialog")
-                break
-            else:
-                print(f"Dialog close attempt {attempt + 1} failed, retrying...")
-        
-        # Verify dialog is closed
-        if not is_dialog_closed():
-            print("Warning: Settings dialog might still be visible")
-            
-        # Additional wait for UI to settle
-        time.sleep(2)
-        
-        # Configure color depth
-        print("Setting color depth...")
-        try:
-            # Find and click color depth button
-            color_button = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-bottom-bar_button_multiplier']"))
-            )
-            color_button.click()
-            print("Clicked color depth button")
-            time.sleep(1)
-
-            # Navigate using keyboard
-            print("Navigating color depth options...")
-            actions = ActionChains(driver)
-            # Press down arrow three times
-            for _ in range(3):
-                actions.send_keys(Keys.ARROW_DOWN).perform()
-                time.sleep(0.5)
-            
-            # Press Enter to select
-            actions.send_keys(Keys.RETURN).perform()
-            print("Selected color depth option")
-            
-            # Move mouse away and click in blank area to remove highlight
-            print("Removing button highlight...")
-            actions.move_by_offset(200, 0).click().perform()
-        except Exception as e:
-            print(f"Warning: Color depth selection failed: {e}")
-        
-        time.sleep(1)  # Brief pause before screenshot
-        
-        # Take screenshot
+    print("Warning: Settings dialog might still be visible")
+    return False
+
+
+def _set_color_depth(page, ready):
+    """Picks the colour depth through the bottom bar menu."""
+    print("Setting color depth...")
+    try:
+        # Find and click color depth button
+        page.wait_for(COLOR_DEPTH_SELECTOR, visible=True, timeout=30, label="heatmap color depth button")
+        if not page.click(COLOR_DEPTH_SELECTOR):
+            raise Exception("color depth button not found")
+        print("Clicked color depth button")
+        page.wait_for_dom_quiet(timeout=ready, label="heatmap color menu")
+
+        # Navigate using keyboard: down arrow three times, then Enter to select
+        print("Navigating color depth options...")
+        _press_slowly(page, "ArrowDown", 3)
+        page.press("Enter")
+        print("Selected color depth option")
+
+        # Drop the focus so the button loses its highlight
+        print("Removing button highlight...")
+        page.execute_script("if (document.activeElement) document.activeElement.blur();")
+    except Exception as e:
+        print(f"Warning: Color depth selection failed: {e}")
+
+
+def _view_state(page):
+    """The display value and colour depth the page shows (see _VIEW_STATE_JS); None when unreadable."""
+    try:
+        return page.execute_script(_VIEW_STATE_JS, COLOR_DEPTH_SELECTOR)
+    except Exception as e:
+        print(f"Warning: could not read the heatmap view state: {e}")
+        return None
+
+
+def _apply_view(page, ready, check_only):
+    """
+    Makes sure the heatmap shows prices at the chosen colour depth.
+
+    With check_only, the view the page shows is read without opening any
+    dialog, and only what it did not take from the URL state is set: the
+    display value through the settings dialog, the colour depth through its
+    menu. Otherwise (interactive mode) every step is clicked through.
+    """
+    price_applied = depth_applied = False
+    if check_only:
+        view = _view_state(page) or {}
+        price_applied = view.get('displayValue') == HEATMAP_STATE['displayValue']
+        depth_applied = view.get('colorMultiplier') == HEATMAP_STATE['colorMultiplier']
+        if price_applied and depth_applied:
+            print("View state from the URL applied")
+            return
+        print(f"Warning: heatmap ignored part of the view state in its URL ({view}) - setting it by hand")
+
+    if not price_applied:
+        print("Waiting for the display settings button...")
+        if not page.wait_for(SETTINGS_SELECTOR, visible=True, timeout=30, label="heatmap settings button"):
+            raise Exception("heatmap settings button not found")
+        page.click(SETTINGS_SELECTOR)
+        page.wait_for_dom_quiet(timeout=ready, label="heatmap settings")
+        _select_price(page, ready)
+        _close_dialog(page, ready)
+    if not depth_applied:
+        _set_color_depth(page, ready)
+
+
+# --- Capture ---
+
+def capture_heatmap_png(ctx=None, headless=True):
+    """
+    Captures the NIFTY50 price heatmap in memory.
+
+    Args:
+        ctx (RunContext): Shared run context that starts and tracks the
+            browser. Defaults to the process-wide context.
+        headless (bool): Load the view from the URL state in a headless
+            browser with a fixed viewport. When False, a visible browser
+            is clicked through fullscreen and the settings dialogs.
+
+    Returns:
+        bytes: The PNG of the treemap, or None on failure.
+    """
+    print(f"Initializing {'headless' if headless else 'VISIBLE'} stealth browser...")
+
+    ctx = ctx or default_context()
+    page = None
+    try:
+        page = ctx.new_page(chrome_options(headless), stealth=True, blocking="screenshot", profile="tradingview")
+        ready = ctx.config['readiness_timeout']
+
+        # Load page
+        print(f"Navigating to TradingView...")
+        page.navigate(heatmap_url())
+        page_readiness.wait_for_network_idle(page, timeout=ready, label="heatmap page")
+
+        if not headless:
+            print("Waiting for the fullscreen button...")
+            page.wait_for(FULLSCREEN_SELECTOR, visible=True, timeout=30, label="heatmap fullscreen button")
+            page.click(FULLSCREEN_SELECTOR)
+            page.wait_for_dom_quiet(timeout=ready, label="heatmap fullscreen")
+
+        _apply_view(page, ready, check_only=headless)
+
+        # Let the new colours render before the screenshot
+        page.wait_for_dom_quiet(timeout=ready, label="heatmap colors")
+        page_readiness.wait_for_paint(page)
+
+        # Capture only the treemap
         print("Taking screenshot...")
-        driver.save_screenshot(output_filename)
-        print(f"Screenshot saved to {output_filename}")
-        return True
+        if not page.execute_script(_TREEMAP_JS):
+            print("Warning: heatmap treemap not found - capturing the whole viewport")
+            return page.get_screenshot_as_png()
+        return page.screenshot_element(TREEMAP_SELECTOR)
 
     except Exception as e:
         print(f"An error occurred: {e}")
         traceback.print_exc()
-        return False
-    
+        return None
+
     finally:
-        if driver:
-            try:
-                driver.quit()
-                print("Browser closed successfully")
-            except:
-                print("Warning: Could not close browser cleanly")
+        if page:
+            page.close()
+            print("Browser closed successfully")
+
+
+def get_tradingview_heatmap_price(output_filename="stock_heatmap_price.png", ctx=None, headless=True):
+    """
+    Captures the heatmap in its 'Price' view and saves it to a file.
+
+    Args:
+        output_filename (str): The path to save the image.
+        ctx (RunContext): Shared run context. Defaults to the process-wide context.
+        headless (bool): See capture_heatmap_png.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    png = capture_heatmap_png(ctx, headless)
+    if png is None:
+        return False
+    with open(output_filename, 'wb') as f:
+        f.write(png)
+    print(f"Screenshot saved to {output_filename}")
+    return True
 
 if __name__ == "__main__":
     success = get_tradingview_heatmap_price()
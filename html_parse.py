@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import run_manifest
+
+
+def _fastest_backend():
+    try:
+        import lxml  # noqa: F401 - only checking it is installed
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+# Tree builder used for every page: lxml (C) when installed, else Python's
+# html.parser. REPORT_HTML_PARSER overrides it, e.g. to compare the two.
+BACKEND = os.environ.get("REPORT_HTML_PARSER") or _fastest_backend()
+
+# With REPORT_PARSE_MEMORY set, the peak memory of each parse is measured too
+if os.environ.get("REPORT_PARSE_MEMORY") and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+# --- Targeted parsing ---
+# The scraped pages are large, but each scraper reads one or two containers
+# of them. A Target names those containers; parse() then builds only their
+# subtrees (a SoupStrainer), skipping the tree of everything else, which is
+# most of the time and nearly all of the memory a full parse costs. Targets
+# are module constants, compiled once, and the soup parse() returns is
+# searched exactly like a full one.
+
+_RULE_RE = re.compile(r"^(?P<name>[\w-]+)(?:\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[class\*=(?P<part>[\w-]+)\])?$")
+
+
+def _classes(attrs):
+    value = attrs.get('class') or ""
+    return value.split() if isinstance(value, str) else list(value)
+
+
+class Target:
+    """
+    The containers of a page a scraper reads.
+
+    Args:
+        *rules (str): One per container: a tag name, optionally with a
+            class ("div.gold-rate-container"), an id ("ul#cagetory") or a
+            class substring ("div[class*=ItemContainer]").
+    """
+
+    def __init__(self, *rules):
+        self.rules = []
+        for rule in rules:
+            match = _RULE_RE.match(rule)
+            if not match:
+                raise ValueError(f"Unsupported target rule: {rule!r}")
+            self.rules.append((match['name'], match['cls'], match['id'], match['part']))
+        self.strainer = _strainer(self.matches)
+
+    def matches(self, name, attrs):
+        """Whether a tag, given its name and attributes, starts one of the containers."""
+        for rule_name, cls, tag_id, part in self.rules:
+            if name != rule_name:
+                continue
+            if cls and cls not in _classes(attrs):
+                continue
+            if tag_id and attrs.get('id') != tag_id:
+                continue
+            if part and not any(part in c for c in _classes(attrs)):
+                continue
+            return True
+        return False
+
+
+def _strainer(matches):
+    """A SoupStrainer keeping the tags matches(name, attrs) accepts, with everything inside them."""
+    if hasattr(SoupStrainer, "allow_tag_creation"):
+        # Beautiful Soup 4.13+ asks the strainer about each top-level tag and string
+        class _TargetStrainer(SoupStrainer):
+            def allow_tag_creation(self, nsprefix, name, attrs):
+                return matches(name, attrs or {})
+
+            def allow_string_creation(self, string):
+                return False
+
+        return _TargetStrainer()
+    # Older versions call a function given as the name with (name, attrs)
+    return SoupStrainer(lambda name, attrs=None: isinstance(attrs, dict) and matches(name, attrs))
+
+
+def parse(markup, target=None, label="page"):
+    """
+    Parses HTML with the fastest available backend.
+
+    Args:
+        markup (str or bytes): The page.
+        target (Target): Build only these containers; None parses everything.
+        label (str): Name the parse is recorded under in the section's
+            statistics (time, bytes and, with REPORT_PARSE_MEMORY, peak memory).
+
+    Returns:
+        BeautifulSoup
+    """
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    soup = BeautifulSoup(markup, BACKEND, parse_only=target.strainer if target else None)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base if tracing else None
+    run_manifest.record_parse(label, seconds, len(markup), peak)
+    return soup
+
+
+# --- Main Execution Block ---
+# Compares a full and a targeted parse of a saved page:
+#   python html_parse.py page.html "div.gold-rate-container" table
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python html_parse.py PAGE.html RULE [RULE ...]")
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as f:
+        page = f.read()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    benchmark_target = Target(*sys.argv[2:])
+    print(f"{len(page) / 1024:.0f} KB page, {BACKEND} backend")
+    print(f"{'Parse':<10} | {'Time (ms)':>10} | {'Peak (KB)':>10} | {'Tags':>6}")
+    print("-" * 46)
+    for title, target in (("full", None), ("targeted", benchmark_target)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        soup = BeautifulSoup(page, BACKEND, parse_only=target.strainer if target else None)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base
+        print(f"{title:<10} | {elapsed * 1000:>10.1f} | {peak / 1024:>10.0f} | {len(soup.find_all(True)):>6}")
@@ -0,0 +1,198 @@
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+
+import run_manifest
+
+CACHE_DIR = os.environ.get("REPORT_HTTP_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "stock_market_report", "http"))
+
+# Seconds a response stays fresh, per source (the first matching URL pattern
+# wins). Responses of URLs matching none are never cached.
+TTLS = [
+    (r"goodreturns\.in/", 30 * 60),        # gold/silver rates: change once or twice a day
+    (r"groww\.in/fii-dii-data", 60 * 60),  # FII/DII flows: published once a day, after the close
+    (r"livemint\.com/", 10 * 60),          # news listings
+    (r"moneycontrol\.com/", 10 * 60),
+]
+
+# Request headers that change the response, and so are part of the cache key
+KEY_HEADERS = ("Accept", "Accept-Language")
+
+# Response headers kept with a cached body
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Date")
+
+
+# --- On-disk response cache ---
+# Sits under http_client.HttpClient: a GET of a cached source is answered
+# from disk while it is fresh (its TTL), and revalidated with
+# If-None-Match / If-Modified-Since once it is stale, so an unchanged page
+# costs a 304 instead of its full body. Entries are a JSON file with the
+# status, headers and validators, plus the body next to it.
+#
+# parsed() adds a second level: the result a section parsed out of a body is
+# kept under the hash of that body, so a page that did not change (served
+# from the cache, or refetched byte-identical) is not parsed again.
+
+class HttpCache:
+    """
+    A persistent cache of HTTP responses and of the results parsed from them.
+
+    Args:
+        directory (str): Where entries are stored.
+        ttls (list): (URL pattern, seconds) pairs; see TTLS.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttls=TTLS):
+        self.directory = directory
+        self.ttls = [(re.compile(pattern), seconds) for pattern, seconds in ttls]
+        self._lock = threading.Lock()
+        self._parsed = {}  # (name, body hash) -> parsed result
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "parse_hits": 0, "parses": 0}
+
+    def _count(self, key, section_key):
+        with self._lock:
+            self.stats[key] += 1
+        run_manifest.count(section_key)
+
+    def ttl(self, url):
+        """Seconds a response of the URL stays fresh, or None when it is not cached."""
+        for pattern, seconds in self.ttls:
+            if pattern.search(url):
+                return seconds
+        return None
+
+    def key(self, url, headers):
+        """The cache key of a GET: the URL plus the request headers in KEY_HEADERS."""
+        varying = [f"{name}:{headers.get(name, '')}" for name in KEY_HEADERS]
+        return hashlib.sha256("\n".join([url] + varying).encode("utf-8")).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def _write(self, path, data):
+        """Writes bytes through a temporary file, so readers never see half an entry."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    def load(self, key):
+        """The stored entry for a key, or None."""
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(self._path(key, ".body"), 'rb') as f:
+                entry['body'] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry, ttl):
+        return time.time() - entry['stored_at'] < ttl
+
+    def validators(self, entry):
+        """Conditional request headers revalidating an entry (empty when it has no validators)."""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def store(self, key, response):
+        """Saves a 200 response. Returns the entry."""
+        entry = {
+            "url": response.url,
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "stored_at": time.time(),
+        }
+        try:
+            self._write(self._path(key, ".body"), response.content)
+            self._write(self._path(key, ".json"), json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            print(f"Warning: could not cache {response.url}: {e}")
+        self._count("misses", "http_cache_misses")
+        return entry
+
+    def refresh(self, key, entry, response):
+        """Marks an entry fresh again after a 304, taking the new validators."""
+        for name in KEPT_HEADERS:
+            if name in response.headers:
+                entry['headers'][name] = response.headers[name]
+        entry['stored_at'] = time.time()
+        meta = {name: value for name, value in entry.items() if name != 'body'}
+        try:
+            self._write(self._path(key, ".json"), json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            print(f"Warning: could not update the cache entry of {entry['url']}: {e}")
+        self._count("revalidated", "http_revalidated")
+
+    def response(self, entry, hit=True):
+        """A requests.Response rebuilt from an entry; its from_cache attribute is True."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = "OK"
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry.get('encoding')
+        response._content = entry['body']
+        response.from_cache = True
+        if hit:
+            self._count("hits", "http_cache_hits")
+        return response
+
+    # --- Parsed results ---
+
+    def parsed(self, body, name, parse):
+        """
+        Returns parse() of a body, reusing the result parsed from an
+        identical body before, in this process or an earlier run.
+
+        Args:
+            body (bytes): The response body.
+            name (str): What is parsed, e.g. "gold_rates"; one result is kept
+                per name.
+            parse (callable): Produces the result. A None result (failure)
+                is returned but not kept.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            result = self._parsed.get((name, digest))
+        path = os.path.join(self.directory, "parsed", f"{name}.pickle")
+        if result is None:
+            try:
+                with open(path, 'rb') as f:
+                    saved_digest, saved = pickle.load(f)
+                if saved_digest == digest:
+                    result = saved
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+                result = None
+        if result is not None:
+            self._count("parse_hits", "parse_cache_hits")
+            return result
+
+        result = parse()
+        with self._lock:
+            self.stats['parses'] += 1
+        if result is not None:
+            with self._lock:
+                # Only the latest body of each name is worth keeping
+                self._parsed = {k: v for k, v in self._parsed.items() if k[0] != name}
+                self._parsed[(name, digest)] = result
+            try:
+                self._write(path, pickle.dumps((digest, result)))
+            except (OSError, pickle.PicklingError) as e:
+                print(f"Warning: could not save the parsed {name}: {e}")
+        return result
@@ -0,0 +1,217 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+# The one User-Agent every HTTP request of the report is sent with
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    # gzip and deflate, plus br (and zstd) when urllib3 can decode them
+    "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+    "Connection": "keep-alive",
+}
+
+DEFAULT_TIMEOUT = 10   # seconds per request, unless the caller passes one
+MAX_PER_HOST = 4       # requests in flight to one host at a time
+POOL_HOSTS = 20        # hosts whose connection pools are kept
+
+
+# --- Shared HTTP client ---
+# Every requests-based section fetches through one HttpClient (via
+# RunContext.http), so connections to a host are opened once and kept alive
+# across sections, all requests carry the same headers and timeout policy,
+# and no host sees more than MAX_PER_HOST concurrent requests from a run.
+# GETs of the sources listed in http_cache.TTLS go through its disk cache.
+
+class HttpClient:
+    """
+    A pooled, keep-alive HTTP client shared by the sections of a run.
+
+    Args:
+        timeout (float): Default timeout of a request, in seconds.
+        max_per_host (int): Concurrent requests allowed per host.
+        pool_hosts (int): Hosts whose connection pools are kept open.
+        cache (HttpCache): Response cache; None disables caching.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_per_host=MAX_PER_HOST, pool_hosts=POOL_HOSTS, cache=None):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.cache = cache
+        self.use_cache = cache is not None
+        self._lock = threading.Lock()
+        self._host_limits = {}
+        self._requests = {}  # host -> requests sent
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        # Each host keeps up to max_per_host idle connections for reuse
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=max_per_host)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def _limit(self, host):
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return limit
+
+    def request(self, method, url, headers=None, timeout=None, cache=True, **kwargs):
+        """
+        Sends a request through the shared pool. Headers given here are
+        added to (or override) DEFAULT_HEADERS; the timeout defaults to the
+        client's. Waits while the host already has max_per_host requests in
+        flight. A GET of a cached source may be answered from the cache
+        (see http_cache); pass cache=False for requests made for their side
+        effects, e.g. to pick up cookies.
+
+        Returns:
+            requests.Response
+        """
+        if (method == "GET" and cache and self.use_cache and self.cache is not None
+                and not kwargs.get('stream')):
+            ttl = self.cache.ttl(url)
+            if ttl is not None:
+                return self._cached_get(url, ttl, headers, timeout, **kwargs)
+        return self._send(method, url, headers, timeout, **kwargs)
+
+    def cached(self, url, headers=None):
+        """
+        The cached response of a GET while it is still fresh, without going
+        to the network; None when there is none (or caching is off).
+        """
+        if not (self.use_cache and self.cache is not None):
+            return None
+        ttl = self.cache.ttl(url)
+        if ttl is None:
+            return None
+        entry = self.cache.load(self.cache.key(url, dict(self.session.headers, **(headers or {}))))
+        if entry is None or not self.cache.is_fresh(entry, ttl):
+            return None
+        return self.cache.response(entry)
+
+    def _cached_get(self, url, ttl, headers, timeout, **kwargs):
+        key = self.cache.key(url, dict(self.session.headers, **(headers or {})))
+        entry = self.cache.load(key)
+        if entry is not None and self.cache.is_fresh(entry, ttl):
+            return self.cache.response(entry)
+        if entry is not None:
+            headers = dict(headers or {}, **self.cache.validators(entry))
+        response = self._send("GET", url, headers, timeout, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key, entry, response)
+            return self.cache.response(entry, hit=False)
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    def _send(self, method, url, headers, timeout, **kwargs):
+        host = urlsplit(url).netloc
+        with self._limit(host):
+            response = self.session.request(method, url, headers=headers,
+                                            timeout=timeout if timeout is not None else self.timeout,
+                                            **kwargs)
+        with self._lock:
+            self._requests[host] = self._requests.get(host, 0) + 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def parsed(self, response, name, parse):
+        """
+        Returns parse(response), reusing the result parsed from an identical
+        body before (see HttpCache.parsed) when caching is on.
+        """
+        if not (self.use_cache and self.cache is not None):
+            return parse(response)
+        return self.cache.parsed(response.content, name, lambda: parse(response))
+
+    def stats(self):
+        """
+        Connection reuse counters: requests sent, connections opened, and
+        the requests that were served over an already open connection; plus
+        the response cache's counters, when there is a cache.
+        """
+        opened = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            try:
+                opened += pools[key].num_connections
+            except KeyError:
+                continue  # Evicted meanwhile
+        with self._lock:
+            sent = sum(self._requests.values())
+            per_host = dict(self._requests)
+        stats = {
+            "requests": sent,
+            "connections_opened": opened,
+            "connections_reused": max(0, sent - opened),
+            "requests_per_host": per_host,
+        }
+        if self.cache is not None:
+            stats['cache'] = dict(self.cache.stats)
+        return stats
+
+    def view(self, timeout=None, use_cache=True):
+        """A ClientView of this client with its own request defaults."""
+        return ClientView(self, timeout if timeout is not None else self.timeout, use_cache)
+
+    def close(self):
+        self.session.close()
+
+
+class ClientView:
+    """
+    One run's view of a shared HttpClient. Requests go through the client's
+    connection pools and per-host limits, but with the run's own timeout and
+    cache setting, so runs sharing the client (a scheduled daemon run and an
+    on-demand one, say) never change each other's.
+
+    Args:
+        client (HttpClient): The shared client.
+        timeout (float): Default timeout of this view's requests, in seconds.
+        use_cache (bool): Whether this view's GETs may use the client's cache.
+    """
+
+    def __init__(self, client, timeout, use_cache):
+        self.client = client
+        self.timeout = timeout
+        self.use_cache = use_cache
+
+    @property
+    def session(self):
+        return self.client.session
+
+    def request(self, method, url, headers=None, timeout=None, cache=True, **kwargs):
+        """HttpClient.request() with this view's defaults."""
+        return self.client.request(method, url, headers=headers,
+                                   timeout=timeout if timeout is not None else self.timeout,
+                                   cache=cache and self.use_cache, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def cached(self, url, headers=None):
+        """HttpClient.cached(), always None when this view does not use the cache."""
+        return self.client.cached(url, headers) if self.use_cache else None
+
+    def parsed(self, response, name, parse):
+        """HttpClient.parsed(), parsing every time when this view does not use the cache."""
+        return self.client.parsed(response, name, parse) if self.use_cache else parse(response)
+
+    def stats(self):
+        return self.client.stats()
@@ -0,0 +1,232 @@
+import re
+import json
+import time
+import base64
+
+import run_manifest
+
+# Resource types worth reading the body of: the page's own API calls
+API_TYPES = ("XHR", "Fetch")
+
+
+# --- Recording API responses ---
+# With the performance log enabled on a driver (RunContext.new_driver(...,
+# network_log=True)), Chrome reports every network event of the page to
+# chromedriver. NetworkCapture reads those events, and for JSON responses of
+# matching URLs fetches the body over DevTools (Network.getResponseBody), so a
+# section can read the data the page renders from instead of scraping it back
+# out of the DOM.
+
+class NetworkCapture:
+    """
+    Records the JSON API responses a page fetches.
+
+    Args:
+        driver: A Chrome WebDriver started with the performance log enabled.
+        url_patterns (list): Regular expressions; only responses whose URL
+            matches one of them are recorded.
+    """
+
+    def __init__(self, driver, url_patterns):
+        self.driver = driver
+        self.patterns = [re.compile(pattern) for pattern in url_patterns]
+        self.responses = []  # (url, parsed JSON), in arrival order
+        self._pending = {}   # request id -> URL of a matching response still loading
+
+    def _matches(self, url):
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def poll(self):
+        """
+        Reads the network events logged since the last call.
+
+        Returns:
+            list: The (url, data) responses recorded by this call.
+        """
+        recorded = []
+        for method, params in self._events():
+            if method == "Network.responseReceived":
+                response = params.get('response', {})
+                if (params.get('type') in API_TYPES and "json" in response.get('mimeType', "")
+                        and self._matches(response.get('url', ""))):
+                    self._pending[params['requestId']] = response['url']
+            elif method == "Network.loadingFinished" and params.get('requestId') in self._pending:
+                url = self._pending.pop(params['requestId'])
+                data = self._body(params['requestId'])
+                if data is not None:
+                    recorded.append((url, data))
+        self.responses.extend(recorded)
+        return recorded
+
+    def _events(self):
+        """(method, params) of the network events logged since the last call."""
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            yield message.get('method'), message.get('params', {})
+
+    def _body(self, request_id):
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            text = body['body']
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode("utf-8")
+            return json.loads(text)
+        except Exception:
+            return None  # Evicted, not JSON after all, or the page navigated away
+
+    def wait_for(self, *keys, timeout=10, label="api response"):
+        """
+        Waits for a recorded response containing any of the given keys
+        (matched loosely, see find_key).
+
+        Returns:
+            The parsed JSON of the first such response, or None on timeout.
+        """
+        return self.wait_until(lambda data: data if find_key(data, *keys) is not None else None,
+                               timeout=timeout, label=label)
+
+    def wait_until(self, read, timeout=10, label="api response"):
+        """
+        Waits for a recorded response that read(data) gets a value out of
+        (anything but None), e.g. a complete quote record.
+
+        Returns:
+            That value, or None on timeout.
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        checked = 0
+        while True:
+            self.poll()
+            for _, data in self.responses[checked:]:
+                value = read(data)
+                if value is not None:
+                    run_manifest.record_wait(label, time.perf_counter() - start, True)
+                    return value
+            checked = len(self.responses)
+            if time.perf_counter() >= deadline:
+                run_manifest.record_wait(label, time.perf_counter() - start, False)
+                return None
+            time.sleep(0.1)
+
+
+# --- Reading values out of API JSON ---
+
+def _normalise(key):
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def find_key(data, *names):
+    """
+    Finds the first value stored under any of the given key names anywhere in
+    a JSON document, depth first. Names are compared ignoring case and
+    punctuation, so 'spotPrice', 'spot_price' and 'SPOT-PRICE' all match.
+    Earlier names take precedence over later ones.
+    """
+    wanted = [_normalise(name) for name in names]
+    for name in wanted:
+        found = _search(data, name)
+        if found is not None:
+            return found
+    return None
+
+
+def _search(data, name):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if _normalise(key) == name and value is not None:
+                return value
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        found = _search(child, name)
+        if found is not None:
+            return found
+    return None
+
+
+def find_number(data, *names):
+    """Like find_key, but converts the value to a float (None if it is not numeric)."""
+    value = find_key(data, *names)
+    if isinstance(value, str):
+        value = value.replace(",", "").strip()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def find_objects(data, *names):
+    """
+    Yields every object (dict) in a JSON document that has all of the given
+    keys, depth first, with keys compared as in find_key. Used to pick the
+    record holding a quote out of a large page state.
+    """
+    wanted = {_normalise(name) for name in names}
+    if isinstance(data, dict):
+        if wanted <= {_normalise(key) for key in data}:
+            yield data
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return
+    for child in children:
+        yield from find_objects(child, *names)
+
+
+def find_records(data, *groups):
+    """
+    Yields every object (dict) in a JSON document that itself holds a key
+    of each group, depth first. A group is a tuple of alternative key names
+    (compared as in find_key), e.g. ("ltp", "lastPrice"). Unlike find_key,
+    values of one record are never mixed with those of another.
+    """
+    wanted = [{_normalise(name) for name in group} for group in groups]
+    if isinstance(data, dict):
+        keys = {_normalise(key) for key in data}
+        if all(group & keys for group in wanted):
+            yield data
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return
+    for child in children:
+        yield from find_records(child, *groups)
+
+
+def field_value(record, *names):
+    """
+    The value stored under the first of the names among a record's own keys
+    (compared as in find_key; nested objects are not searched), or None.
+    """
+    fields = {_normalise(key): value for key, value in record.items()}
+    for name in names:
+        value = fields.get(_normalise(name))
+        if value is not None:
+            return value
+    return None
+
+
+def field_number(record, *names):
+    """
+    The number stored under the first of the names among a record's own
+    keys (nested objects are not searched), or None.
+    """
+    fields = {_normalise(key): value for key, value in record.items()}
+    for name in names:
+        value = fields.get(_normalise(name))
+        if isinstance(value, str):
+            value = value.replace(",", "").strip()
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
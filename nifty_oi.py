@@ -1,15 +1,29 @@
-import os
-import time
-from PIL import Image
 import re
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import dom_extract
+import network_capture
+import run_manifest
+from run_context import default_context
 
-def get_nifty_oi_data_and_chart(chart_filename="nifty_oi_chart.png"):
+# The API call of the OI page returning its summary, and the keys of the
+# summary record. Only total-OI keys: per-strike 'callOi'/'putOi' of the
+# option chain must never be reported as totals.
+OI_API_PATTERNS = [r"upstox\.com/.*open-interest[^?]*summary"]
+SPOT_KEYS = ("spotPrice", "underlyingSpotPrice")
+CALLS_OI_KEYS = ("totalCallOi", "totalCallsOi", "totalCeOi")
+PUTS_OI_KEYS = ("totalPutOi", "totalPutsOi", "totalPeOi")
+
+def _summary_pairs(sections):
+    """Maps label to value for the summary boxes holding exactly a label and a value."""
+    return {p_tags[0]: p_tags[1] for p_tags in sections if len(p_tags) == 2}
+
+# The summary boxes (Spot, Total Calls, Total Puts), each a label <p> and a value <p>
+OI_FIELDS = {
+    "summary": dom_extract.Field("div.gap-8.py-4 div.flex-col", many=True, children="p",
+                                 parse=_summary_pairs),
+}
+
+def get_nifty_oi_data_and_chart(chart_filename="nifty_oi_chart.png", ctx=None):
     """
     Scrapes the Upstox Nifty OI page, intelligently waiting for the data
     to populate before extracting it.
@@ -19,98 +33,145 @@ def get_nifty_oi_data_and_chart(chart_filename="nifty_oi_chart.png"):
     - Total Calls and Puts OI
     - Screenshots the OI chart and saves it as a PNG.
 
+    Args:
+        chart_filename (str): Where to save the OI chart.
+        ctx (RunContext): Shared run context; the page is scraped once per
+            context. Defaults to the process-wide context.
+
     Returns:
         A dictionary with the scraped data and chart filename, or None on failure.
     """
+    oi_data = get_nifty_oi_data(ctx)
+    if oi_data is None:
+        return None
+    with open(chart_filename, 'wb') as f:
+        f.write(oi_data['chart_png'])
+    print(f"Chart saved to '{chart_filename}'")
+    return {
+        "spot_price": oi_data['spot_price'],
+        "total_calls_oi": oi_data['total_calls_oi'],
+        "total_puts_oi": oi_data['total_puts_oi'],
+        "chart_filepath": chart_filename
+    }
+
+def get_nifty_oi_data(ctx=None):
+    """
+    Same scrape as get_nifty_oi_data_and_chart, but keeps the chart in memory.
+
+    Returns:
+        A dictionary with 'spot_price', 'total_calls_oi', 'total_puts_oi' and
+        'chart_png' (PNG bytes), or None on failure.
+    """
+    ctx = ctx or default_context()
+    return ctx.memo("nifty_oi", lambda: _scrape_nifty_oi(ctx))
+
+def chrome_options():
+    """Browser options of the Upstox OI page (also used to prewarm its browser)."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1200")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    return options
+
+def _lakhs(value):
+    """Formats an open interest count the way the Upstox page shows it."""
+    return f"{value / 100000:,.2f} L"
+
+def _summary_from(data):
+    """
+    Spot price and total call/put OI from one summary record holding both
+    totals; the spot price may sit next to them or elsewhere in the response.
+    None when the response has no such record.
+    """
+    for record in network_capture.find_records(data, CALLS_OI_KEYS, PUTS_OI_KEYS):
+        calls = network_capture.field_number(record, *CALLS_OI_KEYS)
+        puts = network_capture.field_number(record, *PUTS_OI_KEYS)
+        spot_price = network_capture.field_number(record, *SPOT_KEYS)
+        if spot_price is None:
+            spot_price = network_capture.find_number(data, *SPOT_KEYS)
+        if None not in (spot_price, calls, puts):
+            return spot_price, _lakhs(calls), _lakhs(puts)
+    return None
+
+def _oi_from_api(capture, ctx):
+    """
+    Reads spot price and total call/put OI from the summary the page fetches.
+
+    Returns:
+        A tuple (spot_price, total_calls_oi, total_puts_oi), or None when no
+        complete summary arrived in time.
+    """
+    return capture.wait_until(_summary_from, timeout=ctx.config['readiness_timeout'], label="oi api")
+
+def _oi_from_dom(page, ctx):
+    """Scrapes spot price and total call/put OI from the rendered page."""
+    # This XPath finds the <p> tag for the Spot price value.
+    spot_price_xpath = "//div[p[text()='Spot']]/p[2]"
+    
+    # We will wait until the text in this element is NOT '--/--'.
+    # This is an explicit wait for the JavaScript data to load.
+    print("Waiting for live Spot Price data to populate...")
+    if not page.wait_for(spot_price_xpath, xpath=True, placeholder="--/--",
+                         timeout=ctx.config['readiness_timeout'], label="oi live data"):
+        raise Exception("Live Spot Price data did not load")
+    print("Live data detected.")
+
+    # Now that we know the data is real, read all summary boxes in one go
+    extracted_data = page.extract(OI_FIELDS)['summary'] or {}
+
+    spot_price_str = extracted_data.get('Spot', '0')
+    total_calls_oi = extracted_data.get('Total Calls', '0 L')
+    total_puts_oi = extracted_data.get('Total Puts', '0 L')
+    
+    return float(spot_price_str.replace(',', '')), total_calls_oi, total_puts_oi
+
+def _scrape_nifty_oi(ctx):
     print("Initializing browser to fetch Nifty OI data from Upstox...")
-    driver = None
+    page = None
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1200")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        page = ctx.new_page(chrome_options(), network_log=True, blocking="chart", profile="upstox")
+        capture = page.intercept(OI_API_PATTERNS)
         
         url = 'https://upstox.com/fno-discovery/open-interest-analysis/nifty-oi/'
         print(f"Navigating to {url}...")
-        driver.get(url)
+        page.navigate(url)
 
         print("Waiting for page content to load...")
-        wait = WebDriverWait(driver, 30)
-        
-        # --- THE GUARANTEED FIX: Wait for REAL data to appear ---
-        # This XPath finds the <p> tag for the Spot price value.
-        spot_price_xpath = "//div[p[text()='Spot']]/p[2]"
-        
-        # We will wait until the text in this element is NOT '--/--'.
-        # This is an explicit wait for the JavaScript data to load.
-        print("Waiting for live Spot Price data to populate...")
-        wait.until(
-            lambda driver: driver.find_element(By.XPATH, spot_price_xpath).text != '--/--'
-        )
-        print("Live data detected.")
-        # --------------------------------------------------------
-
-        # Now that we know the data is real, we can extract it.
-        summary_container = driver.find_element(By.CSS_SELECTOR, "div.gap-8.py-4")
-        data_sections = summary_container.find_elements(By.CSS_SELECTOR, "div.flex-col")
-        
-        extracted_data = {}
-        for section in data_sections:
-            p_tags = section.find_elements(By.TAG_NAME, 'p')
-            if len(p_tags) == 2:
-                label = p_tags[0].text
-                value = p_tags[1].text
-                extracted_data[label] = value
-
-        spot_price_str = extracted_data.get('Spot', '0')
-        total_calls_oi = extracted_data.get('Total Calls', '0 L')
-        total_puts_oi = extracted_data.get('Total Puts', '0 L')
         
-        spot_price = float(spot_price_str.replace(',', ''))
+        # The numbers come from the page's API response as soon as it
+        # arrives; the rendered page is only scraped when that fails
+        values = _oi_from_api(capture, ctx)
+        if values is not None:
+            run_manifest.count("network_capture_hits")
+            print("Data read from the page's API response.")
+        else:
+            run_manifest.count("dom_fallbacks")
+            values = _oi_from_dom(page, ctx)
+        spot_price, total_calls_oi, total_puts_oi = values
         
         print("Numerical data extracted successfully.")
         
         # --- Screenshot the Chart ---
         print("Waiting for chart element...")
         chart_container_selector = "div.recharts-responsive-container"
-        chart_element = wait.until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, chart_container_selector))
-        )
-        
-        time.sleep(2) # Allow for final render
-        
-        # Take full page screenshot
-        print("Taking full page screenshot...")
-        temp_screenshot = "temp_full_page.png"
-        driver.save_screenshot(temp_screenshot)
-        
-        # Open and crop the image
-        img = Image.open(temp_screenshot)
-        width, height = img.size
-        
-        # Calculate crop dimensions for the chart
-        left = width * 0.15    # 15% from left
-        right = width * 0.67   # 67% from left
-        top = height * 0.20    # 20% from top
-        bottom = height * 0.72  # 72% from top
+        if not page.wait_for(chart_container_selector, visible=True, timeout=30, label="oi chart element"):
+            raise Exception("OI chart did not load")
         
-        # Crop and save
-        chart_area = img.crop((left, top, right, bottom))
-        chart_area.save(chart_filename)
+        page.wait_for_stable_svg(chart_container_selector, timeout=ctx.config['readiness_timeout'],
+                                 label="oi chart")
         
-        # Clean up temporary file
-        os.remove(temp_screenshot)
-        print(f"Chart saved to '{chart_filename}'")
+        # Capture just the chart; the fractions are the page region it
+        # usually occupies, used if the element cannot be measured
+        print("Capturing the chart...")
+        chart_png = page.screenshot_element(chart_container_selector, padding=16,
+                                            fallback=(0.15, 0.20, 0.67, 0.72))
         
         final_data = {
             "spot_price": spot_price,
             "total_calls_oi": total_calls_oi,
             "total_puts_oi": total_puts_oi,
-            "chart_filepath": chart_filename
+            "chart_png": chart_png
         }
         
         return final_data
@@ -119,9 +180,9 @@ def get_nifty_oi_data_and_chart(chart_filename="nifty_oi_chart.png"):
         print(f"An error occurred: {e}")
         return None
     finally:
-        if driver:
+        if page:
             print("Closing browser.")
-            driver.quit()
+            page.close()
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+import io
+import base64
+
+# --- In-memory screenshots ---
+# Charts are captured by asking Chrome (DevTools Page.captureScreenshot) for
+# just the rectangle they occupy, so no full-page PNG is encoded, written to
+# disk, decoded and cropped. Every function returns PNG bytes, which go
+# straight into a SectionResult's images.
+
+# Rectangle of an element in page coordinates (CSS pixels), as CDP clips expect
+_RECT_JS = """
+const r = arguments[0].getBoundingClientRect();
+return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+"""
+
+# The same for the index-th element matching a CSS selector or XPath (null if none)
+_SELECTOR_RECT_JS = """
+const [selector, xpath, index] = arguments;
+const el = xpath
+    ? document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotItem(index)
+    : document.querySelectorAll(selector)[index];
+if (!el) return null;
+const r = el.getBoundingClientRect();
+return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+"""
+
+_VIEWPORT_JS = """
+return {x: window.scrollX, y: window.scrollY, width: window.innerWidth, height: window.innerHeight};
+"""
+
+
+def element_rect(driver, element):
+    """The element's bounding box in page coordinates: a dict with x, y, width and height."""
+    return driver.execute_script(_RECT_JS, element)
+
+
+def selector_rect(driver, selector, xpath=False, index=0):
+    """Bounding box (as element_rect) of the index-th element matching a CSS selector or XPath, or None."""
+    return driver.execute_script(_SELECTOR_RECT_JS, selector, xpath, index)
+
+
+def capture_clip(driver, clip, scale=1):
+    """
+    Screenshots one rectangle of the page.
+
+    Args:
+        driver: A Chrome WebDriver.
+        clip (dict): x, y, width and height in CSS pixels, page coordinates.
+        scale (float): Device scale of the image.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "clip": {"x": clip['x'], "y": clip['y'], "width": clip['width'], "height": clip['height'],
+                 "scale": scale},
+    })
+    return base64.b64decode(result['data'])
+
+
+def capture_viewport_fraction(driver, left, top, right, bottom):
+    """
+    Screenshots a region of the visible viewport given as fractions of its
+    width and height, e.g. (0.15, 0.20, 0.67, 0.72). For pages whose chart
+    cannot be located as an element.
+    """
+    viewport = driver.execute_script(_VIEWPORT_JS)
+    clip = {
+        "x": viewport['x'] + viewport['width'] * left,
+        "y": viewport['y'] + viewport['height'] * top,
+        "width": viewport['width'] * (right - left),
+        "height": viewport['height'] * (bottom - top),
+    }
+    try:
+        return capture_clip(driver, clip)
+    except Exception:
+        # No DevTools access: crop a viewport screenshot in memory instead
+        image = to_image(driver.get_screenshot_as_png())
+        width, height = image.size
+        return to_png(image.crop((width * left, height * top, width * right, height * bottom)))
+
+
+def capture_element(driver, element, padding=0, fallback=None):
+    """
+    Screenshots the rectangle an element occupies, plus `padding` CSS pixels
+    around it.
+
+    Args:
+        driver: A Chrome WebDriver.
+        element: The WebElement to capture.
+        padding (int): Margin kept around the element.
+        fallback (tuple): Viewport fractions (left, top, right, bottom)
+            captured instead when the element has no usable size.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    # Without DevTools access, WebDriver screenshots the element itself
+    return _capture_rect(driver, element_rect(driver, element), padding, fallback,
+                         lambda clip: element.screenshot_as_png)
+
+
+def capture_selector(driver, selector, padding=0, fallback=None, xpath=False):
+    """
+    Like capture_element, for the first element matching a CSS selector (or
+    XPath), so it works on any browser_backend engine.
+    """
+    rect = selector_rect(driver, selector, xpath) or {"width": 0, "height": 0}
+    return _capture_rect(driver, rect, padding, fallback, lambda clip: _crop_screenshot(driver, clip, fallback))
+
+
+def _capture_rect(driver, rect, padding, fallback, without_devtools):
+    if rect['width'] < 1 or rect['height'] < 1:
+        if fallback is None:
+            raise ValueError("element has no visible area")
+        print("Warning: chart element has no visible area - capturing a fixed region of the page instead")
+        return capture_viewport_fraction(driver, *fallback)
+    clip = {
+        "x": max(0, rect['x'] - padding),
+        "y": max(0, rect['y'] - padding),
+        "width": rect['width'] + 2 * padding,
+        "height": rect['height'] + 2 * padding,
+    }
+    try:
+        return capture_clip(driver, clip)
+    except Exception:
+        return without_devtools(clip)
+
+
+def _crop_screenshot(driver, clip, fallback):
+    """
+    Without DevTools access: crops a page rectangle out of a viewport
+    screenshot, keeping the part of it in view. When none of it is in view
+    the fallback viewport fractions are captured instead.
+    """
+    viewport = driver.execute_script(_VIEWPORT_JS)
+    left = max(0, clip['x'] - viewport['x'])
+    top = max(0, clip['y'] - viewport['y'])
+    right = min(viewport['width'], clip['x'] + clip['width'] - viewport['x'])
+    bottom = min(viewport['height'], clip['y'] + clip['height'] - viewport['y'])
+    if right - left < 1 or bottom - top < 1:
+        if fallback is None:
+            raise ValueError("element is outside the viewport")
+        print("Warning: chart element is outside the viewport - capturing a fixed region of the page instead")
+        return capture_viewport_fraction(driver, *fallback)
+    image = to_image(driver.get_screenshot_as_png())
+    scale = image.size[0] / viewport['width']  # Screenshot pixels per CSS pixel
+    return to_png(image.crop((left * scale, top * scale, right * scale, bottom * scale)))
+
+
+def to_image(png):
+    """Opens PNG bytes as a PIL image."""
+    from PIL import Image
+    return Image.open(io.BytesIO(png))
+
+
+def to_png(image):
+    """Encodes a PIL image as PNG bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
@@ -0,0 +1,243 @@
+import time
+
+import run_manifest
+
+# Upper bound (seconds) of a wait when the caller does not give one; sections
+# pass the run context's 'readiness_timeout' instead.
+DEFAULT_TIMEOUT = 10
+# How often Python-side waits re-check their condition
+POLL_SECONDS = 0.1
+
+
+# --- Waiting on the page ---
+# Each wait returns True as soon as its signal is seen and False when it hit
+# its upper bound first; callers decide whether a timeout is fatal. How long
+# every wait took is recorded against the running section (run manifest
+# 'waits'), so the real render times of the sites can be tracked.
+
+_NETWORK_IDLE_JS = """
+const [idleMs, timeoutMs, done] = arguments;
+performance.setResourceTimingBufferSize(10000);
+const start = performance.now();
+let count = performance.getEntriesByType('resource').length;
+let changed = start;
+const check = () => {
+    const now = performance.now();
+    const current = performance.getEntriesByType('resource').length;
+    if (current !== count) { count = current; changed = now; }
+    if (document.readyState === 'complete' && now - changed >= idleMs) return done(true);
+    if (now - start >= timeoutMs) return done(false);
+    setTimeout(check, 50);
+};
+check();
+"""
+
+_DOM_QUIET_JS = """
+const [target, quietMs, timeoutMs, done] = arguments;
+const el = typeof target === 'string' ? document.querySelector(target) : target;
+if (!el) return done(false);
+let quiet, limit;
+const observer = new MutationObserver(() => {
+    clearTimeout(quiet);
+    quiet = setTimeout(() => finish(true), quietMs);
+});
+const finish = (ok) => {
+    observer.disconnect();
+    clearTimeout(quiet);
+    clearTimeout(limit);
+    done(ok);
+};
+observer.observe(el, {subtree: true, childList: true, attributes: true, characterData: true});
+quiet = setTimeout(() => finish(true), quietMs);
+limit = setTimeout(() => finish(false), timeoutMs);
+"""
+
+_STABLE_SVG_JS = """
+const [selector, stableMs, minPaths, timeoutMs, done] = arguments;
+const start = performance.now();
+let signature = null;
+let changed = start;
+const check = () => {
+    const now = performance.now();
+    const paths = document.querySelectorAll(selector + ' path');
+    // Chart libraries animate the path data, so its length is part of the signature
+    let length = 0;
+    paths.forEach(p => { length += (p.getAttribute('d') || '').length; });
+    const current = paths.length + ':' + length;
+    if (current !== signature) { signature = current; changed = now; }
+    if (paths.length >= minPaths && now - changed >= stableMs) return done(true);
+    if (now - start >= timeoutMs) return done(false);
+    setTimeout(check, 50);
+};
+check();
+"""
+
+_ELEMENT_JS = """
+const [selector, xpath, visible, placeholder, timeoutMs, done] = arguments;
+const start = performance.now();
+const find = () => xpath
+    ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(selector);
+const check = () => {
+    const el = find();
+    let ready = !!el;
+    if (ready && visible) {
+        const r = el.getBoundingClientRect();
+        ready = r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    }
+    if (ready && placeholder !== null) {
+        const text = (el.innerText !== undefined ? el.innerText : el.textContent || '').trim();
+        ready = text !== '' && text !== placeholder;
+    }
+    if (ready) return done(true);
+    if (performance.now() - start >= timeoutMs) return done(false);
+    setTimeout(check, 100);
+};
+check();
+"""
+
+_PAINT_JS = """
+const [frames, done] = arguments;
+let left = frames;
+const next = () => (left-- > 0 ? requestAnimationFrame(next) : done(true));
+next();
+"""
+
+
+def _timeout_errors():
+    """Script timeouts of both engines, without needing Selenium for CDP."""
+    try:
+        from selenium.common.exceptions import TimeoutException
+    except ImportError:
+        return (TimeoutError,)
+    return (TimeoutException, TimeoutError)  # TimeoutError: the CDP engine's script timeout
+
+
+def _run_async(driver, script, timeout, *args):
+    """Runs an async script, allowing it a little longer than its own bound."""
+    previous = driver.timeouts.script
+    if previous < timeout + 1:
+        driver.set_script_timeout(timeout + 1)
+    try:
+        return bool(driver.execute_async_script(script, *args))
+    except _timeout_errors():
+        return False
+    finally:
+        if previous < timeout + 1:
+            driver.set_script_timeout(previous)
+
+
+def _record(label, start, ok):
+    seconds = time.perf_counter() - start
+    run_manifest.record_wait(label, seconds, ok)
+    if not ok:
+        print(f"Warning: gave up waiting for {label} after {seconds:.1f}s")
+    return ok
+
+
+def wait_for_network_idle(driver, idle_ms=500, timeout=DEFAULT_TIMEOUT, label="network idle"):
+    """
+    Waits until the page has loaded and fetched no new resources for idle_ms.
+
+    Returns:
+        bool: True when the network went idle, False on timeout.
+    """
+    start = time.perf_counter()
+    return _record(label, start, _run_async(driver, _NETWORK_IDLE_JS, timeout, idle_ms, timeout * 1000))
+
+
+def wait_for_dom_quiet(driver, target="body", quiet_ms=300, timeout=DEFAULT_TIMEOUT, label="DOM quiet"):
+    """
+    Waits until the element (a CSS selector or WebElement) and its subtree
+    have not changed for quiet_ms.
+
+    Returns:
+        bool: True when the element went quiet, False on timeout or when it
+        does not exist.
+    """
+    start = time.perf_counter()
+    return _record(label, start, _run_async(driver, _DOM_QUIET_JS, timeout, target, quiet_ms, timeout * 1000))
+
+
+def wait_for_stable_svg(driver, selector, stable_ms=400, min_paths=1, timeout=DEFAULT_TIMEOUT,
+                        label="chart render"):
+    """
+    Waits until the SVG chart under `selector` has at least min_paths paths
+    and neither their number nor their data changed for stable_ms, i.e. the
+    chart finished drawing and animating.
+
+    Returns:
+        bool: True when the chart is stable, False on timeout.
+    """
+    start = time.perf_counter()
+    return _record(label, start, _run_async(driver, _STABLE_SVG_JS, timeout, selector, stable_ms, min_paths,
+                                            timeout * 1000))
+
+
+def wait_for_placeholder_gone(driver, locator, placeholder="--/--", timeout=DEFAULT_TIMEOUT,
+                              label="live data"):
+    """
+    Waits until the element at locator (a (By, value) tuple) shows real data
+    instead of a placeholder such as upstox's '--/--'.
+
+    Returns:
+        bool: True when data appeared, False on timeout.
+    """
+    # Selenium only: the script-based waits below also serve the CDP engine
+    from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                            TimeoutException)
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def loaded(d):
+        return d.find_element(*locator).text.strip() not in ("", placeholder)
+
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS,
+                      ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)).until(loaded)
+        ok = True
+    except TimeoutException:
+        ok = False
+    return _record(label, start, ok)
+
+
+def wait_for_element(driver, selector, xpath=False, visible=False, placeholder=None, timeout=DEFAULT_TIMEOUT,
+                     label="element"):
+    """
+    Waits, inside the page, until an element matching the CSS selector (or
+    XPath) exists; with visible, until it also has a visible area; with a
+    placeholder such as '--/--', until its text is neither empty nor the
+    placeholder. Unlike WebDriverWait it costs one round trip, and it
+    works on any browser_backend engine.
+
+    Returns:
+        bool: True when the element is ready, False on timeout.
+    """
+    start = time.perf_counter()
+    return _record(label, start, _run_async(driver, _ELEMENT_JS, timeout, selector, xpath, visible, placeholder,
+                                            timeout * 1000))
+
+
+def wait_for_paint(driver, frames=2, label="paint"):
+    """Waits for the browser to paint `frames` more frames, e.g. after a style change."""
+    start = time.perf_counter()
+    return _record(label, start, _run_async(driver, _PAINT_JS, DEFAULT_TIMEOUT, frames))
+
+
+def settle(driver, target="body", timeout=DEFAULT_TIMEOUT, label="page settled"):
+    """
+    Waits for the target element (a CSS selector) to appear and then to stop
+    changing, both within one overall timeout. Used after navigating or
+    clicking something that loads and renders new content. Only the target
+    is watched, not the network: Groww and Upstox poll their APIs
+    constantly, so their pages never go network-idle.
+
+    Returns:
+        bool: True when the target settled, False on timeout.
+    """
+    start = time.perf_counter()
+    ok = _run_async(driver, _ELEMENT_JS, timeout, target, False, False, None, timeout * 1000)
+    if ok:
+        remaining = max(0.5, timeout - (time.perf_counter() - start))
+        ok = _run_async(driver, _DOM_QUIET_JS, remaining, target, 300, remaining * 1000)
+    return _record(label, start, ok)
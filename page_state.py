@@ -0,0 +1,64 @@
+import re
+import json
+
+import run_manifest
+
+# Next.js pages embed the state they render from as JSON in this script tag
+NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+
+# --- HTTP-first fast path ---
+# Server-rendered pages such as groww.in's carry their data in the HTML
+# itself. A section first fetches the page over the run's HTTP client and
+# reads that embedded state (values are then picked out with
+# network_capture.find_key / find_objects); only when that fails does it
+# escalate to a browser. record() counts which path served the section, so
+# the run manifest shows how often the fast path hits.
+
+def parse_next_data(html):
+    """The page state embedded in a Next.js page, or None when there is none."""
+    match = NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def fetch_page_state(ctx, url):
+    """
+    Fetches a server-rendered page without a browser and returns the state
+    it embeds. The page is fetched once per run context.
+
+    Args:
+        ctx (RunContext): Shared run context (HTTP client and timeout).
+        url (str): The page to fetch.
+
+    Returns:
+        dict: The embedded page state, or None when the page could not be
+        fetched or embeds none.
+    """
+    def fetch():
+        try:
+            response = ctx.http.get(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Warning: could not fetch {url} over HTTP: {e}")
+            return None
+        state = parse_next_data(response.text)
+        if state is None:
+            print(f"Warning: {url} has no embedded page state")
+        return state
+
+    return ctx.memo(f"page_state:{url}", fetch)
+
+
+def enabled(ctx):
+    """Whether sections try the HTTP fast path first (config 'http_first')."""
+    return ctx.config['http_first']
+
+
+def record(fast):
+    """Counts whether the running section was served by the fast path or fell back to a browser."""
+    run_manifest.count("page_state_hits" if fast else "browser_fallbacks")
@@ -0,0 +1,242 @@
+import json
+import queue
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import stock_market_report as report
+from section_runner import import_modules, preload_children
+from run_context import RunContext, SharedResources
+
+# India does not observe daylight saving, so a fixed offset is exact
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# Market phases (IST, weekdays) at which a full report run is triggered
+MARKET_PHASES = [
+    ("pre-open", "08:45"),
+    ("open", "09:20"),
+    ("close", "15:35"),
+]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def parse_phases(text):
+    """Parses 'pre-open=08:45,open=09:20' into [(name, 'HH:MM'), ...]."""
+    phases = []
+    for item in text.split(","):
+        name, _, at = item.partition("=")
+        datetime.strptime(at.strip(), "%H:%M")  # Validate the time
+        phases.append((name.strip(), at.strip()))
+    return phases
+
+
+def next_phase(now, phases=MARKET_PHASES):
+    """
+    Finds the next scheduled market phase after `now` (an aware datetime).
+
+    Returns:
+        A tuple (phase_name, run_at) with run_at in IST.
+    """
+    now = now.astimezone(IST)
+    for day_offset in range(8):
+        day = (now + timedelta(days=day_offset)).date()
+        if day.weekday() >= 5:  # Saturday/Sunday
+            continue
+        for name, at in sorted(phases, key=lambda phase: phase[1]):
+            hour, minute = (int(part) for part in at.split(":"))
+            run_at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=IST)
+            if run_at > now:
+                return name, run_at
+    raise ValueError("No market phase configured")
+
+
+class ReportDaemon:
+    """
+    Keeps the report process resident between runs so that libraries, the
+    HTTP client, the NSE session, the pooled browsers and the chromedriver
+    install stay warm, and runs the report on a market-phase schedule or on
+    demand. Every run shares the daemon's SharedResources; they are closed
+    when the daemon stops.
+    """
+
+    def __init__(self, phases=MARKET_PHASES, schedule=True, isolate=True):
+        self.phases = phases
+        self.schedule = schedule
+        self.isolate = isolate
+        self.requests = queue.Queue()
+        self.state = "starting"
+        self.last_run = None
+        self.next_run = None
+        self.lock = threading.Lock()
+        self.resources = SharedResources()
+
+    def warm_up(self):
+        """Loads every section's libraries and the long-lived resources once."""
+        print("Warming up: importing section libraries...")
+        imports = [name for section in report.SECTIONS for name in section.get('imports', [])]
+        timings = import_modules(imports)
+        print(f"Imported {len(timings)} libraries in {sum(timings.values()):.2f}s")
+        if self.isolate and preload_children(imports + [report.__name__]):
+            print("Isolated sections start from a fork server with the libraries loaded")
+        try:
+            self.resources.http()
+            self.resources.chromedriver_path()
+            self.resources.nse_session()
+        except Exception as e:
+            print(f"Warning: warm-up incomplete: {e}")
+        self._start_browsers()
+
+    def _start_browsers(self):
+        """Starts a pooled browser of each kind the browser sections use; they stay up between runs."""
+        from browser_pool import browser_kind
+
+        kinds = {}
+        for section in report.SECTIONS:
+            spec = section.get('prewarm', {})
+            if spec.get('browser'):
+                stealth = spec.get('stealth', False)
+                options = spec['browser']()
+                kinds.setdefault(browser_kind(options, stealth), (options, stealth))
+        for kind, (options, stealth) in kinds.items():
+            print(f"Starting a pooled {'/'.join(kind)} browser")
+            self.resources.pool().prewarm(options, stealth)
+
+    def close(self):
+        """Quits the pooled browsers and closes the sessions kept between runs."""
+        self.resources.close()
+
+    def trigger(self, only=None, resume=False, reason="on-demand"):
+        """Queues a report run. Returns the number of runs waiting."""
+        self.requests.put({"only": only, "resume": resume, "reason": reason})
+        return self.requests.qsize()
+
+    def status(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "queued": self.requests.qsize(),
+                "next_scheduled": self.next_run,
+                "last_run": self.last_run,
+            }
+
+    def _run(self, request):
+        argv = []
+        if request.get("only"):
+            argv += ["--only", request["only"]]
+        if request.get("resume"):
+            argv.append("--resume")
+        if not self.isolate:
+            argv.append("--no-isolate")
+
+        print(f"\n=== Report run ({request['reason']}) started at {datetime.now(IST):%H:%M:%S} IST ===")
+        with self.lock:
+            self.state = "running"
+        ctx = RunContext(resources=self.resources)
+        try:
+            manifest = report.main(argv, ctx=ctx)
+        except SystemExit:
+            manifest = None  # Bad arguments; argparse already printed the error
+        except Exception as e:
+            print(f"Report run failed: {e}")
+            manifest = None
+        finally:
+            ctx.close()
+        with self.lock:
+            self.state = "idle"
+            self.last_run = {
+                "reason": request['reason'],
+                "finished_at": datetime.now(IST).isoformat(timespec="seconds"),
+                "success_count": manifest['success_count'] if manifest else 0,
+                "total": manifest['total'] if manifest else 0,
+                "wall_seconds": manifest['wall_seconds'] if manifest else None,
+            }
+
+    def serve_forever(self):
+        """Runs queued and scheduled reports until interrupted."""
+        with self.lock:
+            self.state = "idle"
+        while True:
+            timeout = None
+            phase = None
+            if self.schedule:
+                phase, run_at = next_phase(datetime.now(IST), self.phases)
+                with self.lock:
+                    self.next_run = {"phase": phase, "at": run_at.isoformat(timespec="minutes")}
+                timeout = max(0.0, (run_at - datetime.now(IST)).total_seconds())
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                request = {"only": None, "resume": False, "reason": f"scheduled {phase}"}
+            self._run(request)
+
+
+def make_handler(daemon):
+    """Builds the request handler for the local trigger endpoint."""
+
+    class TriggerHandler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/status":
+                self._reply(200, daemon.status())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/run":
+                self._reply(404, {"error": "not found"})
+                return
+            params = parse_qs(url.query)
+            only = params.get("only", [None])[0]
+            resume = params.get("resume", ["0"])[0] in ("1", "true", "yes")
+            queued = daemon.trigger(only=only, resume=resume)
+            self._reply(202, {"queued": queued})
+
+        def log_message(self, format, *args):
+            pass  # Keep the report output readable
+
+    return TriggerHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the market report warm and run it on a schedule.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"trigger address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"trigger port (default: {DEFAULT_PORT})")
+    parser.add_argument("--phases", type=parse_phases,
+                        default=MARKET_PHASES, metavar="NAME=HH:MM,...",
+                        help="IST run times, default: " + ",".join(f"{n}={t}" for n, t in MARKET_PHASES))
+    parser.add_argument("--no-schedule", action="store_true", help="only run when triggered")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="run browser sections in-process instead of budgeted child processes")
+    args = parser.parse_args(argv)
+
+    daemon = ReportDaemon(phases=args.phases, schedule=not args.no_schedule, isolate=not args.no_isolate)
+    daemon.warm_up()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(daemon))
+    threading.Thread(target=server.serve_forever, name="trigger-server", daemon=True).start()
+    print(f"Report daemon listening on http://{args.host}:{args.port} (POST /run, GET /status)")
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping report daemon.")
+    finally:
+        server.shutdown()
+        daemon.close()
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# --- What the sections never need ---
+# Ad, tracking and analytics hosts the scraped sites pull in. Patterns use the
+# wildcard syntax of DevTools Network.setBlockedURLs ('*' matches anything).
+ADS_AND_ANALYTICS = [
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*adservice.google.*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*amazon-adsystem.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*criteo.*",
+    "*scorecardresearch.com*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*moengage.com*",
+    "*mixpanel.com*",
+    "*segment.io*",
+    "*sentry.io*",
+    "*nr-data.net*",
+    "*newrelic.com*",
+]
+
+
+def _extensions(*extensions):
+    """URL patterns for files with the given extensions, with or without a query string."""
+    patterns = []
+    for extension in extensions:
+        patterns += [f"*.{extension}", f"*.{extension}?*"]
+    return patterns
+
+
+# Resource types, as the file names they are served under
+IMAGES = _extensions("png", "jpg", "jpeg", "gif", "webp", "avif", "ico", "svg")
+FONTS = _extensions("woff", "woff2", "ttf", "otf", "eot") + ["*fonts.googleapis.com*", "*fonts.gstatic.com*"]
+MEDIA = _extensions("mp4", "webm", "mp3", "m3u8")
+
+# --- Profiles ---
+# "data": the section only reads numbers or text, so nothing visual loads.
+# "chart": the section screenshots a chart the page draws itself (SVG or
+#     canvas); fonts and styles stay so the labels render as usual.
+# "screenshot": the section screenshots the page as the site shows it;
+#     only ads, tracking and media are dropped.
+PROFILES = {
+    "data": ADS_AND_ANALYTICS + IMAGES + FONTS + MEDIA,
+    "chart": ADS_AND_ANALYTICS + IMAGES + MEDIA,
+    "screenshot": ADS_AND_ANALYTICS + MEDIA,
+}
+
+
+def apply(driver, profile):
+    """
+    Blocks the requests of a profile in the driver's tab. Call it before the
+    section navigates.
+
+    Args:
+        driver: A Chrome WebDriver.
+        profile (str): A key of PROFILES.
+
+    Returns:
+        bool: True if the blocking is in place, False if DevTools refused it
+        (the page then simply loads everything).
+    """
+    patterns = PROFILES[profile]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        print(f"Warning: could not apply the '{profile}' request blocking profile: {e}")
+        return False
+    return True
@@ -0,0 +1,523 @@
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from section_runner import DRIVER_START_LOCK
+from section_results import ResultBus
+
+OUTPUT_DIR = "CodeOutput"
+
+DEFAULT_CONFIG = {
+    "http_timeout": 10,        # seconds per HTTP request
+    "page_load_timeout": 30,   # seconds per browser page load
+    "readiness_timeout": 10,   # upper bound of each wait for a page to render
+    "chrome_version_main": None,  # Chrome major version; detected from the installed Chrome unless set
+    "prewarm_browsers": 2,     # kinds of pooled browser started when a run begins
+    "browser_pool": True,      # share pooled browsers between sections
+    "request_blocking": True,  # apply the sections' request blocking profiles
+    "heatmap_headless": True,  # capture the heatmap from URL state instead of clicking through it
+    "warm_profiles": True,     # start browsers from the sites' saved profiles (browser_provisioning)
+    "browser_engine": "selenium",  # engine behind new_page(): "selenium" or "cdp" (browser_backend)
+    "http_first": True,        # read server-rendered pages' embedded state before starting Chrome (page_state)
+    "vix_local_chart": False,  # draw the VIX chart from Yahoo Finance closes instead of screenshotting Groww's
+    "http_cache": True,        # answer and revalidate GETs of slow-changing sources from disk (http_cache)
+    "fii_dii_lookback_days": 10,  # trading days of FII/DII flows to collect (at least 10 for the summary)
+    "fii_dii_max_pages": 4,    # FII/DII table pages requested at once
+    "async_prefetch": True,    # fetch non-browser sources concurrently when a run starts (async_fetch)
+}
+
+PREWARM_WORKERS = 4
+
+# NSE's API only answers sessions holding the cookies its home page sets
+NSE_HOME_URL = "https://www.nseindia.com/"
+
+
+class SharedResources:
+    """
+    Long-lived resources that may outlive a single run: the HTTP client, the
+    browser pool, the NSE session and the chromedriver install. The report
+    daemon keeps one of these warm and hands it to every run's context; the
+    pooled browsers and the NSE cookies then stay live between runs.
+    """
+
+    def __init__(self, chromedriver=None):
+        # _lock only guards the attributes; the slow first use of the NSE
+        # session and of chromedriver runs under a lock of its own, so it
+        # never holds up http() or pool()
+        self._lock = threading.Lock()
+        self._nse_lock = threading.Lock()
+        self._chromedriver_lock = threading.Lock()
+        self._http = None
+        self._pool = None
+        self._nse = None
+        self._chromedriver = chromedriver
+
+    def http(self):
+        """Returns the shared http_client.HttpClient, creating it on first use."""
+        with self._lock:
+            if self._http is None:
+                from http_client import HttpClient
+                from http_cache import HttpCache
+                self._http = HttpClient(cache=HttpCache())
+            return self._http
+
+    def session(self):
+        """Returns the requests.Session behind the shared HTTP client."""
+        return self.http().session
+
+    def http_stats(self):
+        """Connection reuse counters of the HTTP client (empty when no request was made)."""
+        return self._http.stats() if self._http is not None else {}
+
+    def nse_session(self, refresh=False):
+        """
+        Returns a requests.Session holding nseindia.com's cookies, visiting
+        the home page for them on first use, or again with refresh=True
+        (once NSE starts refusing the old ones).
+        """
+        with self._nse_lock:
+            if self._nse is not None and not refresh:
+                return self._nse
+            import requests
+            from http_client import DEFAULT_HEADERS
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            session.get(NSE_HOME_URL, timeout=DEFAULT_CONFIG['http_timeout'])
+            with self._lock:
+                old, self._nse = self._nse, session
+            if old is not None:
+                old.close()
+            return session
+
+    def chromedriver_path(self):
+        """Returns the chromedriver binary matching the installed Chrome, resolved once."""
+        with self._chromedriver_lock:
+            if self._chromedriver is None:
+                import browser_provisioning
+                path = browser_provisioning.chromedriver_path()
+                with self._lock:
+                    self._chromedriver = path
+            return self._chromedriver
+
+    def resolved_chromedriver(self):
+        """The chromedriver path if it has been resolved already, else None."""
+        return self._chromedriver
+
+    def pool(self):
+        """Returns the shared browser_pool.BrowserPool, creating it on first use."""
+        with self._lock:
+            if self._pool is None:
+                from browser_pool import BrowserPool
+                self._pool = BrowserPool(self.launch, self.chromedriver_path)
+            return self._pool
+
+    def pool_stats(self):
+        """Counters of the browser pool (empty when no browser was pooled)."""
+        return dict(self._pool.stats) if self._pool is not None else {}
+
+    def launch(self, options, stealth=False, version_main=None):
+        """
+        Starts a Chrome WebDriver: undetected_chromedriver for stealth
+        browsers (for Chrome major version_main, detected when None), plain
+        Selenium with the resolved chromedriver otherwise.
+        """
+        with DRIVER_START_LOCK:
+            if stealth:
+                import undetected_chromedriver as uc
+                import browser_provisioning
+                version_main = version_main or browser_provisioning.chrome_major()
+                return uc.Chrome(version_main=version_main,
+                                 driver_executable_path=browser_provisioning.stealth_driver_path(),
+                                 options=options, use_subprocess=True)
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service as ChromeService
+            service = ChromeService(self.chromedriver_path())
+            return webdriver.Chrome(service=service, options=options)
+
+    def close(self):
+        """Quits the pooled browsers and closes the HTTP client and the NSE session."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+            if self._nse is not None:
+                self._nse.close()
+                self._nse = None
+        if pool is not None:
+            pool.close()
+
+
+class RunContext:
+    """
+    Everything the sections of one run share: the HTTP client, browser
+    start-up, a cache of fetched data, the bus their results are published
+    on and the run configuration.
+
+    Pass the same context to the sections of stock_market_report.py and to
+    the standalone fetchers (gold.py, silver.py, ...) and each source is
+    fetched once, whichever caller asks first.
+    """
+
+    def __init__(self, resources=None, output_dir=OUTPUT_DIR, config=None, leases=None, memo=None):
+        """
+        Args:
+            resources (SharedResources): Long-lived resources to use; by
+                default the context creates (and closes) its own.
+            output_dir (str): Where the run's files are written.
+            config (dict): Overrides of DEFAULT_CONFIG.
+            leases (list): Browser tabs leased for this context by a parent
+                process (see browser_pool); new_driver() attaches to them.
+            memo (dict): Data already fetched by a parent process's context
+                (see memo_snapshot); memo() returns it without fetching.
+        """
+        self._owns_resources = resources is None
+        self.resources = resources or SharedResources()
+        self.output_dir = output_dir
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self._lock = threading.Lock()
+        self._cache = dict(memo or {})
+        self._key_locks = {}
+        self._drivers = {}  # driver -> the pool lease it was attached to, if this context took it
+        self._profiles = {}  # driver -> (site, working user-data directory or None)
+        self._leases = {lease.kind: lease for lease in leases or []}
+        self._pool_start = self.resources.pool_stats()
+        self._prewarm_pool = None
+        self._prefetch = None
+        self._prefetch_stats = {}  # section -> statistics of the work prefetched for it
+        self.prewarm_stats = {"browsers_prewarmed": 0, "hosts_warmed": 0, "sources_prefetched": 0}
+        self.bus = ResultBus()
+
+    # --- Configuration and HTTP ---
+
+    @property
+    def http(self):
+        """
+        This run's view of the shared HttpClient (see http_client): pooled
+        keep-alive connections, common headers and per-host limits. Requests
+        default to this run's http_timeout, and use the response cache
+        unless the run's config turns it off; the shared client itself is
+        left as it is.
+        """
+        return self.resources.http().view(self.http_timeout, self.config['http_cache'])
+
+    @property
+    def session(self):
+        return self.resources.session()
+
+    @property
+    def http_timeout(self):
+        return self.config['http_timeout']
+
+    def output_path(self, filename):
+        """Path of an artifact inside this run's output directory."""
+        return os.path.join(self.output_dir, filename)
+
+    # --- Fetched-data cache ---
+
+    def memo(self, key, fetch):
+        """
+        Returns the cached value for `key`, calling fetch() to produce it on
+        first use. Concurrent callers of the same key wait for the first
+        fetch instead of repeating it. Failed fetches (None) are not cached.
+        """
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    return self._cache[key]
+            value = fetch()
+            if value is not None:
+                with self._lock:
+                    self._cache[key] = value
+            return value
+
+    def memo_snapshot(self):
+        """The fetched data that can be handed to a child process's context (the picklable values)."""
+        with self._lock:
+            items = list(self._cache.items())
+        snapshot = {}
+        for key, value in items:
+            try:
+                pickle.dumps(value)
+            except Exception:
+                continue
+            snapshot[key] = value
+        return snapshot
+
+    # --- Browsers ---
+    # Sections lease a tab in a pooled browser rather than starting their own
+    # Chrome (config 'browser_pool'); see browser_pool.py. A driver obtained
+    # from new_driver() is used the same way in both cases. The pool belongs
+    # to the SharedResources, so its browsers outlive the run; the context
+    # only returns the tabs it leased.
+
+    @property
+    def pool(self):
+        """The shared BrowserPool, or None when pooling is off."""
+        if not self.config['browser_pool']:
+            return None
+        return self.resources.pool()
+
+    def new_driver(self, options, stealth=False, network_log=False, blocking=None, profile=None):
+        """
+        Gets a Chrome WebDriver for a section.
+
+        The driver is attached to a tab of a pooled browser matching the
+        options: the tab leased for this context by the parent process, or
+        a tab leased from this context's pool. Only when no pooled tab can be
+        had is a browser started for the section alone.
+
+        Args:
+            options: ChromeOptions built by the section.
+            stealth (bool): Use undetected_chromedriver instead of plain
+                Selenium (for sites that block automation).
+            network_log (bool): Record the page's network events for
+                network_capture.NetworkCapture.
+            blocking (str): A request_blocking profile ("data", "chart" or
+                "screenshot") naming what the tab does not need to load.
+            profile (str): Site whose warm profile (cookies, consent
+                choices) the browser starts from, e.g. "groww"; see
+                browser_provisioning. Its state is saved back on release.
+
+        Returns:
+            The driver. Hand it back with release_driver() when done.
+        """
+        from browser_pool import browser_kind, attach
+
+        lease = self._leases.get(browser_kind(options, stealth))
+        owned = None
+        if lease is None and self.pool is not None:
+            try:
+                lease = owned = self.pool.acquire(options, stealth, timeout=self.config['page_load_timeout'])
+            except Exception as e:
+                print(f"Warning: no pooled browser available ({e}) - starting a private one")
+        driver = None
+        if lease is not None:
+            try:
+                driver = attach(lease, network_log)
+            except Exception as e:
+                print(f"Warning: could not attach to pooled browser ({e}) - starting a private one")
+                if owned is not None:
+                    self.pool.release(owned)
+                    owned = None
+        if not self.config['warm_profiles']:
+            profile = None
+        user_data_dir = None
+        if driver is None:
+            if network_log:
+                options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            if profile:
+                import browser_provisioning
+                user_data_dir = browser_provisioning.restore_profile(profile)
+                options.add_argument(f"--user-data-dir={user_data_dir}")
+            try:
+                driver = self._launch(options, stealth)
+            except Exception:
+                if user_data_dir:
+                    browser_provisioning.discard_profile(user_data_dir)
+                raise
+        elif profile:
+            import browser_provisioning
+            browser_provisioning.load_cookies(driver, profile)
+        with self._lock:
+            self._drivers[driver] = owned
+            if profile:
+                self._profiles[driver] = (profile, user_data_dir)
+        if blocking and self.config['request_blocking']:
+            import request_blocking
+            request_blocking.apply(driver, blocking)
+        return driver
+
+    def new_page(self, options, stealth=False, network_log=False, blocking=None, profile=None):
+        """
+        Gets a browser_backend.Page for a section; the arguments are those of
+        new_driver(). With the "cdp" browser_engine the page drives a pooled
+        tab directly over DevTools; when no pooled tab can be had, or the
+        websockets package is missing, the Selenium engine is used instead.
+
+        Returns:
+            The page. Hand it back with its close().
+        """
+        import browser_backend
+
+        if self.config['browser_engine'] == "cdp":
+            page = self._cdp_page(options, stealth, blocking, profile)
+            if page is not None:
+                return page
+        driver = self.new_driver(options, stealth, network_log, blocking, profile)
+        return browser_backend.SeleniumPage(driver, self.release_driver)
+
+    def _cdp_page(self, options, stealth, blocking, profile):
+        from browser_pool import browser_kind
+        import browser_backend
+
+        lease = self._leases.get(browser_kind(options, stealth))
+        owned = None
+        try:
+            if lease is None and self.pool is not None:
+                lease = owned = self.pool.acquire(options, stealth, timeout=self.config['page_load_timeout'])
+            if lease is None:
+                return None
+            page = browser_backend.open_cdp_page(lease, self.release_driver, self.config['page_load_timeout'])
+        except Exception as e:
+            print(f"Warning: CDP engine unavailable ({e}) - using Selenium")
+            if owned is not None:
+                self.pool.release(owned)
+            return None
+        profile = profile if self.config['warm_profiles'] else None
+        if profile:
+            import browser_provisioning
+            browser_provisioning.load_cookies(page, profile)
+        with self._lock:
+            # release_driver() handles pages like drivers: cookies, quit, lease
+            self._drivers[page] = owned
+            if profile:
+                self._profiles[page] = (profile, None)
+        if blocking and self.config['request_blocking']:
+            import request_blocking
+            request_blocking.apply(page, blocking)
+        return page
+
+    def _launch(self, options, stealth):
+        return self.resources.launch(options, stealth, self.config['chrome_version_main'])
+
+    def pool_stats(self):
+        """Counters of the browser pool over this run (empty when no browser was pooled)."""
+        return {key: value - self._pool_start.get(key, 0) for key, value in self.resources.pool_stats().items()}
+
+    def release_driver(self, driver):
+        """Quits a driver from new_driver() (or a CDP page) and returns its pooled tab, if any."""
+        if driver is None:
+            return
+        with self._lock:
+            owned = self._drivers.pop(driver, None)
+            site, user_data_dir = self._profiles.pop(driver, (None, None))
+        if site and not user_data_dir:
+            import browser_provisioning
+            browser_provisioning.save_cookies(driver, site)
+        try:
+            driver.quit()
+        except Exception:
+            print("Warning: Could not close browser cleanly")
+        if owned is not None:
+            self.resources.pool().release(owned)
+        if user_data_dir:
+            import browser_provisioning
+            browser_provisioning.snapshot_profile(site, user_data_dir)
+            browser_provisioning.discard_profile(user_data_dir)
+
+    # --- Speculative prewarm ---
+    # The runner starts pooled browsers and opens HTTP connections at time
+    # zero, while the first sections are still downloading, so that browser
+    # sections find a browser already running. Prewarmed browsers stay in
+    # the shared pool; they are quit with the SharedResources.
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._prewarm_pool is None:
+                self._prewarm_pool = ThreadPoolExecutor(max_workers=PREWARM_WORKERS,
+                                                        thread_name_prefix="prewarm")
+            return self._prewarm_pool.submit(func, *args)
+
+    def prewarm_driver(self, options_factory, stealth=False):
+        """
+        Starts a pooled browser of the kind options_factory() describes in
+        the background, so the first section to ask for one finds it running.
+        """
+        pool = self.pool
+        if pool is None:
+            return
+        self._submit(pool.prewarm, options_factory(), stealth)
+        with self._lock:
+            self.prewarm_stats['browsers_prewarmed'] += 1
+
+    def prewarm_chromedriver(self):
+        """Resolves the chromedriver binary in the background."""
+        self._submit(self.resources.chromedriver_path)
+
+    def warm_http(self, urls):
+        """Opens a keep-alive connection to each origin in the background."""
+        origins = []
+        for url in urls:
+            parts = urlsplit(url)
+            origin = f"{parts.scheme}://{parts.netloc}/"
+            if origin not in origins:
+                origins.append(origin)
+        for origin in origins:
+            self._submit(self._warm_origin, origin)
+
+    def prefetch(self, sections):
+        """
+        Starts fetching the non-browser sources of the named sections on the
+        async_fetch engine; the sections then find the data in memo().
+        """
+        if not self.config['async_prefetch']:
+            return
+        import async_fetch
+        future = async_fetch.start_prefetch(self, sections)
+        if future is None:
+            return
+        with self._lock:
+            self._prefetch = future
+            self.prewarm_stats['sources_prefetched'] += len([name for name in sections
+                                                             if name in async_fetch.SOURCES])
+
+    def prefetch_stats(self, section):
+        """The statistics the prefetch of a section's source counts against (see run_manifest.new_stats)."""
+        import run_manifest
+
+        with self._lock:
+            if section not in self._prefetch_stats:
+                self._prefetch_stats[section] = run_manifest.new_stats()
+            return self._prefetch_stats[section]
+
+    def take_prefetch_stats(self, section):
+        """Hands over a section's prefetch statistics, once, for its record; None when nothing was prefetched."""
+        with self._lock:
+            return self._prefetch_stats.pop(section, None)
+
+    def _warm_origin(self, origin):
+        try:
+            self.http.head(origin, allow_redirects=True)
+        except Exception:
+            return  # The section will report a real failure
+        with self._lock:
+            self.prewarm_stats['hosts_warmed'] += 1
+
+    def close(self):
+        """
+        Quits any driver a section failed to release, returning its pooled
+        tab. Resources passed in by the caller, browser pool included, stay
+        open; resources the context created are closed.
+        """
+        with self._lock:
+            drivers = list(self._drivers)
+            prewarm_pool, self._prewarm_pool = self._prewarm_pool, None
+            prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None:
+            prefetch.cancel()  # Sources of sections that never ran
+        for driver in drivers:
+            self.release_driver(driver)
+        if prewarm_pool is not None:
+            prewarm_pool.shutdown(wait=True)
+        if self._owns_resources:
+            self.resources.close()
+
+
+_default_context = None
+_default_lock = threading.Lock()
+
+
+def default_context():
+    """The process-wide context used when a caller does not pass one."""
+    global _default_context
+    with _default_lock:
+        if _default_context is None:
+            _default_context = RunContext()
+        return _default_context
@@ -0,0 +1,411 @@
+import os
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+
+OUTPUT_DIR = "CodeOutput"
+MANIFEST_FILE = "run_manifest.json"
+HISTORY_FILE = "run_history.jsonl"
+
+# Counters every section record starts with
+COUNTER_KEYS = ("retries", "http_requests", "http_bytes", "page_loads", "webdriver_round_trips")
+
+_current = threading.local()
+_count_lock = threading.Lock()
+_instrumented = set()
+
+
+# --- Per-section statistics ---
+# Section functions run on worker threads (or alone in a child process), so
+# the statistics of the running section live in a thread-local slot that the
+# instrumentation hooks below update.
+
+def begin_section(name):
+    """Starts collecting statistics for the section running on this thread."""
+    _current.stats = {
+        "name": name,
+        "cpu_start": time.thread_time(),
+        **new_stats(),
+    }
+    return _current.stats
+
+
+def new_stats():
+    """
+    Empty statistics for work done for a section before it runs, e.g. the
+    prefetch of its source; adopt() them on the threads doing that work and
+    merge_stats() them into the section's record once it finished.
+    """
+    return {key: 0 for key in COUNTER_KEYS}
+
+
+def merge_stats(stats, extra):
+    """Adds the counters, waits and parses of `extra` (see new_stats) to a section's statistics."""
+    if not extra:
+        return stats
+    with _count_lock:
+        for key, value in extra.items():
+            if isinstance(value, dict):
+                entries = stats.setdefault(key, {})
+                for label, entry in value.items():
+                    merged = entries.setdefault(label, {})
+                    for field, amount in entry.items():
+                        if field == 'peak_kb':
+                            merged[field] = max(merged.get(field, 0), amount)
+                        else:
+                            merged[field] = round(merged.get(field, 0) + amount, 4)
+            elif isinstance(value, (int, float)):
+                stats[key] = round(stats.get(key, 0) + value, 4)
+    return stats
+
+
+def end_section():
+    """Stops collecting statistics on this thread and returns them."""
+    stats = getattr(_current, "stats", None)
+    _current.stats = None
+    if stats is None:
+        return {key: 0 for key in COUNTER_KEYS}
+    stats['cpu_seconds'] = time.thread_time() - stats.pop('cpu_start')
+    stats.pop('name')
+    return stats
+
+
+def current_stats():
+    """The statistics of the section running on this thread (None outside a section)."""
+    return getattr(_current, "stats", None)
+
+
+def adopt(stats):
+    """
+    Makes the work of a helper thread count against a section: pass it the
+    section's current_stats(), read on the section's own thread.
+    """
+    _current.stats = stats
+
+
+def count(key, amount=1):
+    """Adds to a counter of the section running on this thread, if any."""
+    stats = getattr(_current, "stats", None)
+    if stats is not None:
+        # Helper threads (see adopt) may share the section's statistics
+        with _count_lock:
+            stats[key] = stats.get(key, 0) + amount
+
+
+def note_retry():
+    """Records one retry of the running section."""
+    count("retries")
+
+
+def record_wait(label, seconds, ok=True):
+    """
+    Records how long the running section waited for a page to become ready
+    (see page_readiness), per kind of wait, and whether the wait timed out.
+    """
+    stats = getattr(_current, "stats", None)
+    if stats is None:
+        return
+    entry = stats.setdefault("waits", {}).setdefault(label, {"count": 0, "seconds": 0.0, "timeouts": 0})
+    entry['count'] += 1
+    entry['seconds'] = round(entry['seconds'] + seconds, 3)
+    if not ok:
+        entry['timeouts'] += 1
+    stats['wait_seconds'] = round(stats.get('wait_seconds', 0.0) + seconds, 3)
+
+
+def record_parse(label, seconds, size, peak=None):
+    """
+    Records an HTML parse of the running section (see html_parse), per
+    page: time, input bytes and, when memory is traced, the peak bytes
+    allocated while parsing.
+    """
+    stats = getattr(_current, "stats", None)
+    if stats is None:
+        return
+    with _count_lock:
+        entry = stats.setdefault("parses", {}).setdefault(label, {"count": 0, "seconds": 0.0, "bytes": 0})
+        entry['count'] += 1
+        entry['seconds'] = round(entry['seconds'] + seconds, 4)
+        entry['bytes'] += size
+        if peak is not None:
+            entry['peak_kb'] = max(entry.get('peak_kb', 0), peak // 1024)
+
+
+def instrument():
+    """
+    Hooks requests and Selenium so that HTTP requests, bytes received,
+    browser page loads and WebDriver round trips are counted against the
+    running section. Safe to call more than once. Only libraries that are
+    already imported are hooked, so this never pulls in a library the
+    selected sections do not use.
+    """
+    if "requests" not in _instrumented and "requests" in sys.modules:
+        requests = sys.modules["requests"]
+        original_send = requests.Session.send
+
+        def send(self, request, **kwargs):
+            response = original_send(self, request, **kwargs)
+            count("http_requests")
+            if kwargs.get("stream"):
+                count("http_bytes", int(response.headers.get("Content-Length") or 0))
+            else:
+                count("http_bytes", len(response.content or b""))
+            return response
+
+        requests.Session.send = send
+        _instrumented.add("requests")
+
+    if "selenium" not in _instrumented and "selenium.webdriver" in sys.modules:
+        from selenium.webdriver.remote.webdriver import WebDriver
+        original_get = WebDriver.get
+        original_execute = WebDriver.execute
+
+        def get(self, url):
+            count("page_loads")
+            return original_get(self, url)
+
+        def execute(self, driver_command, params=None):
+            # Every WebDriver command, element lookups and .text included
+            count("webdriver_round_trips")
+            return original_execute(self, driver_command, params)
+
+        WebDriver.get = get
+        WebDriver.execute = execute
+        _instrumented.add("selenium")
+
+
+# --- Manifest and history ---
+
+def output_paths(section, output_dir=OUTPUT_DIR):
+    """The paths of a section's 'outputs' (file names) inside the run's output directory."""
+    return [os.path.join(output_dir, name) for name in section.get('outputs', [])]
+
+
+def _output_sizes(paths):
+    """Returns the size of each output artifact (None when it is missing)."""
+    sizes = []
+    for path in paths:
+        size = os.path.getsize(path) if os.path.exists(path) else None
+        sizes.append({"path": path, "bytes": size})
+    return sizes
+
+
+def build_manifest(sections, results, run_start, run_end, import_seconds=None, output_dir=OUTPUT_DIR):
+    """
+    Builds the machine-readable record of one report run.
+
+    Args:
+        sections (list): The section specs that were run.
+        results (dict): Records returned by section_runner.run_sections.
+        run_start (float): Run start as a Unix timestamp.
+        run_end (float): Run end as a Unix timestamp.
+        import_seconds (dict): Import time per library, from
+            section_runner.import_modules.
+        output_dir (str): The run's output directory, where the sections'
+            outputs are looked up.
+
+    Returns:
+        A JSON-serialisable dictionary.
+    """
+    section_records = {}
+    for section in sections:
+        record = results.get(section['name'])
+        if record is None:
+            continue
+        entry = {
+            "status": record['status'],
+            "ok": record['ok'],
+            "resource": section.get('resource'),
+            "start": datetime.fromtimestamp(record['start']).isoformat(timespec="milliseconds"),
+            "end": datetime.fromtimestamp(record['end']).isoformat(timespec="milliseconds"),
+            "wall_seconds": round(record['duration'], 3),
+            "priority": section.get('priority'),
+        }
+        if record.get('degraded'):
+            entry['degraded'] = True
+        stats = dict(record.get('stats') or {})
+        entry['cpu_seconds'] = round(stats.pop('cpu_seconds', 0.0), 3)
+        entry.update(stats)
+        entry['outputs'] = _output_sizes(output_paths(section, output_dir))
+        section_records[section['name']] = entry
+
+    return {
+        "run_id": datetime.fromtimestamp(run_start).strftime("%Y%m%d-%H%M%S"),
+        "started_at": datetime.fromtimestamp(run_start).isoformat(timespec="seconds"),
+        "finished_at": datetime.fromtimestamp(run_end).isoformat(timespec="seconds"),
+        "wall_seconds": round(run_end - run_start, 3),
+        "success_count": sum(1 for entry in section_records.values() if entry['ok']),
+        "total": len(section_records),
+        "import_seconds": {name: round(seconds, 3) for name, seconds in (import_seconds or {}).items()},
+        "sections": section_records,
+    }
+
+
+def write_manifest(manifest, output_dir=OUTPUT_DIR, final=True):
+    """
+    Writes the manifest of the latest run. While a run is in progress it is
+    rewritten after every section (final=False) so that it doubles as the
+    checkpoint for --resume; the final write also appends it to the history.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+    if final:
+        with open(os.path.join(output_dir, HISTORY_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(manifest) + "\n")
+    return manifest_path
+
+
+def load_manifest(output_dir=OUTPUT_DIR):
+    """Reads the manifest (checkpoint) of the previous run, or None if there is none."""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f"Warning: could not read checkpoint '{path}'.")
+        return None
+
+
+def sections_to_rerun(sections, previous, max_age_minutes, output_dir=OUTPUT_DIR):
+    """
+    Picks the sections a resumed run has to execute again.
+
+    A section is re-run when the previous run did not complete it
+    successfully (including sections degraded to meet a deadline), or when any of its outputs is missing or older than
+    max_age_minutes.
+
+    Returns:
+        A tuple (rerun, reused) of section-name lists.
+    """
+    previous_sections = (previous or {}).get('sections', {})
+    oldest_allowed = time.time() - max_age_minutes * 60
+    rerun, reused = [], []
+    for section in sections:
+        entry = previous_sections.get(section['name'])
+        # Degraded sections only kept the outputs of an earlier run
+        fresh = entry is not None and entry.get('ok') and not entry.get('degraded')
+        for path in output_paths(section, output_dir):
+            if not fresh:
+                break
+            fresh = os.path.exists(path) and os.path.getmtime(path) >= oldest_allowed
+        (reused if fresh else rerun).append(section['name'])
+    return rerun, reused
+
+
+def merge_manifest(manifest, previous, reused):
+    """
+    Carries the entries of reused sections over from the previous manifest
+    so the new manifest still describes the whole report bundle.
+    """
+    previous_sections = (previous or {}).get('sections', {})
+    for name in reused:
+        entry = dict(previous_sections[name])
+        entry['status'] = "reused"
+        entry.setdefault('reused_from', previous.get('run_id'))
+        manifest['sections'][name] = entry
+    manifest['success_count'] = sum(1 for entry in manifest['sections'].values() if entry['ok'])
+    manifest['total'] = len(manifest['sections'])
+    if reused:
+        manifest['resumed_from'] = previous.get('run_id')
+    return manifest
+
+
+def load_history(output_dir=OUTPUT_DIR):
+    """Reads every manifest appended to the run history file."""
+    path = os.path.join(output_dir, HISTORY_FILE)
+    runs = []
+    if not os.path.exists(path):
+        return runs
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue  # Skip a partially written line
+    return runs
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without importing math
+    return ordered[int(rank) - 1]
+
+
+def section_percentiles(runs, field="wall_seconds"):
+    """
+    Computes p50/p95 of a per-section field across runs.
+
+    Returns:
+        A dictionary mapping section name to {'runs', 'p50', 'p95'}.
+    """
+    samples = {}
+    for run in runs:
+        for name, entry in run.get('sections', {}).items():
+            if entry.get('status') in ("ok", "failed", "timed_out") and entry.get(field) is not None:
+                samples.setdefault(name, []).append(entry[field])
+    return {
+        name: {"runs": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+        for name, values in samples.items()
+    }
+
+
+def fast_path_rates(runs):
+    """
+    How often each section was served without a browser, across runs: its
+    'page_state_hits' (HTTP fast path, see page_state) against its
+    'browser_fallbacks'.
+
+    Returns:
+        A dictionary mapping section name to {'hits', 'fallbacks', 'hit_rate'}.
+    """
+    totals = {}
+    for run in runs:
+        for name, entry in run.get('sections', {}).items():
+            hits, fallbacks = entry.get('page_state_hits', 0), entry.get('browser_fallbacks', 0)
+            if entry.get('status') == "reused" or not (hits or fallbacks):
+                continue
+            row = totals.setdefault(name, {"hits": 0, "fallbacks": 0})
+            row['hits'] += hits
+            row['fallbacks'] += fallbacks
+    for row in totals.values():
+        row['hit_rate'] = row['hits'] / (row['hits'] + row['fallbacks'])
+    return totals
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    history = load_history()
+    if not history:
+        print(f"No run history found in '{os.path.join(OUTPUT_DIR, HISTORY_FILE)}'.")
+    else:
+        stats = section_percentiles(history)
+        print(f"\nSection wall time across {len(history)} runs")
+        print("=" * 48)
+        print(f"{'Section':<16} | {'Runs':>5} | {'p50 (s)':>8} | {'p95 (s)':>8}")
+        print("-" * 48)
+        for name, row in sorted(stats.items(), key=lambda item: -item[1]['p95']):
+            print(f"{name:<16} | {row['runs']:>5} | {row['p50']:>8.1f} | {row['p95']:>8.1f}")
+        print("-" * 48)
+
+        rates = fast_path_rates(history)
+        if rates:
+            print("\nHTTP fast path (page state) vs browser fallback")
+            print("=" * 48)
+            print(f"{'Section':<16} | {'Hits':>5} | {'Fallbacks':>9} | {'Hit rate':>8}")
+            print("-" * 48)
+            for name, row in sorted(rates.items()):
+                print(f"{name:<16} | {row['hits']:>5} | {row['fallbacks']:>9} | {row['hit_rate']:>8.0%}")
+            print("-" * 48)
@@ -0,0 +1,112 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class SectionResult:
+    """
+    What a report section produced, kept in memory.
+
+    Sections return one of these instead of writing files themselves. It is
+    truthy when the section succeeded, so callers that only check success
+    keep working, and it is picklable so isolated sections can send it back
+    from their child process.
+
+    Attributes:
+        name (str): The section name, as in stock_market_report.SECTIONS.
+        ok (bool): Whether the section succeeded.
+        data (dict): Numbers, rows and series for the renderers.
+        images (dict): PNG bytes keyed by output file name.
+        error (str): Why the section failed, when it did.
+    """
+    name: str
+    ok: bool = True
+    data: dict = field(default_factory=dict)
+    images: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def __bool__(self):
+        return self.ok
+
+
+def failed(name, error=None):
+    """Shorthand for the result of a section that did not succeed."""
+    return SectionResult(name, ok=False, error=str(error) if error else None)
+
+
+class ResultBus:
+    """
+    In-process publish/subscribe channel for section results.
+
+    The section runner publishes every result as its section finishes.
+    Subscribers (file writers, the final report generator, ...) are called
+    on the publishing thread with the result; later consumers can read any
+    result already published with get().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._subscribers = []
+
+    def subscribe(self, callback, names=None):
+        """
+        Registers callback(result) for the given section names (all when None).
+        Subscribers see failed results too and should check result.ok.
+        """
+        with self._lock:
+            self._subscribers.append((callback, set(names) if names else None))
+
+    def publish(self, result):
+        """
+        Stores the result and hands it to every matching subscriber.
+
+        Returns:
+            bool: False if any subscriber raised an error.
+        """
+        with self._lock:
+            self._results[result.name] = result
+            subscribers = [callback for callback, names in self._subscribers
+                           if names is None or result.name in names]
+        delivered = True
+        for callback in subscribers:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Warning: result of '{result.name}' could not be delivered: {e}")
+                delivered = False
+        return delivered
+
+    def get(self, name):
+        """The latest result published for a section, or None."""
+        with self._lock:
+            return self._results.get(name)
+
+    def results(self):
+        with self._lock:
+            return dict(self._results)
+
+
+class FileSink:
+    """
+    Bus subscriber that writes successful results to the output directory:
+    every image as-is, and everything else through the section's 'render'
+    function, called as render(result, output_dir).
+    """
+
+    def __init__(self, sections, output_dir):
+        self.renderers = {section['name']: section['render'] for section in sections if section.get('render')}
+        self.output_dir = output_dir
+
+    def __call__(self, result):
+        if not result.ok:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        for filename, png in result.images.items():
+            with open(os.path.join(self.output_dir, filename), 'wb') as f:
+                f.write(png)
+        render = self.renderers.get(result.name)
+        if render:
+            render(result, self.output_dir)
@@ -0,0 +1,541 @@
+import os
+import sys
+import signal
+import importlib
+import subprocess
+import time
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import run_manifest
+from section_results import SectionResult
+
+# Maximum number of sections allowed to hold each resource slot at once.
+# yfinance shares module-level state between downloads, so it stays serial.
+RESOURCE_LIMITS = {
+    "browser": 2,
+    "yfinance": 1,
+    "http": 4,
+}
+
+# Seconds to wait for an isolated section to exit after its tree is killed.
+KILL_GRACE_SECONDS = 5
+
+# Priority 1 sections are critical and always run; higher numbers are less
+# important and are the first to be dropped when a deadline is at risk.
+DEFAULT_PRIORITY = 2
+# Estimated seconds for a section with neither a declared cost nor history.
+DEFAULT_COST = 30
+# Runs of history needed before the measured p95 replaces the declared cost.
+MIN_HISTORY_RUNS = 3
+
+
+class _StartLock:
+    """A lock that can be swapped for a process-shared one when sections run in child processes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lock.release()
+
+
+# Held while a section of the "yfinance" slot runs in this process, and by
+# code outside that slot that downloads from yfinance (the VIX local chart),
+# so that yfinance's module-level state is never used by two threads at once.
+YFINANCE_LOCK = threading.Lock()
+
+# Driver start-up is not safe to run in parallel: undetected_chromedriver
+# patches a shared chromedriver binary and webdriver_manager downloads into a
+# shared cache, so every section takes this lock while creating its driver.
+DRIVER_START_LOCK = _StartLock()
+
+# Spawned (not forked) children: forking a process that has running threads
+# can copy locks in a held state. See preload_children for the fork server.
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def import_modules(names):
+    """
+    Imports the given modules one after another and times each import.
+
+    Importing up front, on one thread, keeps the section threads from
+    contending on the import lock and makes startup cost visible.
+
+    Returns:
+        A dictionary mapping module name to import time in seconds
+        (0 for modules that were already loaded). Modules that fail to
+        import are reported and left for the section to fail on.
+    """
+    timings = {}
+    for name in names:
+        if name in timings:
+            continue
+        if name in sys.modules:
+            timings[name] = 0.0
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Warning: could not import {name}: {e}")
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def preload_children(modules):
+    """
+    Starts isolated sections from a fork server that has imported `modules`
+    once, so each child begins with them loaded instead of importing them
+    again. The fork server is a fresh single-threaded process, so forking
+    it is safe. Used by the report daemon; call it before the first run.
+
+    Returns:
+        bool: True when the fork server is used, False where the platform
+        has none (children keep being spawned).
+    """
+    global _MP_CONTEXT
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return False
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(list(dict.fromkeys(modules)))
+    _MP_CONTEXT = context
+    return True
+
+
+def _isolated_entry(name, func, imports, start_lock, ctx_settings, chromedriver, conn):
+    """Child-process entry point for an isolated section."""
+    # Lead a new process group so chromedriver and Chrome can be killed together
+    if hasattr(os, "setsid"):
+        os.setsid()
+    DRIVER_START_LOCK.lock = start_lock
+    import_modules(imports)
+    run_manifest.instrument()
+    run_manifest.begin_section(name)
+    ctx = None
+    if ctx_settings is not None:
+        # A run context holds locks and live objects, so the child builds its
+        # own from the parent's settings
+        from run_context import RunContext, SharedResources
+        # Reuse the chromedriver the parent already resolved, if any
+        ctx = RunContext(resources=SharedResources(chromedriver), **ctx_settings)
+    result = None
+    try:
+        result = func(ctx) if ctx is not None else func()
+    except Exception as e:
+        print(f"Isolated section raised an error: {e}")
+    finally:
+        if ctx is not None:
+            ctx.close()
+            ctx.resources.close()
+    # The result (a picklable SectionResult) is published by the parent
+    conn.send((result, run_manifest.end_section()))
+    conn.close()
+
+
+def kill_process_tree(pid):
+    """Kills a process and every process it started (chromedriver, Chrome and its helpers)."""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _lease_for(section, ctx, timeout):
+    """
+    Leases a tab of the run's browser pool for an isolated browser section.
+    The child attaches to it, so the browser itself lives in this process
+    and survives the child being killed.
+    """
+    spec = section.get('prewarm', {})
+    if ctx is None or not spec.get('browser') or ctx.pool is None:
+        return None
+    try:
+        return ctx.pool.acquire(spec['browser'](), spec.get('stealth', False), timeout=timeout)
+    except Exception as e:
+        print(f"Warning: no pooled browser for section '{section['name']}': {e}")
+        return None
+
+
+def _fetch_in_parent(section, ctx, timeout):
+    """
+    Fetches the non-browser source of an isolated section (see async_fetch)
+    in this process, where the warm sessions live (the NSE session of the
+    report daemon, say), or waits for its prefetch. The child then finds the
+    data in its context's memo.
+    """
+    import async_fetch
+
+    if ctx is None or not ctx.config['async_prefetch'] or section['name'] not in async_fetch.SOURCES:
+        return
+    try:
+        async_fetch.prefetch(ctx, [section['name']], timeout=timeout)
+    except Exception as e:
+        print(f"Warning: could not fetch the data of section '{section['name']}' up front: {e}")
+
+
+def _run_isolated(section, ctx=None):
+    """
+    Runs a section in a child process with a hard wall-clock budget.
+
+    On overrun the whole process tree is killed and the section is reported
+    as timed out. Stray processes left in the group by a section that did
+    finish are cleaned up as well. A browser tab leased for the section is
+    reset and returned to the pool afterwards. Data the run context already
+    fetched is handed to the child.
+
+    The budget covers the whole section: fetching its data in this process
+    and leasing its browser tab take from the same budget as the child.
+    """
+    budget = section['budget']
+    deadline = time.monotonic() + budget
+
+    def remaining():
+        return max(0.0, deadline - time.monotonic())
+
+    _fetch_in_parent(section, ctx, remaining())
+    lease = _lease_for(section, ctx, remaining()) if remaining() > 0 else None
+    if remaining() <= 0:
+        print(f"Section '{section['name']}' used up its {budget}s budget before it could start")
+        if lease is not None:
+            ctx.pool.release(lease)
+        return None, True, None
+    ctx_settings = None
+    if ctx is not None:
+        ctx_settings = {"output_dir": ctx.output_dir, "config": ctx.config,
+                        "leases": [lease] if lease else [], "memo": ctx.memo_snapshot()}
+    chromedriver = ctx.resources.resolved_chromedriver() if ctx is not None else None
+    parent_conn, child_conn = _MP_CONTEXT.Pipe(duplex=False)
+    process = _MP_CONTEXT.Process(
+        target=_isolated_entry,
+        args=(section['name'], section['func'], section.get('imports', []),
+              DRIVER_START_LOCK.lock, ctx_settings, chromedriver, child_conn),
+        name=f"section-{section['name']}",
+        daemon=True,
+    )
+    process.start()
+    child_conn.close()
+
+    result = None
+    stats = None
+    timed_out = False
+    if parent_conn.poll(remaining()):
+        try:
+            result, stats = parent_conn.recv()
+        except EOFError:
+            result = None  # Child died without reporting
+    else:
+        timed_out = not parent_conn.poll(0)
+
+    if timed_out:
+        print(f"Section '{section['name']}' exceeded its {budget}s budget - killing its process tree")
+    kill_process_tree(process.pid)
+    process.join(KILL_GRACE_SECONDS)
+    parent_conn.close()
+    if lease is not None:
+        ctx.pool.release(lease)
+    return result, timed_out, stats
+
+
+def _slot_lock(section):
+    """The lock an in-process section holds while it runs, if its slot has one."""
+    if section.get('resource', 'http') == "yfinance":
+        return YFINANCE_LOCK
+    return contextlib.nullcontext()
+
+
+def _run_one(section, isolate, ctx=None):
+    """
+    Runs a single section function, timing it and collecting its statistics.
+    A SectionResult it returns is published on the context's result bus; the
+    section only counts as successful once every subscriber accepted it.
+    """
+    start = time.time()
+    timed_out = False
+    result = None
+    run_manifest.begin_section(section['name'])
+    try:
+        if isolate and section.get('budget'):
+            result, timed_out, child_stats = _run_isolated(section, ctx)
+        else:
+            with _slot_lock(section):
+                result = section['func'](ctx) if ctx is not None else section['func']()
+            child_stats = None
+        ok = bool(result)
+        if ctx is not None and isinstance(result, SectionResult):
+            ok = ctx.bus.publish(result) and ok
+    except Exception as e:
+        print(f"Section '{section['name']}' raised an error: {e}")
+        ok, child_stats = False, None
+    stats = run_manifest.end_section()
+    if child_stats:
+        # The work happened in the child; keep its counters and CPU time
+        stats = child_stats
+    if ctx is not None:
+        # Plus what was fetched for the section ahead of it (async_fetch)
+        run_manifest.merge_stats(stats, ctx.take_prefetch_stats(section['name']))
+    return {"ok": ok, "timed_out": timed_out, "start": start, "end": time.time(), "stats": stats}
+
+
+def estimate_costs(sections, history=None):
+    """
+    Estimates how long each section will take.
+
+    Uses the p95 wall time from the run history once a section has at least
+    MIN_HISTORY_RUNS runs, and the section's declared 'cost' otherwise.
+
+    Returns:
+        A dictionary mapping section name to estimated seconds.
+    """
+    measured = run_manifest.section_percentiles(history or [])
+    costs = {}
+    for section in sections:
+        past = measured.get(section['name'])
+        if past and past['runs'] >= MIN_HISTORY_RUNS:
+            costs[section['name']] = past['p95']
+        else:
+            costs[section['name']] = section.get('cost', DEFAULT_COST)
+    return costs
+
+
+def _deadline_at_risk(section, now, deadline, costs, pending, limits):
+    """
+    Decides whether starting a non-critical section now would put the
+    deadline at risk: its own estimated cost, plus the critical work still
+    queued for the same resource slot, must fit before the deadline.
+    """
+    if deadline is None or section.get('priority', DEFAULT_PRIORITY) <= 1:
+        return False
+    resource = section.get('resource', 'http')
+    critical_backlog = sum(
+        costs[other['name']] for other in pending
+        if other is not section and other.get('priority', DEFAULT_PRIORITY) <= 1
+        and other.get('resource', 'http') == resource
+    ) / max(1, limits.get(resource, 1))
+    return now + critical_backlog + costs[section['name']] > deadline
+
+
+def _degrade(section, output_dir):
+    """
+    Builds the record of a section dropped to protect the deadline. If the
+    previous run left all of its outputs behind they are kept as a cached
+    substitute; otherwise the section is simply skipped.
+    """
+    now = time.time()
+    outputs = run_manifest.output_paths(section, output_dir)
+    cached = bool(outputs) and all(os.path.exists(path) for path in outputs)
+    if cached:
+        print(f"Section '{section['name']}' degraded - deadline at risk, keeping cached outputs")
+    else:
+        print(f"Section '{section['name']}' skipped - deadline at risk and no cached outputs")
+    return {
+        "ok": cached, "status": "degraded" if cached else "skipped", "degraded": True,
+        "start": now, "end": now, "duration": 0.0, "depends_on": section.get('depends_on', []),
+    }
+
+
+def prewarm(sections, ctx, isolate=True, limits=None):
+    """
+    Speculatively provisions, at time zero, what the sections will ask for
+    later, so that browser start-up and connection set-up overlap with the
+    first sections' downloads instead of following them.
+
+    Sections declare what they need in 'prewarm': {'urls': [...]} for
+    HTTP sections, {'browser': options_factory, 'stealth': bool} for
+    browser sections. A pooled browser is started for each kind of browser
+    the sections use, highest priority first, up to the context's
+    'prewarm_browsers'. Connections are only warmed for in-process sections:
+    an isolated section has its own HTTP client. Non-browser sources are
+    prefetched (async_fetch, config 'async_prefetch') for every section; an
+    isolated one is handed its data when its child starts.
+    """
+    from browser_pool import browser_kind
+
+    ordered = sorted(sections, key=lambda s: s.get('priority', DEFAULT_PRIORITY))
+    in_process = [s for s in ordered if not (isolate and s.get('budget'))]
+
+    ctx.warm_http([url for s in in_process for url in s.get('prewarm', {}).get('urls', [])])
+    ctx.prefetch([s['name'] for s in ordered])
+
+    browsers = [s for s in ordered if s.get('prewarm', {}).get('browser')]
+    if any(not s['prewarm'].get('stealth') for s in browsers):
+        ctx.prewarm_chromedriver()
+
+    kinds = {}
+    for section in browsers:
+        options = section['prewarm']['browser']()
+        kinds.setdefault(browser_kind(options, section['prewarm'].get('stealth', False)), section)
+    for kind, section in list(kinds.items())[:ctx.config.get('prewarm_browsers', 0)]:
+        print(f"Prewarming a {'/'.join(kind)} browser (first needed by '{section['name']}')")
+        ctx.prewarm_driver(section['prewarm']['browser'], section['prewarm'].get('stealth', False))
+
+
+def run_sections(sections, limits=None, isolate=True, on_done=None, deadline=None, costs=None,
+                 ctx=None):
+    """
+    Runs report sections concurrently while honouring their declared
+    dependencies and the per-resource concurrency limits.
+
+    Args:
+        sections (list): Section specs. Each is a dict with 'name', 'func'
+            (a callable returning a SectionResult or True/False; it is passed
+            the run context when ctx is given, otherwise no arguments),
+            'resource' (a key
+            of the limits dict) and 'depends_on' (list of section names).
+            Sections with a 'budget' (seconds) run in a child process that
+            is killed, together with any browser it started, on overrun.
+        limits (dict): Maximum concurrent sections per resource. Defaults to
+            RESOURCE_LIMITS.
+        isolate (bool): Set False to run budgeted sections in-process too.
+        on_done (callable): Called as on_done(results) on the scheduling
+            thread each time a section finishes, e.g. to write a checkpoint.
+        deadline (float): Unix time by which the report must be complete.
+            Sections start in 'priority' order; once a non-critical section
+            would no longer fit before the deadline it is degraded to its
+            cached outputs (or skipped) instead of being run.
+        costs (dict): Estimated seconds per section, see estimate_costs.
+        ctx (RunContext): Shared by the in-process sections. Isolated
+            sections get a fresh context with the same settings. Results are
+            published on ctx.bus as their sections finish, and browsers and
+            connections are prewarmed on it when the run starts (see prewarm).
+
+    Returns:
+        A dictionary mapping each section name to a record with 'ok',
+        'status', 'start', 'end', 'duration', 'depends_on' and 'stats'
+        (CPU time, retries, HTTP and page-load counters).
+    """
+    limits = dict(RESOURCE_LIMITS, **(limits or {}))
+    run_manifest.instrument()
+    if isolate and any(s.get('budget') for s in sections):
+        # Child processes need a start lock they can share with the parent
+        DRIVER_START_LOCK.lock = _MP_CONTEXT.Lock()
+    by_name = {s['name']: s for s in sections}
+    for section in sections:
+        for dep in section.get('depends_on', []):
+            if dep not in by_name:
+                raise ValueError(f"Section '{section['name']}' depends on unknown section '{dep}'")
+
+    if costs is None:
+        costs = estimate_costs(sections)
+
+    if ctx is not None:
+        prewarm(sections, ctx, isolate, limits)
+
+    output_dir = ctx.output_dir if ctx is not None else run_manifest.OUTPUT_DIR
+    results = {}
+    # Critical sections first; the declared order breaks ties
+    pending = sorted(sections, key=lambda s: s.get('priority', DEFAULT_PRIORITY))
+    running = {}  # future -> section
+    in_use = {resource: 0 for resource in limits}
+    run_start = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, sum(limits.values()))) as executor:
+        while pending or running:
+            # Start every section whose dependencies are done and whose slot is free
+            for section in list(pending):
+                deps = section.get('depends_on', [])
+                if any(dep not in results for dep in deps):
+                    continue
+                if not all(results[dep]['ok'] for dep in deps):
+                    pending.remove(section)
+                    now = time.time()
+                    results[section['name']] = {
+                        "ok": False, "status": "skipped", "start": now, "end": now,
+                        "duration": 0.0, "depends_on": deps,
+                    }
+                    print(f"Section '{section['name']}' skipped - a dependency failed")
+                    continue
+                resource = section.get('resource', 'http')
+                if in_use.setdefault(resource, 0) >= limits.get(resource, 1):
+                    continue
+                if _deadline_at_risk(section, time.time(), deadline, costs, pending, limits):
+                    pending.remove(section)
+                    results[section['name']] = _degrade(section, output_dir)
+                    continue
+                in_use[resource] += 1
+                pending.remove(section)
+                running[executor.submit(_run_one, section, isolate, ctx)] = section
+
+            if not running:
+                if pending:
+                    # Nothing can start and nothing is running: a dependency cycle
+                    names = ", ".join(s['name'] for s in pending)
+                    raise ValueError(f"Sections cannot be scheduled (dependency cycle?): {names}")
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                section = running.pop(future)
+                in_use[section.get('resource', 'http')] -= 1
+                record = future.result()
+                if record.pop('timed_out'):
+                    record['status'] = "timed_out"
+                else:
+                    record['status'] = "ok" if record['ok'] else "failed"
+                record['duration'] = record['end'] - record['start']
+                record['depends_on'] = section.get('depends_on', [])
+                results[section['name']] = record
+            if on_done:
+                on_done(results)
+
+    results_wall = time.time() - run_start
+    for record in results.values():
+        record['offset'] = record['start'] - run_start
+    print(f"\nAll sections finished in {results_wall:.1f}s")
+    return results
+
+
+def critical_path(results):
+    """
+    Finds the dependency chain with the largest total run time.
+
+    Returns:
+        A tuple (chain, seconds) where chain is a list of section names,
+        earliest first.
+    """
+    memo = {}
+
+    def longest(name):
+        if name not in memo:
+            record = results[name]
+            best_chain, best_time = [], 0.0
+            for dep in record.get('depends_on', []):
+                chain, seconds = longest(dep)
+                if seconds > best_time:
+                    best_chain, best_time = chain, seconds
+            memo[name] = (best_chain + [name], best_time + record['duration'])
+        return memo[name]
+
+    best = ([], 0.0)
+    for name in results:
+        candidate = longest(name)
+        if candidate[1] > best[1]:
+            best = candidate
+    return best
+
+
+def print_run_summary(results):
+    """Prints per-section timings and the critical path of a run."""
+    print("\nSection timings:")
+    print("-" * 54)
+    for name, record in sorted(results.items(), key=lambda item: item[1]['start']):
+        print(f"{name:<16} {record['status']:<10} +{record['offset']:>6.1f}s {record['duration']:>8.1f}s")
+    print("-" * 54)
+
+    degraded = [name for name, record in results.items() if record.get('degraded')]
+    if degraded:
+        print(f"Degraded to meet the deadline: {', '.join(degraded)}")
+
+    chain, seconds = critical_path(results)
+    if chain:
+        print(f"Critical path ({seconds:.1f}s): {' -> '.join(chain)}")
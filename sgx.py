@@ -1,14 +1,7 @@
-import time
-import io
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from PIL import Image
+from run_context import default_context
 
-def get_sgx_nifty_snapshot(output_filename="sgx_nifty_snapshot.png"):
+def get_sgx_nifty_snapshot(output_filename="sgx_nifty_snapshot.png", ctx=None):
     """
     Launches a browser, screenshots a stable container element, and then
     programmatically crops the image to the exact required section,
@@ -16,76 +9,83 @@ def get_sgx_nifty_snapshot(output_filename="sgx_nifty_snapshot.png"):
 
     Args:
         output_filename (str): The name of the output PNG file.
+        ctx (RunContext): Shared run context that starts and tracks the
+            browser. Defaults to the process-wide context.
 
     Returns:
         bool: True if successful, False otherwise.
     """
+    png = capture_sgx_nifty_png(ctx)
+    if png is None:
+        return False
+    with open(output_filename, 'wb') as f:
+        f.write(png)
+    print(f"Successfully saved cropped snapshot to {output_filename}")
+    return True
+
+def chrome_options():
+    """Browser options of the SGX Nifty snapshot (also used to prewarm its browser)."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1280,1000")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    return options
+
+def capture_sgx_nifty_png(ctx=None):
+    """
+    Captures the SGX Nifty snapshot in memory.
+
+    Args:
+        ctx (RunContext): Shared run context that starts and tracks the
+            browser. Defaults to the process-wide context.
+
+    Returns:
+        bytes: The cropped PNG image, or None on failure.
+    """
     print("Initializing browser to capture SGX Nifty snapshot...")
     
-    driver = None
+    ctx = ctx or default_context()
+    page = None
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1280,1000")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        page = ctx.new_page(chrome_options(), blocking="screenshot", profile="sgxnifty")
         
         url = 'https://sgxnifty.org/'
         
         print(f"Navigating to {url}...")
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 30)
+        page.navigate(url)
         
         # --- 1. Find the main container that holds all desired content ---
         container_selector = ".grid.col-940.align-center"
         print("Waiting for the main data container to load...")
-        container_element = wait.until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, container_selector))
-        )
-        time.sleep(2) # Allow dynamic values to load
-
-        # --- 2. Screenshot just this container ---
-        print("Taking initial screenshot of the container...")
-        screenshot_data = container_element.screenshot_as_png
+        if not page.wait_for(container_selector, visible=True, timeout=30, label="sgx container"):
+            raise Exception("The main data container did not load.")
+        # Let the dynamic values fill in
+        page.wait_for_dom_quiet(container_selector, timeout=ctx.config['readiness_timeout'], label="sgx values")
 
-        # --- 3. Find the LAST element we want to KEEP ---
+        # --- 2. Find the LAST element we want to KEEP ---
         # The second 'main-table-div' is the last piece of content we want.
-        tables = container_element.find_elements(By.CLASS_NAME, "main-table-div")
-        if len(tables) < 2:
+        last = page.rect(f"{container_selector} .main-table-div", index=1)
+        if last is None:
             raise Exception("Could not find both data tables for cropping.")
-            
-        last_element_to_keep = tables[1]
         
-        # --- 4. Calculate the precise crop height ---
-        # The height is its y-position relative to the container plus its own height.
+        # --- 3. Clip from the container's top to the end of that element ---
         # Subtracting a padding of 130 pixels for a clean bottom edge.
-        crop_height = last_element_to_keep.location['y'] + last_element_to_keep.size['height'] - 130
+        container = page.rect(container_selector)
+        clip = dict(container, height=last['y'] + last['height'] - container['y'] - 130)
         
-        # --- 5. Crop and Save ---
-        print(f"Cropping image to a calculated height of {crop_height} pixels...")
-        img = Image.open(io.BytesIO(screenshot_data))
-        
-        # Crop from top-left (0,0) to the full width and the calculated height
-        crop_box = (0, 0, img.width, crop_height)
-        cropped_img = img.crop(crop_box)
-
-        cropped_img.save(output_filename, "PNG")
-
-        print(f"Successfully saved cropped snapshot to {output_filename}")
-        return True
+        # --- 4. Capture only that rectangle ---
+        print(f"Capturing the container clipped to {clip['height']:.0f} pixels...")
+        return page.screenshot_clip(clip)
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        return False
+        return None
         
     finally:
-        if driver:
+        if page:
             print("Closing browser.")
-            driver.quit()
+            page.close()
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
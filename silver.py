@@ -1,27 +1,42 @@
-import requests
-from bs4 import BeautifulSoup
+import html_parse
 import re
+from run_context import default_context
 
-def get_chennai_silver_rates():
+# The parts of the page that are read: today's price boxes and the history table
+PAGE_TARGET = html_parse.Target("div.gold-rate-container", "table")
+
+def get_chennai_silver_rates(ctx=None):
     """
     Scrapes the GoodReturns website for silver rates in Chennai, using
     header matching to find the correct historical data table.
 
+    Args:
+        ctx (RunContext): Shared run context; the page is fetched once per
+            context. Defaults to the process-wide context.
+
     Returns:
         A dictionary containing the structured data, or None on failure.
     """
+    ctx = ctx or default_context()
+    return ctx.memo("silver_rates", lambda: _scrape_chennai_silver_rates(ctx))
+
+def _scrape_chennai_silver_rates(ctx):
     print("Fetching silver rates for Chennai from goodreturns.in...")
     
     try:
         url = 'https://www.goodreturns.in/silver-rates/chennai.html'
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
-        response = requests.get(url, headers=headers, timeout=10)
+        response = ctx.http.get(url)
         response.raise_for_status()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+    # An unchanged page (e.g. served from the HTTP cache) is not parsed again
+    return ctx.http.parsed(response, "silver_rates", _parse_silver_page)
+
+def _parse_silver_page(response):
+    try:
+        soup = html_parse.parse(response.content, PAGE_TARGET, label="silver page")
         
         # --- 1. Extract Today's Silver Prices (This part is correct) ---
         print("Extracting today's prices...")
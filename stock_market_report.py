@@ -1,67 +1,101 @@
+import io
 import os
 import time
-import io
-import yfinance as yf
-import pandas as pd
-import requests
-import re
-from bs4 import BeautifulSoup
-from PIL import Image
-import undetected_chromedriver as uc
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import argparse
+import importlib
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.lib.colors import HexColor, black, grey, white, lightgrey
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-import mplfinance as mpf
-from reportlab.platypus import Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from nsepython import nse_optionchain_scrapper
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
+from section_runner import run_sections, print_run_summary, import_modules, estimate_costs
+from run_manifest import (build_manifest, write_manifest, note_retry, load_manifest,
+                          sections_to_rerun, merge_manifest, load_history)
+from run_context import RunContext, default_context
+from section_results import SectionResult, FileSink, failed
+import browser_provisioning
+
+# Heavy third-party libraries (yfinance, pandas, selenium, reportlab, docx,
+# mplfinance, nsepython...) are imported inside the sections that use them, so
+# running a few sections only pays for the libraries those sections need.
+# Each section lists its libraries in SECTIONS['imports'] and the runner
+# imports them up front, timed, before any section starts.
+
+# Every section takes the run context (run_context.RunContext) that carries
+# the HTTP client, browser start-up, fetched-data cache and configuration.
+# Sections return a SectionResult (numbers, rows, PNG bytes) instead of
+# writing files; the runner publishes it on ctx.bus and the write_* renderers,
+# driven by a FileSink, turn it into files in the run's output directory.
+# Sections that the standalone modules (gold.py, nifty_oi.py, ...) also cover
+# fetch through those modules, so a caller sharing the context, such as
+# finalreportgenerator.py, reuses the data instead of fetching it again.
 
 def add_shading_to_paragraph(paragraph, color="000000"):
     """Applies a background color shading to an entire paragraph."""
+    from docx.oxml.ns import nsdecls
+    from docx.oxml import parse_xml
+
     shading_xml = f'<w:shd {nsdecls("w")} w:val="clear" w:color="auto" w:fill="{color}"/>'
     pPr = paragraph._p.get_or_add_pPr()
     pPr.append(parse_xml(shading_xml))
 
-# Create output directory
-os.makedirs("CodeOutput", exist_ok=True)
-
-def get_key_stocks_to_watch():
+# --- Browser options ---
+# Browser sections build their ChromeOptions through these factories so that
+# the runner can start a matching browser ahead of time (SECTIONS 'prewarm').
+
+def _key_stocks_options():
+    import undetected_chromedriver as uc
+
+    options = uc.ChromeOptions()
+    # Core settings for stability
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-web-security')
+    options.add_argument('--ignore-certificate-errors')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-notifications')
+    options.add_argument('--enable-features=NetworkService,NetworkServiceInProcess')
+    return options
+
+def _vix_options():
+    import undetected_chromedriver as uc
+
+    options = uc.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-notifications')
+    return options
+
+def _heatmap_options():
+    import heatmap
+    return heatmap.chrome_options()
+
+def _pcr_options():
+    import get_nifty_pcr
+    return get_nifty_pcr.chrome_options()
+
+def _oi_options():
+    import nifty_oi
+    return nifty_oi.chrome_options()
+
+def _sgx_options():
+    import sgx
+    return sgx.chrome_options()
+
+def get_key_stocks_to_watch(ctx=None):
     """Generate Key Stocks to Watch Report"""
+    import html_parse
+
+    ctx = ctx or default_context()
     print("Fetching latest stocks news from Groww...")
-    driver = None
-    wait = None
+    page = None
     
     try:
         # Initialize browser
         print("Initializing browser...")
-        options = uc.ChromeOptions()
-        
-        # Core settings for stability
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--ignore-certificate-errors')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-notifications')
-        options.add_argument('--enable-features=NetworkService,NetworkServiceInProcess')
         
         # Initialize driver with retry mechanism
         max_retries = 3
@@ -72,38 +106,22 @@ def get_key_stocks_to_watch():
             try:
                 if retry_count > 0:
                     print(f"Retry attempt {retry_count} of {max_retries}...")
+                    note_retry()
                     time.sleep(retry_delay)
                     retry_delay *= 2
                     
-                if driver:
-                    try:
-                        driver.close()
-                        driver.quit()
-                    except:
-                        pass
-                    driver = None
+                if page:
+                    page.close()
+                    page = None
                 
                 # Create fresh ChromeOptions for each attempt
-                options = uc.ChromeOptions()
-                options.add_argument('--headless')
-                options.add_argument('--no-sandbox')
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--disable-gpu')
-                options.add_argument('--window-size=1920,1080')
-                options.add_argument('--disable-web-security')
-                options.add_argument('--ignore-certificate-errors')
-                options.add_argument('--disable-extensions')
-                options.add_argument('--disable-notifications')
-                options.add_argument('--enable-features=NetworkService,NetworkServiceInProcess')
-                
-                driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-                driver.set_page_load_timeout(30)
-                driver.set_script_timeout(30)
-                wait = WebDriverWait(driver, 30)
+                page = ctx.new_page(_key_stocks_options(), stealth=True, blocking="data", profile="groww")
+                page.set_page_load_timeout(ctx.config['page_load_timeout'])
+                page.set_script_timeout(ctx.config['page_load_timeout'])
                 
                 # Verify browser is working
-                driver.get('about:blank')
-                if not driver.current_url:
+                page.navigate('about:blank')
+                if not page.url:
                     raise Exception("Browser failed to initialize properly")
                     
                 print("Browser initialized successfully")
@@ -120,40 +138,34 @@ def get_key_stocks_to_watch():
         url = "https://groww.in/market-news/stocks"
         print("Loading page...")
         try:
-            driver.get(url)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'smnli671ItemContainer')))
+            page.navigate(url)
+            page.wait_for(".smnli671ItemContainer", timeout=30, label="key stocks page")
             print("Page loaded successfully")
         except Exception as e:
             print(f"Error loading page: {e}")
-            if driver:
-                driver.quit()
-            return False
+            page.close()
+            return failed("key_stocks", e)
         
         # Scroll to load all items with validation
         print("Loading more news items...")
-        SCROLL_PAUSE_TIME = 2
         scroll_count = 0
         max_scrolls = 2
         
         while scroll_count < max_scrolls:
             try:
                 # Verify browser is still responsive
-                driver.current_url
+                page.url
                 
                 # Scroll down
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(SCROLL_PAUSE_TIME)
+                page.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                page.settle(timeout=ctx.config['readiness_timeout'], label="more news items")
                 scroll_count += 1
                 print(f"Scroll {scroll_count}/{max_scrolls}")
                 
                 # Try to click "Load More" button if it exists
-                try:
-                    load_more = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "sm403InfiniteLoaderContainer")))
-                    if load_more and load_more.is_displayed():
-                        driver.execute_script("arguments[0].scrollIntoView(true);", load_more)
-                        time.sleep(1)
-                except:
-                    pass  # No load more button found
+                if page.visible(".sm403InfiniteLoaderContainer"):
+                    page.scroll_into_view(".sm403InfiniteLoaderContainer")
+                    page.settle(timeout=ctx.config['readiness_timeout'], label="load more")
                     
             except Exception as e:
                 print(f"Error during scrolling: {e}")
@@ -161,53 +173,29 @@ def get_key_stocks_to_watch():
         
         # Get all loaded items
         try:
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            soup = html_parse.parse(page.html(), html_parse.Target("div[class*=ItemContainer]"), label="key stocks page")
             news_items = soup.find_all('div', {'class': lambda x: x and 'ItemContainer' in x})
             
             if not news_items:
                 print("Could not find news items.")
-                return False
+                page.close()
+                return failed("key_stocks", "no news items found")
                 
         except Exception as e:
             print(f"Error parsing page content: {e}")
-            return False
+            page.close()
+            return failed("key_stocks", e)
             
         print(f"Found {len(news_items)} news items to process")
 
-        print(f"Filtering news and creating 'Key_Stocks_to_Watch.docx'...")
-        # Create document
-        output_file = os.path.join("CodeOutput", "Key_Stocks_to_Watch.docx")
-        try:
-            document = Document()
-            
-            # Check if file is writable
-            with open(output_file, 'a') as test_write:
-                pass
-                
-        except Exception as e:
-            print(f"Error creating document: {e}")
-            if driver:
-                driver.quit()
-            return False
-        
-        # Add title
-        title_paragraph = document.add_paragraph()
-        title_run = title_paragraph.add_run(" Key Stocks to Watch ")
-        font = title_run.font
-        font.name = 'Arial Black'
-        font.size = Pt(20)
-        font.color.rgb = RGBColor(255, 255, 255)  # White text color
-        add_shading_to_paragraph(title_paragraph, color="000000")
-        document.add_paragraph()
-
         # Process news items
+        items = []
         seen_stocks = set()  # Track unique stock names
-        news_count = 0  # Track number of unique news added
         skipped_count = 0  # Track duplicates
         
         for idx, item in enumerate(news_items, 1):
             print(f"\rProcessing news {idx}/{len(news_items)}...", end="")
-            if news_count >= 15:  # Get 15 unique items
+            if len(items) >= 15:  # Get 15 unique items
                 break
             try:
                 # Extract news details
@@ -221,7 +209,7 @@ def get_key_stocks_to_watch():
                     time_element = header_div.find('time')
                     timestamp = time_element.text.strip() if time_element else ""
                 else:
-                    print("Warning: Could not find header for news item", news_count + 1)
+                    print("Warning: Could not find header for news item", len(items) + 1)
                     source = "Unknown Source"
                     timestamp = ""
                 
@@ -233,7 +221,7 @@ def get_key_stocks_to_watch():
                 if headline_div:
                     headline = headline_div.text.strip()
                 else:
-                    print("Warning: Could not find headline for news item", news_count + 1)
+                    print("Warning: Could not find headline for news item", len(items) + 1)
                     continue
                 
                 # Find stock details with flexible class matching
@@ -272,79 +260,97 @@ def get_key_stocks_to_watch():
                     stock_name = ""
                     price_change = ""
                 
-                news_count += 1  # Increment counter for unique news
-                
-                # Add numbered headline
-                p_headline = document.add_paragraph()
-                p_headline.paragraph_format.left_indent = Inches(0.25)
-                p_headline.paragraph_format.first_line_indent = Inches(-0.25)
-                p_headline.paragraph_format.space_before = Pt(12)
-                p_headline.paragraph_format.space_after = Pt(6)
-
-                number_run = p_headline.add_run(f"{news_count}. ")
-                number_run.bold = True
-                number_run.font.size = Pt(12)
-                
-                headline_run = p_headline.add_run(f"{headline}")
-                headline_run.bold = True
-                headline_run.font.size = Pt(12)
-                
-                # Add source and time with proper spacing
-                p_source = document.add_paragraph()
-                p_source.paragraph_format.left_indent = Inches(0.5)
-                p_source.paragraph_format.space_before = Pt(3)
-                p_source.paragraph_format.space_after = Pt(3)
-                source_run = p_source.add_run(f"{source} • {timestamp}")
-                source_run.italic = True
-                source_run.font.size = Pt(10)
-                source_run.font.color.rgb = RGBColor(89, 89, 89)
-                
-                # Add stock details if available
-                if stock_name:
-                    p_stock = document.add_paragraph()
-                    p_stock.paragraph_format.left_indent = Inches(0.5)
-                    p_stock.paragraph_format.space_before = Pt(3)
-                    p_stock.paragraph_format.space_after = Pt(12)
-                    stock_run = p_stock.add_run(f"{stock_name} ({price_change})")
-                    stock_run.bold = True
-                    stock_run.font.size = Pt(11)
-                    if price_change.startswith('+'):
-                        stock_run.font.color.rgb = RGBColor(0, 128, 0)  # Green
-                    elif price_change.startswith('-'):
-                        stock_run.font.color.rgb = RGBColor(255, 0, 0)  # Red
-                else:
-                    # Add extra space after source if no stock details
-                    p_source.paragraph_format.space_after = Pt(12)
+                items.append({
+                    "headline": headline,
+                    "source": source,
+                    "timestamp": timestamp,
+                    "stock": stock_name,
+                    "price_change": price_change,
+                })
                 
             except Exception as e:
-                print(f"Error processing news item {news_count + 1}: {e}")
+                print(f"Error processing news item {len(items) + 1}: {e}")
                 continue
 
-        try:
-            document.save(output_file)
-            print(f"Stock News Bulletin created successfully ({news_count} items included, {skipped_count} duplicates skipped).")
-        except Exception as e:
-            print(f"Error saving document: {e}")
-            return False
-        try:
-            if driver:
-                driver.close()
-                driver.quit()
-                print("Browser closed successfully")
-                print("Function 8 - Key Stocks - Successful")
-        except Exception as e:
-            print(f"Warning: Could not close browser cleanly - {e}")
-        return True
+        page.close()
+        print("Browser closed successfully")
+        print(f"Collected {len(items)} stock news items ({skipped_count} duplicates skipped).")
+        print("Function 8 - Key Stocks - Successful")
+        return SectionResult("key_stocks", data={"items": items, "skipped": skipped_count})
 
     except Exception as e:
         print(f"An error occurred: {e}")
         print("Function 8 - Key Stocks - Not Successful")
-        if 'driver' in locals():
-            driver.quit()
-        return False
+        if page:
+            page.close()
+        return failed("key_stocks", e)
+
+def write_key_stocks(result, output_dir):
+    """Renders the Key Stocks to Watch document"""
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+
+    document = Document()
+    
+    # Add title
+    title_paragraph = document.add_paragraph()
+    title_run = title_paragraph.add_run(" Key Stocks to Watch ")
+    font = title_run.font
+    font.name = 'Arial Black'
+    font.size = Pt(20)
+    font.color.rgb = RGBColor(255, 255, 255)  # White text color
+    add_shading_to_paragraph(title_paragraph, color="000000")
+    document.add_paragraph()
+
+    for news_count, item in enumerate(result.data['items'], 1):
+        # Add numbered headline
+        p_headline = document.add_paragraph()
+        p_headline.paragraph_format.left_indent = Inches(0.25)
+        p_headline.paragraph_format.first_line_indent = Inches(-0.25)
+        p_headline.paragraph_format.space_before = Pt(12)
+        p_headline.paragraph_format.space_after = Pt(6)
+
+        number_run = p_headline.add_run(f"{news_count}. ")
+        number_run.bold = True
+        number_run.font.size = Pt(12)
+        
+        headline_run = p_headline.add_run(f"{item['headline']}")
+        headline_run.bold = True
+        headline_run.font.size = Pt(12)
+        
+        # Add source and time with proper spacing
+        p_source = document.add_paragraph()
+        p_source.paragraph_format.left_indent = Inches(0.5)
+        p_source.paragraph_format.space_before = Pt(3)
+        p_source.paragraph_format.space_after = Pt(3)
+        source_run = p_source.add_run(f"{item['source']} • {item['timestamp']}")
+        source_run.italic = True
+        source_run.font.size = Pt(10)
+        source_run.font.color.rgb = RGBColor(89, 89, 89)
+        
+        # Add stock details if available
+        if item['stock']:
+            p_stock = document.add_paragraph()
+            p_stock.paragraph_format.left_indent = Inches(0.5)
+            p_stock.paragraph_format.space_before = Pt(3)
+            p_stock.paragraph_format.space_after = Pt(12)
+            stock_run = p_stock.add_run(f"{item['stock']} ({item['price_change']})")
+            stock_run.bold = True
+            stock_run.font.size = Pt(11)
+            if item['price_change'].startswith('+'):
+                stock_run.font.color.rgb = RGBColor(0, 128, 0)  # Green
+            elif item['price_change'].startswith('-'):
+                stock_run.font.color.rgb = RGBColor(255, 0, 0)  # Red
+        else:
+            # Add extra space after source if no stock details
+            p_source.paragraph_format.space_after = Pt(12)
 
-def get_nifty_summary():
+    document.save(os.path.join(output_dir, "Key_Stocks_to_Watch.docx"))
+
+def get_nifty_summary(ctx=None):
     """Generate NIFTY50 Summary Report"""
+    import yfinance as yf
+
     try:
         # Original print statements commented out
         # print("Fetching enhanced Nifty 50 data...")
@@ -355,7 +361,7 @@ def get_nifty_summary():
 
         if hist_1y.empty or hist_2d.empty:
             # print("Could not download data. Check ticker or internet connection.")
-            return False
+            return failed("summary", "no data downloaded")
 
         latest_day = hist_2d.iloc[-1]
         prev_day = hist_2d.iloc[-2]
@@ -373,649 +379,389 @@ def get_nifty_summary():
         data['change'] = data['current_price'] - data['prev_close']
         data['change_percent'] = (data['change'] / data['prev_close']) * 100
 
-        # Generate PDF report
-        pdf_file = os.path.join("CodeOutput", "Market_Report_Dashboard_Nifty50.pdf")
-        c = canvas.Canvas(pdf_file, pagesize=(8.5*inch, 5*inch))
-        width, height = (8.5*inch, 5*inch)
+        print("Function 1 - NIFTY50 Summary - Successful")
+        return SectionResult("summary", data={key: float(value) for key, value in data.items()})
+
+    except Exception as e:
+        print("Function 1 - NIFTY50 Summary - Not Successful")
+        return failed("summary", e)
+
+def write_nifty_summary(result, output_dir):
+    """Renders the NIFTY50 summary dashboard PDF"""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
+    from reportlab.lib.colors import HexColor, black, grey, white, lightgrey
+
+    data = result.data
+    pdf_file = os.path.join(output_dir, "Market_Report_Dashboard_Nifty50.pdf")
+    c = canvas.Canvas(pdf_file, pagesize=(8.5*inch, 5*inch))
+    width, height = (8.5*inch, 5*inch)
 
-        color_indigo = HexColor("#4f46e5")
-        color_green = HexColor("#16a34a")
-        color_red = HexColor("#dc2626")
+    color_indigo = HexColor("#4f46e5")
+    color_green = HexColor("#16a34a")
+    color_red = HexColor("#dc2626")
 
-        c.setFont("Helvetica-Bold", 18)
+    c.setFont("Helvetica-Bold", 18)
+    c.setFillColor(black)
+    c.drawString(0.5 * inch, height - 0.7 * inch, "NIFTY 50")
+
+    c.setFont("Helvetica-Bold", 42)
+    c.drawString(0.5 * inch, height - 1.3 * inch, f"{data['current_price']:,.2f}")
+
+    x_change = 3.5 * inch
+    y_change = height - 1.2 * inch
+    
+    if data['change'] >= 0:
+        c.setFillColor(color_green)
+        change_text = f"▲ {data['change']:.2f} ({data['change_percent']:.2f}%)"
+    else:
+        c.setFillColor(color_red)
+        change_text = f"▼ {abs(data['change']):.2f} ({abs(data['change_percent']):.2f}%)"
+    
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(x_change, y_change, change_text)
+    
+    y_grid = height - 2.1 * inch
+    
+    # Helper function for drawing data points
+    def draw_data_point(c, x, y, label, value, value_color):
+        c.setFont("Helvetica", 9)
+        c.setFillColor(grey)
+        c.drawString(x, y, label)
+        c.setFont("Helvetica-Bold", 14)
+        c.setFillColor(value_color)
+        c.drawString(x, y - 18, value)
+
+    draw_data_point(c, 0.5 * inch, y_grid, "Prev. Close", f"{data['prev_close']:,.2f}", color_indigo)
+    draw_data_point(c, 2.2 * inch, y_grid, "Open", f"{data['open']:,.2f}", color_indigo)
+    draw_data_point(c, 3.9 * inch, y_grid, "Volume (Lakhs)", f"{data['volume_lakhs']:,.2f}", color_indigo)
+
+    def draw_slider_refined(c, x, y, width, height, label, low_val, high_val, current_val):
+        c.saveState()
+        c.setFont("Helvetica-Bold", 14)
         c.setFillColor(black)
-        c.drawString(0.5 * inch, height - 0.7 * inch, "NIFTY 50")
+        c.drawString(x, y, label)
 
-        c.setFont("Helvetica-Bold", 42)
-        c.drawString(0.5 * inch, height - 1.3 * inch, f"{data['current_price']:,.2f}")
+        y_bar = y - 35
+        bar_radius = height / 2
 
-        x_change = 3.5 * inch
-        y_change = height - 1.2 * inch
-        
-        if data['change'] >= 0:
-            c.setFillColor(color_green)
-            change_text = f"▲ {data['change']:.2f} ({data['change_percent']:.2f}%)"
-        else:
-            c.setFillColor(color_red)
-            change_text = f"▼ {abs(data['change']):.2f} ({abs(data['change_percent']):.2f}%)"
-        
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(x_change, y_change, change_text)
-        
-        y_grid = height - 2.1 * inch
-        
-        # Helper function for drawing data points
-        def draw_data_point(c, x, y, label, value, value_color):
-            c.setFont("Helvetica", 9)
-            c.setFillColor(grey)
-            c.drawString(x, y, label)
-            c.setFont("Helvetica-Bold", 14)
-            c.setFillColor(value_color)
-            c.drawString(x, y - 18, value)
-
-        draw_data_point(c, 0.5 * inch, y_grid, "Prev. Close", f"{data['prev_close']:,.2f}", color_indigo)
-        draw_data_point(c, 2.2 * inch, y_grid, "Open", f"{data['open']:,.2f}", color_indigo)
-        draw_data_point(c, 3.9 * inch, y_grid, "Volume (Lakhs)", f"{data['volume_lakhs']:,.2f}", color_indigo)
-
-        def draw_slider_refined(c, x, y, width, height, label, low_val, high_val, current_val):
-            c.saveState()
-            c.setFont("Helvetica-Bold", 14)
-            c.setFillColor(black)
-            c.drawString(x, y, label)
-
-            y_bar = y - 35
-            bar_radius = height / 2
-
-            path = c.beginPath()
-            path.roundRect(x, y_bar - bar_radius, width, height, bar_radius)
-            c.clipPath(path, stroke=0, fill=0)
-            c.linearGradient(x, y_bar, x + width, y_bar, (HexColor("#d90429"), HexColor("#f8b24f"), HexColor("#8ac926")), extend=False)
-
-            c.restoreState()
-
-            range_val = high_val - low_val
-            position_ratio = (current_val - low_val) / range_val if range_val != 0 else 0.5
-            position_ratio = max(0, min(1, position_ratio))
-            marker_x = x + width * position_ratio
-
-            label_text = f"{current_val:,.2f}"
-            label_width = c.stringWidth(label_text, "Helvetica", 9) + 10
-            label_height = 14
-            label_x = marker_x - (label_width / 2)
-            label_y = y_bar + 10
-
-            c.setFillColor(white)
-            c.setStrokeColor(lightgrey)
-            c.roundRect(label_x, label_y, label_width, label_height, label_height/2, stroke=1, fill=1)
-            
-            c.setFillColor(black)
-            c.setFont("Helvetica", 9)
-            c.drawCentredString(marker_x, label_y + 4, label_text)
-
-            c.setFillColor(white)
-            c.setStrokeColor(grey)
-            c.setLineWidth(1)
-            c.circle(marker_x, y_bar, 6, stroke=1, fill=1)
-
-            y_lowhigh = y_bar - 25
-            c.setFont("Helvetica", 9)
-            c.setFillColor(grey)
-            c.drawString(x, y_lowhigh, "Low")
-            c.drawRightString(x + width, y_lowhigh, "High")
-
-            c.setFont("Helvetica", 12)
-            c.setFillColor(black)
-            c.drawString(x, y_lowhigh - 15, f"{low_val:,.2f}")
-            c.drawRightString(x + width, y_lowhigh - 15, f"{high_val:,.2f}")
-
-        slider_y = height - 3.2 * inch
-        slider_width = 3.5 * inch
-        slider_height = 10
-
-        draw_slider_refined(c, 0.5 * inch, slider_y, slider_width, slider_height, "52 Week",
-                    data['fifty_two_week_low'], data['fifty_two_week_high'], data['current_price'])
-        
-        draw_slider_refined(c, 4.5 * inch, slider_y, slider_width, slider_height, "Intraday",
-                    data['intraday_low'], data['intraday_high'], data['current_price'])
+        path = c.beginPath()
+        path.roundRect(x, y_bar - bar_radius, width, height, bar_radius)
+        c.clipPath(path, stroke=0, fill=0)
+        c.linearGradient(x, y_bar, x + width, y_bar, (HexColor("#d90429"), HexColor("#f8b24f"), HexColor("#8ac926")), extend=False)
 
-        c.save()
-        
-        print("Function 1 - NIFTY50 Summary - Successful")
-        return True
+        c.restoreState()
 
-    except Exception as e:
-        print("Function 1 - NIFTY50 Summary - Not Successful")
-        return False
+        range_val = high_val - low_val
+        position_ratio = (current_val - low_val) / range_val if range_val != 0 else 0.5
+        position_ratio = max(0, min(1, position_ratio))
+        marker_x = x + width * position_ratio
 
-def get_sgx_nifty():
-    """Generate SGX Nifty Analysis"""
-    try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1280,1000")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        url = 'https://sgxnifty.org/'
-        driver.get(url)
-        
-        wait = WebDriverWait(driver, 30)
-        
-        # Find the main container
-        container_selector = ".grid.col-940.align-center"
-        container_element = wait.until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, container_selector))
-        )
-        time.sleep(2)  # Allow dynamic values to load
-
-        # Take screenshot
-        screenshot_data = container_element.screenshot_as_png
-
-        # Find tables for cropping
-        tables = container_element.find_elements(By.CLASS_NAME, "main-table-div")
-        if len(tables) < 2:
-            return False
-            
-        last_element_to_keep = tables[1]
-        crop_height = last_element_to_keep.location['y'] + last_element_to_keep.size['height'] - 130
+        label_text = f"{current_val:,.2f}"
+        label_width = c.stringWidth(label_text, "Helvetica", 9) + 10
+        label_height = 14
+        label_x = marker_x - (label_width / 2)
+        label_y = y_bar + 10
+
+        c.setFillColor(white)
+        c.setStrokeColor(lightgrey)
+        c.roundRect(label_x, label_y, label_width, label_height, label_height/2, stroke=1, fill=1)
         
-        # Process and save image
-        img = Image.open(io.BytesIO(screenshot_data))
-        crop_box = (0, 0, img.width, crop_height)
-        cropped_img = img.crop(crop_box)
+        c.setFillColor(black)
+        c.setFont("Helvetica", 9)
+        c.drawCentredString(marker_x, label_y + 4, label_text)
 
-        output_file = os.path.join("CodeOutput", "sgx_nifty.png")
-        cropped_img.save(output_file, "PNG")
+        c.setFillColor(white)
+        c.setStrokeColor(grey)
+        c.setLineWidth(1)
+        c.circle(marker_x, y_bar, 6, stroke=1, fill=1)
 
-        driver.quit()
-        
-        print("Function 11 - SGX Nifty Analysis - Successful")
-        return True
+        y_lowhigh = y_bar - 25
+        c.setFont("Helvetica", 9)
+        c.setFillColor(grey)
+        c.drawString(x, y_lowhigh, "Low")
+        c.drawRightString(x + width, y_lowhigh, "High")
 
-    except Exception as e:
+        c.setFont("Helvetica", 12)
+        c.setFillColor(black)
+        c.drawString(x, y_lowhigh - 15, f"{low_val:,.2f}")
+        c.drawRightString(x + width, y_lowhigh - 15, f"{high_val:,.2f}")
+
+    slider_y = height - 3.2 * inch
+    slider_width = 3.5 * inch
+    slider_height = 10
+
+    draw_slider_refined(c, 0.5 * inch, slider_y, slider_width, slider_height, "52 Week",
+                data['fifty_two_week_low'], data['fifty_two_week_high'], data['current_price'])
+    
+    draw_slider_refined(c, 4.5 * inch, slider_y, slider_width, slider_height, "Intraday",
+                data['intraday_low'], data['intraday_high'], data['current_price'])
+
+    c.save()
+
+def get_sgx_nifty(ctx=None):
+    """Generate SGX Nifty Analysis"""
+    import sgx
+
+    ctx = ctx or default_context()
+    png = sgx.capture_sgx_nifty_png(ctx)
+    if png is None:
         print("Function 11 - SGX Nifty Analysis - Not Successful")
-        if 'driver' in locals():
-            driver.quit()
-        return False
+        return failed("sgx", "no snapshot captured")
+    print("Function 11 - SGX Nifty Analysis - Successful")
+    return SectionResult("sgx", images={"sgx_nifty.png": png})
 
-def get_silver_rates():
+def get_silver_rates(ctx=None):
     """Generate Silver Rates Analysis"""
+    import silver
+
+    ctx = ctx or default_context()
     try:
-        url = 'https://www.goodreturns.in/silver-rates/chennai.html'
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        data = silver.get_chennai_silver_rates(ctx)
+        if not data:
+            return failed("silver", "no data")
+
+        print("Function 14 - Silver Rates Analysis - Successful")
+        return SectionResult("silver", data=data)
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+    except Exception as e:
+        print("Function 14 - Silver Rates Analysis - Not Successful")
+        return failed("silver", e)
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+def write_silver_rates(result, output_dir):
+    """Writes the silver rate report"""
+    today_per_gram = result.data['today_per_gram']
+    today_per_kg = result.data['today_per_kg']
+    historical_data = result.data['last_10_days']
+
+    # Save to file
+    output_file = os.path.join(output_dir, "silver_rates.txt")
+    with open(output_file, 'w') as f:
+        f.write("CHENNAI SILVER RATE REPORT\n")
+        f.write("=" * 60 + "\n\n")
         
-        # Get Today's Silver Prices
-        price_container = soup.find('div', class_='gold-rate-container')
-        if not price_container:
-            return False
+        f.write("[Today's Silver Rate]\n")
+        f.write("-" * 60 + "\n")
         
-        todays_rates_divs = price_container.find_all('div', class_='gold-each-container')
-        if len(todays_rates_divs) < 2:
-            return False
-
-        def parse_price_box(box):
-            bottom_div = box.find('div', class_='gold-bottom')
-            p_tags = bottom_div.find_all('p')
-            price_str = p_tags[0].text if len(p_tags) > 0 else "0"
-            change_str = p_tags[1].text if len(p_tags) > 1 else "0"
-            price = float(re.sub(r'[₹,]', '', price_str))
-            change_val = float(re.sub(r'[₹,+-]', '', change_str))
-            if '-' in change_str:
-                change_val = -change_val
-            return {"price": price, "change": change_val}
-
-        today_per_gram = parse_price_box(todays_rates_divs[0])
-        today_per_kg = parse_price_box(todays_rates_divs[1])
-
-        # Get Historical Data
-        all_tables = soup.find_all('table')
-        history_table = None
+        price_g = today_per_gram['price']
+        change_g = today_per_gram['change']
+        arrow_g = "▲" if change_g >= 0 else "▼"
+        f.write(f"Per Gram: ₹{price_g:,.2f} (Change: ₹{abs(change_g):.2f} {arrow_g})\n")
         
-        for table in all_tables:
-            headers = [th.get_text(strip=True) for th in table.find_all('th')]
-            if headers == ['Date', '10 gram', '100 gram', '1 Kg']:
-                history_table = table
-                break
+        price_kg = today_per_kg['price']
+        change_kg = today_per_kg['change']
+        arrow_kg = "▲" if change_kg >= 0 else "▼"
+        f.write(f"Per Kg:   ₹{price_kg:,.0f} (Change: ₹{abs(change_kg):,.0f} {arrow_kg})\n\n")
         
-        if not history_table:
-            return False
-            
-        history_rows = history_table.find('tbody').find_all('tr')
+        f.write("[Silver Rate in Chennai for Last 10 Days]\n")
+        header = f"{'Date':<15} | {'10 gram':<15} | {'100 gram':<15} | {'1 Kg'}"
+        f.write("-" * len(header) + "\n")
+        f.write(header + "\n")
+        f.write("-" * len(header) + "\n")
         
-        historical_data = []
-        for row in history_rows:
-            cols = row.find_all('td')
-            if len(cols) == 4:
-                date = cols[0].get_text(strip=True)
-                price_10g = cols[1].get_text(strip=True)
-                price_100g = cols[2].get_text(strip=True)
-                price_1kg_full = ' '.join(cols[3].text.split())
-
-                historical_data.append({
-                    "date": date,
-                    "price_10g": price_10g,
-                    "price_100g": price_100g,
-                    "price_1kg": price_1kg_full
-                })
-
-        # Save to file
-        output_file = os.path.join("CodeOutput", "silver_rates.txt")
-        with open(output_file, 'w') as f:
-            f.write("CHENNAI SILVER RATE REPORT\n")
-            f.write("=" * 60 + "\n\n")
-            
-            f.write("[Today's Silver Rate]\n")
-            f.write("-" * 60 + "\n")
-            
-            price_g = today_per_gram['price']
-            change_g = today_per_gram['change']
-            arrow_g = "▲" if change_g >= 0 else "▼"
-            f.write(f"Per Gram: ₹{price_g:,.2f} (Change: ₹{abs(change_g):.2f} {arrow_g})\n")
-            
-            price_kg = today_per_kg['price']
-            change_kg = today_per_kg['change']
-            arrow_kg = "▲" if change_kg >= 0 else "▼"
-            f.write(f"Per Kg:   ₹{price_kg:,.0f} (Change: ₹{abs(change_kg):,.0f} {arrow_kg})\n\n")
-            
-            f.write("[Silver Rate in Chennai for Last 10 Days]\n")
-            header = f"{'Date':<15} | {'10 gram':<15} | {'100 gram':<15} | {'1 Kg'}"
-            f.write("-" * len(header) + "\n")
-            f.write(header + "\n")
-            f.write("-" * len(header) + "\n")
-            
-            for record in historical_data:
-                f.write(f"{record['date']:<15} | {record['price_10g']:<15} | {record['price_100g']:<15} | {record['price_1kg']}\n")
-            
-            f.write("-" * len(header) + "\n")
-
-        print("Function 14 - Silver Rates Analysis - Successful")
-        return True
-
-    except Exception as e:
-        print("Function 14 - Silver Rates Analysis - Not Successful")
-        return False
+        for record in historical_data:
+            f.write(f"{record['date']:<15} | {record['price_10g']:<15} | {record['price_100g']:<15} | {record['price_1kg']}\n")
+        
+        f.write("-" * len(header) + "\n")
 
-def get_fii_dii_data():
+def get_fii_dii_data(ctx=None):
     """Generate FII/DII Analysis Report"""
-    try:
-        def arrow(val: float) -> str:
-            return f"{val:,.2f} {'🟢↑' if val >= 0 else '🔴↓'}"
-
-        # Fetch data from website
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Connection": "keep-alive",
-        }
+    import fii_dii_data
 
-        all_data = []
-        max_pages = 4
-        page = 1
-
-        while page <= max_pages:
-            url = "https://groww.in/fii-dii-data" if page == 1 else f"https://groww.in/fii-dii-data?page={page}"
-            resp = requests.get(url, headers=headers, timeout=10)
-            resp.raise_for_status()
-            
-            soup = BeautifulSoup(resp.text, "html.parser")
-            table = soup.find("table")
-            if not table:
-                break
-            
-            rows = table.select("tbody tr")
-            for row in rows:
-                cols = [td.get_text(strip=True).replace(",", "") for td in row.find_all("td")]
-                if len(cols) >= 7:
-                    date_str = cols[0]
-                    fii_net = float(cols[3].replace("+", "").replace("−", "-").replace("–", "-"))
-                    dii_net = float(cols[6].replace("+", "").replace("−", "-").replace("–", "-"))
-                    parsed_date = datetime.strptime(date_str, "%d %b %Y")
-                    all_data.append((parsed_date, fii_net, dii_net))
-            page += 1
-
-        if not all_data:
-            return False
-
-        df = pd.DataFrame(all_data, columns=["Date", "FII_Net", "DII_Net"])
-        df = df.drop_duplicates(subset=['Date'], keep='first')
-        df = df.sort_values("Date", ascending=False).reset_index(drop=True)
-
-        results = []
-
-        # Last 3 individual days
-        for i in range(3):
-            row = df.iloc[i]
-            date_label = row['Date'].strftime("%d-%m-%Y")
-            results.append({
-                "Date": date_label,
-                "FII": arrow(row['FII_Net']),
-                "DII": arrow(row['DII_Net'])
-            })
-
-        # Last 7 days cumulative
-        last_7 = df.head(7)
-        results.append({
-            "Date": "Last 7 Days",
-            "FII": arrow(last_7['FII_Net'].sum()),
-            "DII": arrow(last_7['DII_Net'].sum())
-        })
-
-        # Last 10 days cumulative
-        last_10 = df.head(10)
-        results.append({
-            "Date": "Last 10 Days",
-            "FII": arrow(last_10['FII_Net'].sum()),
-            "DII": arrow(last_10['DII_Net'].sum())
-        })
-
-        # Save to file
-        output_file = os.path.join("CodeOutput", "fii_dii_data.txt")
-        with open(output_file, 'w') as f:
-            f.write("FII/DII ACTIVITY SUMMARY\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for row in results:
-                f.write(f"{row['Date']:<12}: ")
-                f.write(f"FII = {row['FII']:<30} ")
-                f.write(f"DII = {row['DII']}\n")
-            
-            f.write("\nNote: Values in Crores (₹)")
+    ctx = ctx or default_context()
+    try:
+        results = fii_dii_data.generate_fii_dii_summary(ctx)
+        if not results:
+            return failed("fii_dii", "no data")
 
         print("Function 10 - FII/DII Analysis - Successful")
-        return True
+        return SectionResult("fii_dii", data={"rows": results})
 
     except Exception as e:
         print("Function 10 - FII/DII Analysis - Not Successful")
-        return False
+        return failed("fii_dii", e)
 
-def get_gold_rates():
-    """Generate Gold Rates Analysis"""
-    try:
-        url = 'https://www.goodreturns.in/gold-rates/chennai.html'
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+def write_fii_dii_data(result, output_dir):
+    """Writes the FII/DII activity summary"""
+    results = result.data['rows']
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
+    # Save to file
+    output_file = os.path.join(output_dir, "fii_dii_data.txt")
+    with open(output_file, 'w') as f:
+        f.write("FII/DII ACTIVITY SUMMARY\n")
+        f.write("=" * 80 + "\n\n")
         
-        # Get Today's Gold Prices
-        price_container = soup.find('div', class_='gold-rate-container')
-        if not price_container:
-            return False
+        for row in results:
+            f.write(f"{row['Date']:<12}: ")
+            f.write(f"FII = {row['FII']:<30} ")
+            f.write(f"DII = {row['DII']}\n")
         
-        todays_rates_divs = price_container.find_all('div', class_='gold-each-container')
-        if len(todays_rates_divs) < 2:
-            return False
-
-        def parse_price_box(box):
-            bottom_div = box.find('div', class_='gold-bottom')
-            p_tags = bottom_div.find_all('p')
-            price_str = p_tags[0].text if len(p_tags) > 0 else "0"
-            change_str = p_tags[1].text if len(p_tags) > 1 else "0"
-            price = float(re.sub(r'[₹,]', '', price_str))
-            try:
-                change_str = re.sub(r'[₹,]', '', change_str).strip()
-                change_str = ''.join(change_str.split())
-                if change_str.startswith('+'):
-                    change_str = change_str[1:]
-                elif change_str.startswith('- ') or change_str.startswith('-'):
-                    change_str = f"-{change_str.replace('-', '').strip()}"
-                change = float(change_str)
-            except ValueError:
-                change = 0.0
-            return {"price": price, "change": change}
-
-        today_24k = parse_price_box(todays_rates_divs[0])
-        today_22k = parse_price_box(todays_rates_divs[1])
-
-        # Get Historical Data
-        tables = soup.find_all('table')
-        history_table = None
-        for table in tables:
-            headers = [th.get_text(strip=True) for th in table.find_all('th')]
-            if 'Date' in headers and '24K' in headers and '22K' in headers:
-                history_table = table
-                break
-        
-        if not history_table:
-            return False
-            
-        history_rows = history_table.find_all('tr')
-        if history_rows[0].find('th'):
-            history_rows = history_rows[1:]
-        
-        historical_data = []
-        for row in history_rows:
-            cols = row.find_all('td')
-            if len(cols) == 3:
-                date = cols[0].text.strip()
-                
-                # 24K data
-                td_24k = cols[1]
-                price_24k = td_24k.get_text(strip=True).split('(')[0].strip()
-                change_span_24k = td_24k.find('span')
-                change_24k = ""
-                change_color_24k = ""
-                if change_span_24k:
-                    change_text = change_span_24k.text.strip()
-                    change_24k = change_text.strip('()')
-                    change_24k = change_24k.replace('+', '')
-                    if 'green-span' in change_span_24k.get('class', []):
-                        change_color_24k = 'green'
-                    elif 'red-span' in change_span_24k.get('class', []):
-                        change_color_24k = 'red'
-                
-                # 22K data
-                td_22k = cols[2]
-                price_22k = td_22k.get_text(strip=True).split('(')[0].strip()
-                change_span_22k = td_22k.find('span')
-                change_22k = ""
-                change_color_22k = ""
-                if change_span_22k:
-                    change_text = change_span_22k.text.strip()
-                    change_22k = change_text.strip('()')
-                    change_22k = change_22k.replace('+', '')
-                    if 'green-span' in change_span_22k.get('class', []):
-                        change_color_22k = 'green'
-                    elif 'red-span' in change_span_22k.get('class', []):
-                        change_color_22k = 'red'
-                
-                if date and price_24k and price_22k:
-                    historical_data.append({
-                        "date": date,
-                        "price_24k": price_24k,
-                        "change_24k": change_24k,
-                        "change_color_24k": change_color_24k,
-                        "price_22k": price_22k,
-                        "change_22k": change_22k,
-                        "change_color_22k": change_color_22k
-                    })
-
-        # Save to file
-        output_file = os.path.join("CodeOutput", "gold_rates.txt")
-        with open(output_file, 'w') as f:
-            f.write("CHENNAI GOLD RATE REPORT\n")
-            f.write("=" * 60 + "\n\n")
-            
-            f.write("[Today's Gold Rate (per gram)]\n")
-            f.write("-" * 60 + "\n")
-            price_24k = today_24k['price']
-            change_24k = today_24k['change']
-            arrow_24k = "▲" if change_24k >= 0 else "▼"
-            f.write(f"24K Gold: ₹{price_24k:,.0f} (Change: ₹{abs(change_24k):.0f} {arrow_24k})\n")
-            
-            price_22k = today_22k['price']
-            change_22k = today_22k['change']
-            arrow_22k = "▲" if change_22k >= 0 else "▼"
-            f.write(f"22K Gold: ₹{price_22k:,.0f} (Change: ₹{abs(change_22k):.0f} {arrow_22k})\n\n")
-            
-            f.write("[Gold Rate in Chennai for Last 10 Days (1 gram)]\n")
-            f.write("-" * 104 + "\n")
-            f.write(f"{'Date':<16} | {'24K Price':<42} | {'22K Price':<42}\n")
-            f.write("-" * 104 + "\n")
-            
-            for record in historical_data:
-                price_24k_text = f"{record['price_24k']}  ({record['change_24k']})"
-                price_22k_text = f"{record['price_22k']}  ({record['change_22k']})"
-                f.write(f"{record['date']:<16} | {price_24k_text:<42} | {price_22k_text:<42}\n")
-            
-            f.write("-" * 104 + "\n")
+        f.write("\nNote: Values in Crores (₹)")
+
+def get_gold_rates(ctx=None):
+    """Generate Gold Rates Analysis"""
+    import gold
+
+    ctx = ctx or default_context()
+    try:
+        data = gold.get_chennai_gold_rates(ctx)
+        if not data:
+            return failed("gold", "no data")
 
         print("Function 13 - Gold Rates Analysis - Successful")
-        return True
+        return SectionResult("gold", data=data)
 
     except Exception as e:
         print("Function 13 - Gold Rates Analysis - Not Successful")
-        return False
-
-def get_currency_rates():
+        return failed("gold", e)
+
+def write_gold_rates(result, output_dir):
+    """Writes the gold rate report"""
+    today_24k = result.data['today_24k']
+    today_22k = result.data['today_22k']
+    historical_data = result.data['last_10_days']
+
+    # Save to file
+    output_file = os.path.join(output_dir, "gold_rates.txt")
+    with open(output_file, 'w') as f:
+        f.write("CHENNAI GOLD RATE REPORT\n")
+        f.write("=" * 60 + "\n\n")
+        
+        f.write("[Today's Gold Rate (per gram)]\n")
+        f.write("-" * 60 + "\n")
+        price_24k = today_24k['price']
+        change_24k = today_24k['change']
+        arrow_24k = "▲" if change_24k >= 0 else "▼"
+        f.write(f"24K Gold: ₹{price_24k:,.0f} (Change: ₹{abs(change_24k):.0f} {arrow_24k})\n")
+        
+        price_22k = today_22k['price']
+        change_22k = today_22k['change']
+        arrow_22k = "▲" if change_22k >= 0 else "▼"
+        f.write(f"22K Gold: ₹{price_22k:,.0f} (Change: ₹{abs(change_22k):.0f} {arrow_22k})\n\n")
+        
+        f.write("[Gold Rate in Chennai for Last 10 Days (1 gram)]\n")
+        f.write("-" * 104 + "\n")
+        f.write(f"{'Date':<16} | {'24K Price':<42} | {'22K Price':<42}\n")
+        f.write("-" * 104 + "\n")
+        
+        for record in historical_data:
+            price_24k_text = f"{record['price_24k']}  ({record['change_24k']})"
+            price_22k_text = f"{record['price_22k']}  ({record['change_22k']})"
+            f.write(f"{record['date']:<16} | {price_24k_text:<42} | {price_22k_text:<42}\n")
+        
+        f.write("-" * 104 + "\n")
+
+def get_currency_rates(ctx=None):
     """Generate Currency Exchange Rates Analysis"""
-    try:
-        currencies = {
-            "USD": {"name": "US Dollar", "country": "United States", "ticker": "USDINR=X"},
-            "EUR": {"name": "Euro", "country": "Eurozone", "ticker": "EURINR=X"},
-            "GBP": {"name": "British Pound", "country": "United Kingdom", "ticker": "GBPINR=X"},
-            "SGD": {"name": "Singapore Dollar", "country": "Singapore", "ticker": "SGDINR=X"},
-            "JPY": {"name": "Japanese Yen", "country": "Japan", "ticker": "JPYINR=X"},
-            "AED": {"name": "UAE Dirham", "country": "U.A.E.", "ticker": "AEDINR=X"},
-        }
-        
-        results = []
-        
-        for code, details in currencies.items():
-            ticker = yf.Ticker(details['ticker'])
-            info = ticker.info
-            
-            value = info.get('regularMarketPrice') or info.get('previousClose')
-            
-            if value is None:
-                continue
-
-            results.append({
-                "Code": code,
-                "Name": details['name'],
-                "Country": details['country'],
-                "Value": value
-            })
+    import currency as currency_source
 
+    ctx = ctx or default_context()
+    try:
+        results = currency_source.get_currency_exchange_rates(ctx)
         if not results:
-            return False
-
-        # Save to file
-        output_file = os.path.join("CodeOutput", "currency_rates.txt")
-        with open(output_file, 'w') as f:
-            f.write("POPULAR CURRENCIES vs. INR\n")
-            f.write("=" * 70 + "\n\n")
-            f.write(f"{'Code':<5} | {'Country':<25} | {'Value (1 unit in INR)'}\n")
-            f.write("-" * 70 + "\n")
-            
-            desired_order = ["USD", "JPY", "EUR", "SGD", "GBP", "AED"]
-            data_map = {item['Code']: item for item in results}
-            sorted_data = [data_map[code] for code in desired_order if code in data_map]
-            
-            for currency in sorted_data:
-                code_str = currency['Code']
-                country_str = currency['Country']
-                value_str = f"₹{currency['Value']:.2f}"
-                f.write(f"{code_str:<5} | {country_str:<25} | {value_str}\n")
-            
-            f.write("-" * 70)
+            return failed("currency", "no data")
 
         print("Function 15 - Currency Exchange Rates - Successful")
-        return True
+        return SectionResult("currency", data={"rates": results})
 
     except Exception as e:
         print("Function 15 - Currency Exchange Rates - Not Successful :(")
-        return False
+        return failed("currency", e)
 
-def get_global_markets():
-    """Generate Global Markets Analysis"""
-    try:
-        indices = {
-            "Dow Jones": "^DJI",
-            "S&P 500": "^GSPC",
-            "Nasdaq": "^IXIC",
-            "FTSE 100": "^FTSE",
-            "Hang Seng": "^HSI"
-        }
+def write_currency_rates(result, output_dir):
+    """Writes the currency exchange rates"""
+    results = result.data['rates']
+
+    # Save to file
+    output_file = os.path.join(output_dir, "currency_rates.txt")
+    with open(output_file, 'w') as f:
+        f.write("POPULAR CURRENCIES vs. INR\n")
+        f.write("=" * 70 + "\n\n")
+        f.write(f"{'Code':<5} | {'Country':<25} | {'Value (1 unit in INR)'}\n")
+        f.write("-" * 70 + "\n")
         
-        tickers_list = list(indices.values())
+        desired_order = ["USD", "JPY", "EUR", "SGD", "GBP", "AED"]
+        data_map = {item['Code']: item for item in results}
+        sorted_data = [data_map[code] for code in desired_order if code in data_map]
         
-        # Fetch 5 days of data to ensure we have enough history
-        data = yf.download(tickers=tickers_list, period="5d", auto_adjust=True)
-        if data.empty:
-            return False
-
-        results = []
-        ticker_to_name = {v: k for k, v in indices.items()}
+        for currency in sorted_data:
+            code_str = currency['Code']
+            country_str = currency['Country']
+            value_str = f"₹{currency['Value']:.2f}"
+            f.write(f"{code_str:<5} | {country_str:<25} | {value_str}\n")
         
-        for ticker in tickers_list:
-            ticker_data = data['Close'][ticker]
-            ticker_data_cleaned = ticker_data.dropna()
-            
-            if len(ticker_data_cleaned) < 2:
-                continue
-            
-            latest_close = ticker_data_cleaned.iloc[-1]
-            prev_close = ticker_data_cleaned.iloc[-2]
-            
-            change = latest_close - prev_close
-            change_percent = (change / prev_close) * 100
-            
-            results.append({
-                "Name": ticker_to_name[ticker],
-                "LTP": latest_close,
-                "Change": change,
-                "Change %": change_percent
-            })
+        f.write("-" * 70)
 
+def get_global_markets(ctx=None):
+    """Generate Global Markets Analysis"""
+    global_indices = importlib.import_module("global")  # 'global' is a keyword
+
+    ctx = ctx or default_context()
+    try:
+        results = global_indices.get_global_indices_data(ctx)
         if not results:
-            return False
-
-        # Save to file
-        output_file = os.path.join("CodeOutput", "global_markets.txt")
-        with open(output_file, 'w') as f:
-            f.write("KEY GLOBAL INDICES\n")
-            f.write("=" * 65 + "\n\n")
-            f.write(f"{'Name':<15} | {'LTP':>15} | {'Change':>12} | {'Change %':>12}\n")
-            f.write("-" * 65 + "\n")
-            
-            desired_order = ["Dow Jones", "Nasdaq", "S&P 500", "Hang Seng", "FTSE 100"]
-            sorted_data = sorted(results, key=lambda x: desired_order.index(x['Name']))
-            
-            for index in sorted_data:
-                ltp_str = f"{index['LTP']:,.2f}"
-                change_str = f"{index['Change']:+.2f}"
-                change_pct_str = f"{index['Change %']:+.2f}%"
-                f.write(f"{index['Name']:<15} | {ltp_str:>15} | {change_str:>12} | {change_pct_str:>12}\n")
-            
-            f.write("-" * 65)
+            return failed("global", "no data")
 
         print("Function 12 - Global Markets Analysis - Successful")
-        return True
+        return SectionResult("global", data={"indices": results})
 
     except Exception as e:
         print("Function 12 - Global Markets Analysis - Not Successful")
-        return False
-
-def get_vix_analysis():
+        return failed("global", e)
+
+def write_global_markets(result, output_dir):
+    """Writes the global indices table"""
+    results = result.data['indices']
+
+    # Save to file
+    output_file = os.path.join(output_dir, "global_markets.txt")
+    with open(output_file, 'w') as f:
+        f.write("KEY GLOBAL INDICES\n")
+        f.write("=" * 65 + "\n\n")
+        f.write(f"{'Name':<15} | {'LTP':>15} | {'Change':>12} | {'Change %':>12}\n")
+        f.write("-" * 65 + "\n")
+        
+        desired_order = ["Dow Jones", "Nasdaq", "S&P 500", "Hang Seng", "FTSE 100"]
+        sorted_data = sorted(results, key=lambda x: desired_order.index(x['Name']))
+        
+        for index in sorted_data:
+            ltp_str = f"{index['LTP']:,.2f}"
+            change_str = f"{index['Change']:+.2f}"
+            change_pct_str = f"{index['Change %']:+.2f}%"
+            f.write(f"{index['Name']:<15} | {ltp_str:>15} | {change_str:>12} | {change_pct_str:>12}\n")
+        
+        f.write("-" * 65)
+
+def _vix_result(current_value, prev_close, open_value, chart_png):
+    """The VIX section result, with the change measured from the open"""
+    change_value = current_value - open_value
+    change_percentage = (change_value / open_value) * 100
+    return SectionResult("vix", data={
+        "current": current_value,
+        "prev_close": prev_close,
+        "open": open_value,
+        "change": change_value,
+        "change_percent": change_percentage,
+    }, images={"india_vix_chart.png": chart_png})
+
+def get_vix_analysis(ctx=None):
     """Generate India VIX Analysis"""
+    import vix as vix_source
+
+    ctx = ctx or default_context()
     print("Fetching VIX data and chart...")
-    driver = None
+
+    # Values from the server-rendered page state, and a locally drawn chart
+    # when config 'vix_local_chart' asks for one
+    fast = vix_source.vix_fast_path(ctx)
+    known = fast[0] if fast is not None else None
+    if fast is not None and fast[1] is not None:
+        (current_value, prev_close, open_value), chart_png = fast
+        print(f"VIX values found - Current: {current_value}, Prev Close: {prev_close}, Open: {open_value}")
+        print("Function 9 - India VIX Analysis - Successful")
+        return _vix_result(current_value, prev_close, open_value, chart_png)
+
+    page = None
     try:
         max_retries = 3
         retry_count = 0
@@ -1025,126 +771,59 @@ def get_vix_analysis():
             try:
                 if retry_count > 0:
                     print(f"Retry attempt {retry_count} of {max_retries}...")
+                    note_retry()
                     time.sleep(retry_delay)
                     retry_delay *= 2
                 
-                if driver:
-                    try:
-                        driver.quit()
-                    except:
-                        pass
-                    driver = None
+                if page:
+                    page.close()
+                    page = None
                 
                 # Create fresh ChromeOptions for each attempt
-                options = uc.ChromeOptions()
-                options.add_argument("--headless")
-                options.add_argument("--window-size=1920,1080")
-                options.add_argument("--no-sandbox")
-                options.add_argument('--disable-dev-shm-usage')
-                options.add_argument('--disable-gpu')
-                options.add_argument('--disable-extensions')
-                options.add_argument('--disable-notifications')
-                
-                # Initialize driver with retry mechanism
-                driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-                driver.set_page_load_timeout(30)
-                driver.set_script_timeout(30)
+                page = ctx.new_page(_vix_options(), stealth=True, network_log=True, blocking="chart",
+                                    profile="groww")
+                page.set_page_load_timeout(ctx.config['page_load_timeout'])
+                page.set_script_timeout(ctx.config['page_load_timeout'])
                 
                 # Test browser is working
-                driver.get('about:blank')
-                if not driver.current_url:
+                page.navigate('about:blank')
+                if not page.url:
                     raise Exception("Browser failed to initialize properly")
                     
-                # Load VIX page
-                page_url = 'https://groww.in/indices/india-vix'
-                driver.get(page_url)
-                wait = WebDriverWait(driver, 30)
-                time.sleep(5)
-                
-                # Get VIX data
-                table_rows = driver.find_elements(By.TAG_NAME, "tr")
-                current_value = None
-                prev_close = None
-                open_value = None
-                
-                # Find VIX value
-                for row in table_rows:
-                    row_text = row.text
-                    if 'INDIA VIX' in row_text:
-                        parts = row_text.split('\n') if '\n' in row_text else row_text.split()
-                        for i, part in enumerate(parts):
-                            if part == 'INDIA VIX':
-                                current_value = float(parts[i+1])
-                                break
-                
-                # Find Prev.Close and Open values
-                all_text = driver.find_element(By.TAG_NAME, "body").text
+                # Load VIX page, recording the API responses it fetches
+                capture = page.intercept(vix_source.VIX_API_PATTERNS)
+                page.navigate(vix_source.VIX_PAGE_URL)
                 
-                prev_close_idx = all_text.find("Prev. Close")
-                if prev_close_idx != -1:
-                    lines = all_text[prev_close_idx:].split('\n')
-                    for line in lines[:3]:
-                        if line.replace('.', '').replace(',', '').strip().isdigit():
-                            prev_close = float(line.strip())
-                            break
-                
-                open_idx = all_text.find("Open")
-                if open_idx != -1:
-                    lines = all_text[open_idx:].split('\n')
-                    for line in lines[:3]:
-                        if line.replace('.', '').replace(',', '').strip().isdigit():
-                            open_value = float(line.strip())
-                            break
+                # Get VIX data, from the page's API response when possible
+                values = known or vix_source.vix_from_api(capture, ctx.config['readiness_timeout'])
+                if values is None:
+                    page.wait_for(vix_source.VIX_ROW_XPATH, xpath=True, timeout=ctx.config['readiness_timeout'],
+                                  label="vix page")
+                    values = vix_source.vix_from_dom(page)
+                current_value, prev_close, open_value = values
                 
                 if None in (current_value, prev_close, open_value):
                     raise Exception("Failed to get VIX values")
                 
                 print(f"VIX values found - Current: {current_value}, Prev Close: {prev_close}, Open: {open_value}")
                 
-                # Calculate changes
-                change_value = current_value - open_value
-                change_percentage = (change_value / open_value) * 100
-                
-                # Save VIX data to file
-                output_file = os.path.join("CodeOutput", "india_vix.txt")
-                with open(output_file, 'w') as f:
-                    f.write("INDIA VIX ANALYSIS\n")
-                    f.write("=" * 40 + "\n\n")
-                    f.write(f"Current Value:    {current_value:.2f}\n")
-                    f.write(f"Previous Close:   {prev_close:.2f}\n")
-                    f.write(f"Open:            {open_value:.2f}\n")
-                    f.write(f"Change:          {change_value:+.2f} ({change_percentage:+.2f}%)\n")
-                
                 # Capture chart
-                driver.execute_script("""
+                page.wait_for(vix_source.TIMEFRAME_XPATH, xpath=True, visible=True,
+                              timeout=ctx.config['readiness_timeout'], label="vix chart")
+                page.execute_script("""
                     document.querySelectorAll('.modal, .overlay').forEach(el => el.style.display = 'none');
                     document.documentElement.setAttribute('data-theme', 'light');
                 """)
                 
-                timeframe_buttons = driver.find_elements(By.XPATH, "//button[text()='1M']")
-                if timeframe_buttons:
-                    driver.execute_script("arguments[0].click();", timeframe_buttons[0])
-                    time.sleep(2)
-                
-                temp_screenshot = os.path.join("CodeOutput", "temp_vix.png")
-                chart_file = os.path.join("CodeOutput", "india_vix_chart.png")
+                if page.click(vix_source.TIMEFRAME_XPATH, xpath=True):
+                    page.wait_for_stable_svg(vix_source.CHART_SELECTOR, timeout=ctx.config['readiness_timeout'],
+                                             label="vix 1M chart")
                 
-                driver.save_screenshot(temp_screenshot)
+                # Capture the chart region of the page in memory
+                chart_png = page.screenshot_fraction(0.15, 0.25, 0.65, 0.80)
                 
-                img = Image.open(temp_screenshot)
-                width, height = img.size
-                
-                left = width * 0.15
-                right = width * 0.65
-                top = height * 0.25
-                bottom = height * 0.80
-                
-                chart_area = img.crop((left, top, right, bottom))
-                chart_area.save(chart_file)
-                
-                os.remove(temp_screenshot)
                 print("Function 9 - India VIX Analysis - Successful")
-                return True
+                return _vix_result(current_value, prev_close, open_value, chart_png)
                 
             except Exception as e:
                 retry_count += 1
@@ -1152,447 +831,211 @@ def get_vix_analysis():
                 if retry_count == max_retries:
                     raise
         
-        return False
+        return failed("vix")
         
     except Exception as e:
         print(f"VIX Analysis failed: {str(e)}")
-        return False
+        return failed("vix", e)
         
     finally:
-        if driver:
-            try:
-                driver.quit()
-                print("Browser closed successfully")
-            except:
-                print("Warning: Could not close browser cleanly")
-
-def get_market_news():
+        if page:
+            page.close()
+            print("Browser closed successfully")
+
+def write_vix_analysis(result, output_dir):
+    """Writes the India VIX figures"""
+    vix = result.data
+    output_file = os.path.join(output_dir, "india_vix.txt")
+    with open(output_file, 'w') as f:
+        f.write("INDIA VIX ANALYSIS\n")
+        f.write("=" * 40 + "\n\n")
+        f.write(f"Current Value:    {vix['current']:.2f}\n")
+        f.write(f"Previous Close:   {vix['prev_close']:.2f}\n")
+        f.write(f"Open:            {vix['open']:.2f}\n")
+        f.write(f"Change:          {vix['change']:+.2f} ({vix['change_percent']:+.2f}%)\n")
+
+def get_market_news(ctx=None):
     """Get Top 10 Market News"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive'
-        }
-        
-        url = "https://www.livemint.com/market/stock-market-news"
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+    import bulletin
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        headlines_items = []
-        
-        # Find all h2 headings first
-        h2_items = soup.find_all('h2', class_='headline')
-        if h2_items:
-            headlines_items.extend(h2_items)
-            
-        # Also look for article headlines in list items
-        article_items = soup.find_all('div', class_='listingNew')
-        if article_items:
-            headlines_items.extend(article_items)
-
-        if not headlines_items:
-            return False
-
-        # Create document
-        doc = Document()
-        
-        # Add title
-        title_paragraph = doc.add_paragraph()
-        title_run = title_paragraph.add_run(" Market News Bulletin ")
-        font = title_run.font
-        font.name = 'Arial Black'
-        font.size = Pt(20)
-        font.color.rgb = RGBColor(255, 255, 255)  # White text color
-        add_shading_to_paragraph(title_paragraph, color="000000")
-        doc.add_paragraph()
-
-        # Add news items
-        news_count = 0
-        for item in headlines_items[:10]:  # Only process first 10 items
-            headline_text = item.get_text(strip=True)
-            
-            if headline_text:
-                # Add numbered headline
-                p_headline = doc.add_paragraph()
-                number_run = p_headline.add_run(f"{news_count + 1}. ")
-                number_run.bold = True
-                number_run.font.size = Pt(12)
-                
-                p_headline.paragraph_format.left_indent = Inches(0.25)
-                p_headline.paragraph_format.first_line_indent = Inches(-0.25)
-                runner = p_headline.add_run(f"{headline_text}")
-                runner.bold = True
-                runner.font.size = Pt(12)
-                
-                p_headline.paragraph_format.space_before = Pt(12)
-                p_headline.paragraph_format.space_after = Pt(12)
-                
-                news_count += 1
+    ctx = ctx or default_context()
+    try:
+        headlines = bulletin.get_market_headlines(ctx)
+        if not headlines:
+            return failed("news", "no headlines found")
 
-        # Save document
-        output_file = os.path.join("CodeOutput", "Market_Bulletin.docx")
-        doc.save(output_file)
-        
         print("Function 7 - Top 10 Market News - Successful")
-        return True
+        return SectionResult("news", data={"headlines": headlines})
 
     except Exception as e:
         print("Function 7 - Top 10 Market News - Not Successful")
-        return False
+        return failed("news", e)
 
-def get_nifty_oi():
+def write_market_news(result, output_dir):
+    """Renders the Market News Bulletin document"""
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+
+    # Create document
+    doc = Document()
+    
+    # Add title
+    title_paragraph = doc.add_paragraph()
+    title_run = title_paragraph.add_run(" Market News Bulletin ")
+    font = title_run.font
+    font.name = 'Arial Black'
+    font.size = Pt(20)
+    font.color.rgb = RGBColor(255, 255, 255)  # White text color
+    add_shading_to_paragraph(title_paragraph, color="000000")
+    doc.add_paragraph()
+
+    # Add news items
+    for news_count, headline_text in enumerate(result.data['headlines']):
+        # Add numbered headline
+        p_headline = doc.add_paragraph()
+        number_run = p_headline.add_run(f"{news_count + 1}. ")
+        number_run.bold = True
+        number_run.font.size = Pt(12)
+        
+        p_headline.paragraph_format.left_indent = Inches(0.25)
+        p_headline.paragraph_format.first_line_indent = Inches(-0.25)
+        runner = p_headline.add_run(f"{headline_text}")
+        runner.bold = True
+        runner.font.size = Pt(12)
+        
+        p_headline.paragraph_format.space_before = Pt(12)
+        p_headline.paragraph_format.space_after = Pt(12)
+
+    # Save document
+    doc.save(os.path.join(output_dir, "Market_Bulletin.docx"))
+
+def get_nifty_oi(ctx=None):
     """Generate NIFTY50 Open Interest Analysis"""
+    import nifty_oi
+
+    ctx = ctx or default_context()
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1200")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        url = 'https://upstox.com/fno-discovery/open-interest-analysis/nifty-oi/'
-        driver.get(url)
+        data = nifty_oi.get_nifty_oi_data(ctx)
+        if not data:
+            print("Function 6 - NIFTY50 Open Interest Analysis - Not Successful")
+            return failed("oi", "no data")
 
-        wait = WebDriverWait(driver, 30)
-        
-        # Wait for real data
-        spot_price_xpath = "//div[p[text()='Spot']]/p[2]"
-        wait.until(
-            lambda driver: driver.find_element(By.XPATH, spot_price_xpath).text != '--/--'
-        )
-
-        # Extract data
-        summary_container = driver.find_element(By.CSS_SELECTOR, "div.gap-8.py-4")
-        data_sections = summary_container.find_elements(By.CSS_SELECTOR, "div.flex-col")
-        
-        extracted_data = {}
-        for section in data_sections:
-            p_tags = section.find_elements(By.TAG_NAME, 'p')
-            if len(p_tags) == 2:
-                label = p_tags[0].text
-                value = p_tags[1].text
-                extracted_data[label] = value
-
-        spot_price_str = extracted_data.get('Spot', '0')
-        total_calls_oi = extracted_data.get('Total Calls', '0 L')
-        total_puts_oi = extracted_data.get('Total Puts', '0 L')
-        
-        spot_price = float(spot_price_str.replace(',', ''))
-        
-        # Save OI data to file
-        output_file = os.path.join("CodeOutput", "nifty_oi.txt")
-        with open(output_file, 'w') as f:
-            f.write("NIFTY OPEN INTEREST ANALYSIS\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(f"Spot Price:      {spot_price:,.2f}\n")
-            f.write(f"Total Call OI:   {total_calls_oi}\n")
-            f.write(f"Total Put OI:    {total_puts_oi}\n")
-        
-        # Capture chart
-        chart_container_selector = "div.recharts-responsive-container"
-        chart_element = wait.until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, chart_container_selector))
-        )
-        
-        time.sleep(2)
-        
-        temp_screenshot = os.path.join("CodeOutput", "temp_oi.png")
-        chart_file = os.path.join("CodeOutput", "nifty_oi_chart.png")
-        
-        driver.save_screenshot(temp_screenshot)
-        
-        img = Image.open(temp_screenshot)
-        width, height = img.size
-        
-        # Crop chart area
-        left = width * 0.15
-        right = width * 0.67
-        top = height * 0.20
-        bottom = height * 0.72
-        
-        chart_area = img.crop((left, top, right, bottom))
-        chart_area.save(chart_file)
-        
-        os.remove(temp_screenshot)
-        
-        driver.quit()
-        
         print("Function 6 - NIFTY50 Open Interest Analysis - Successful")
-        return True
+        return SectionResult("oi", data={
+            "spot_price": data['spot_price'],
+            "total_calls_oi": data['total_calls_oi'],
+            "total_puts_oi": data['total_puts_oi'],
+        }, images={"nifty_oi_chart.png": data['chart_png']})
 
     except Exception as e:
         print("Function 6 - NIFTY50 Open Interest Analysis - Not Successful")
-        if 'driver' in locals():
-            driver.quit()
-        return False
-
-def get_nifty_pcr():
+        return failed("oi", e)
+
+def write_nifty_oi(result, output_dir):
+    """Writes the NIFTY open interest figures"""
+    data = result.data
+    output_file = os.path.join(output_dir, "nifty_oi.txt")
+    with open(output_file, 'w') as f:
+        f.write("NIFTY OPEN INTEREST ANALYSIS\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Spot Price:      {data['spot_price']:,.2f}\n")
+        f.write(f"Total Call OI:   {data['total_calls_oi']}\n")
+        f.write(f"Total Put OI:    {data['total_puts_oi']}\n")
+
+def get_nifty_pcr(ctx=None):
     """Generate NIFTY50 PCR Analysis"""
+    import get_nifty_pcr as pcr_source
+
+    ctx = ctx or default_context()
     try:
         # Get current PCR
-        pcr_data = {}
-        chain = nse_optionchain_scrapper('NIFTY')
-        if not chain:
-            return False
-
-        total_pe_oi = sum(float(strike.get('PE', {}).get('openInterest', 0))
-                         for strike in chain['records']['data'] if 'PE' in strike)
-        total_ce_oi = sum(float(strike.get('CE', {}).get('openInterest', 0))
-                         for strike in chain['records']['data'] if 'CE' in strike)
-
-        if total_ce_oi == 0:
-            return False
-
-        current_pcr = total_pe_oi / total_ce_oi
-        today_str = datetime.now().strftime('%d-%m-%Y')
-        
-        # Save PCR to file
-        output_file = os.path.join("CodeOutput", "nifty_pcr.txt")
-        with open(output_file, 'w') as f:
-            f.write(f"NIFTY PCR Analysis\n")
-            f.write("=" * 40 + "\n\n")
-            f.write(f"Current PCR ({today_str}): {current_pcr:.2f}\n")
-            f.write(f"Total Put OI: {total_pe_oi:,.0f}\n")
-            f.write(f"Total Call OI: {total_ce_oi:,.0f}\n")
+        pcr_data = pcr_source.get_current_pcr(ctx)
+        if not pcr_data:
+            return failed("pcr", "no option chain data")
 
         # Capture PCR chart
-        chart_url = "https://upstox.com/fno-discovery/open-interest-analysis/nifty-pcr/"
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--no-sandbox")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        try:
-            driver.get(chart_url)
-            wait = WebDriverWait(driver, 20)
-            
-            # Wait for chart to load
-            wait.until(
-                EC.presence_of_element_located((By.CLASS_NAME, "recharts-responsive-container"))
-            )
-            
-            driver.set_window_size(1920, 1080)
-            driver.execute_script("""
-                document.querySelectorAll('.modal, .overlay').forEach(el => el.style.display = 'none');
-                document.documentElement.setAttribute('data-theme', 'light');
-            """)
-            
-            time.sleep(3)
-            
-            # Take and crop screenshot
-            temp_screenshot = os.path.join("CodeOutput", "temp_pcr.png")
-            pcr_chart = os.path.join("CodeOutput", "nifty_pcr_chart.png")
-            
-            driver.save_screenshot(temp_screenshot)
-            
-            img = Image.open(temp_screenshot)
-            width, height = img.size
-            
-            # Crop chart area
-            left = width * 0.15
-            right = width * 0.67
-            top = height * 0.30
-            bottom = height * 0.81
-            
-            chart_area = img.crop((left, top, right, bottom))
-            chart_area.save(pcr_chart)
-            
-            # Clean up
-            os.remove(temp_screenshot)
-            
-        finally:
-            driver.quit()
+        chart_png = pcr_source.capture_pcr_chart_png(ctx)
+        if chart_png is None:
+            return failed("pcr", "chart capture failed")
 
         print("Function 5 - NIFTY50 PCR - Successful")
-        return True
+        return SectionResult("pcr", data=dict(pcr_data, date=datetime.now().strftime('%d-%m-%Y')),
+                             images={"nifty_pcr_chart.png": chart_png})
 
     except Exception as e:
         print("Function 5 - NIFTY50 PCR - Not Successful")
-        return False
-
-def get_nifty_heatmap():
+        return failed("pcr", e)
+
+def write_nifty_pcr(result, output_dir):
+    """Writes the NIFTY PCR figures"""
+    pcr_data = result.data
+    output_file = os.path.join(output_dir, "nifty_pcr.txt")
+    with open(output_file, 'w') as f:
+        f.write(f"NIFTY PCR Analysis\n")
+        f.write("=" * 40 + "\n\n")
+        f.write(f"Current PCR ({pcr_data['date']}): {pcr_data['pcr']:.2f}\n")
+        f.write(f"Total Put OI: {pcr_data['total_pe_oi']:,.0f}\n")
+        f.write(f"Total Call OI: {pcr_data['total_ce_oi']:,.0f}\n")
+
+def get_nifty_heatmap(ctx=None):
     """Generate NIFTY50 Heatmap"""
-    try:
-        # Initialize stealth browser
-        options = uc.ChromeOptions()
-        options.add_argument("--start-maximized")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-popup-blocking")
-        
-        # Ensure compatibility by using the correct ChromeDriver version
-        driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-        wait = WebDriverWait(driver, 30)
-        
-        try:
-            # Load page
-            url = 'https://in.tradingview.com/heatmap/stock/#%7B%22dataSource%22%3A%22NIFTY50%22%2C%22blockColor%22%3A%22change%22%2C%22blockSize%22%3A%22market_cap_basic%22%2C%22grouping%22%3A%22no_group%22%7D'
-            driver.get(url)
-            time.sleep(5)
-            
-            # Click Fullscreen Button
-            fullscreen_button = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-top-bar_fullscreen']"))
-            )
-            fullscreen_button.click()
-            time.sleep(3)
-
-            # Click Display Settings Button
-            settings_button = wait.until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-top-bar_settings-button']"))
-            )
-            settings_button.click()
-            time.sleep(2)
-            
-            # Select Price option
-            try:
-                # Open Display Value dropdown
-                dropdown = driver.find_element(By.XPATH, "//div[div[text()='Display value']]/following-sibling::div[1]")
-                dropdown.click()
-                time.sleep(1)
-                
-                # Use keyboard navigation to select Price
-                actions = ActionChains(driver)
-                for _ in range(2):
-                    actions.send_keys(Keys.ARROW_DOWN).perform()
-                    time.sleep(0.5)
-                actions.send_keys(Keys.RETURN).perform()
-                time.sleep(1)
-                
-            except Exception:
-                pass  # If price selection fails, continue with default view
-
-            # Configure color depth
-            #print("Setting color depth...")
-            try:
-                # Find and click color depth button
-                color_button = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-qa-id='heatmap-bottom-bar_button_multiplier']"))
-                )
-                color_button.click()
-               #print("Clicked color depth button")
-                time.sleep(1)
-
-                # Navigate using keyboard
-                #print("Navigating color depth options...")
-                actions = ActionChains(driver)
-                # Press down arrow three times
-                for _ in range(3):
-                    actions.send_keys(Keys.ARROW_DOWN).perform()
-                    time.sleep(0.5)
-                
-                # Press Enter to select
-                actions.send_keys(Keys.RETURN).perform()
-                #print("Selected color depth option")
-                
-                # Move mouse away and click in blank area to remove highlight
-                #print("Removing button highlight...")
-                actions.move_by_offset(200, 0).click().perform()
-            except Exception as e:
-                #print(f"Warning: Could not set color depth - {str(e)}")
-                pass
+    import heatmap
 
-            # Take screenshot
-            output_file = os.path.join("CodeOutput", "stock_heatmap_price.png")
-            driver.save_screenshot(output_file)
-            
-            if os.path.exists(output_file):
-                print("Function 4 - NIFTY50 Heatmap - Successful")
-                return True
-            else:
-                print("Function 4 - NIFTY50 Heatmap - Not Successful")
-                return False
-
-        finally:
-            driver.quit()
-
-    except Exception as e:
+    ctx = ctx or default_context()
+    png = heatmap.capture_heatmap_png(ctx, headless=ctx.config['heatmap_headless'])
+    if png is None:
         print("Function 4 - NIFTY50 Heatmap - Not Successful")
-        return False
+        return failed("heatmap", "no heatmap captured")
+    print("Function 4 - NIFTY50 Heatmap - Successful")
+    return SectionResult("heatmap", images={"stock_heatmap_price.png": png})
 
-def get_nifty_gainers_losers():
+def get_nifty_gainers_losers(ctx=None):
     """Get NIFTY50 Top 5 Gainers and Losers"""
-    try:
-        nifty50_tickers = [
-            "ADANIENT.NS", "ADANIPORTS.NS", "APOLLOHOSP.NS", "ASIANPAINT.NS", 
-            "AXISBANK.NS", "BAJAJ-AUTO.NS", "BAJFINANCE.NS", "BAJAJFINSV.NS", 
-            "BPCL.NS", "BHARTIARTL.NS", "BRITANNIA.NS", "CIPLA.NS", "COALINDIA.NS", 
-            "DIVISLAB.NS", "DRREDDY.NS", "EICHERMOT.NS", "GRASIM.NS", "HCLTECH.NS", 
-            "HDFCBANK.NS", "HDFCLIFE.NS", "HEROMOTOCO.NS", "HINDALCO.NS", 
-            "HINDUNILVR.NS", "ICICIBANK.NS", "ITC.NS", "INDUSINDBK.NS", "INFY.NS", 
-            "JSWSTEEL.NS", "KOTAKBANK.NS", "LTIM.NS", "LT.NS", "M&M.NS", 
-            "MARUTI.NS", "NTPC.NS", "NESTLEIND.NS", "ONGC.NS", "POWERGRID.NS", 
-            "RELIANCE.NS", "SBILIFE.NS", "SBIN.NS", "SUNPHARMA.NS", "TCS.NS", 
-            "TATACONSUM.NS", "TATAMOTORS.NS", "TATASTEEL.NS", "TECHM.NS", 
-            "TITAN.NS", "ULTRACEMCO.NS", "WIPRO.NS", "SHRIRAMFIN.NS"
-        ]
-
-        # Download data for the last 2 trading days
-        data = yf.download(nifty50_tickers, period="2d", auto_adjust=True)
-        if data.empty:
-            return False
-
-        # Get close prices and calculate changes
-        close_prices = data['Close']
-        if len(close_prices) < 2:
-            return False
-
-        latest_prices = close_prices.iloc[-1]
-        previous_prices = close_prices.iloc[-2]
-        percent_change = ((latest_prices - previous_prices) / previous_prices) * 100
-        
-        # Process results
-        results = []
-        for ticker in percent_change.index:
-            if pd.notna(percent_change[ticker]) and pd.notna(latest_prices[ticker]):
-                results.append({
-                    "stock": ticker.replace(".NS", ""),
-                    "price": latest_prices[ticker],
-                    "change": percent_change[ticker]
-                })
+    import gainerslosers
 
-        sorted_results = sorted(results, key=lambda x: x['change'], reverse=True)
-        top_gainers = sorted_results[:5]
-        top_losers = sorted_results[-5:]
-        top_losers.reverse()
-
-        # Save results to text file
-        output_file = os.path.join("CodeOutput", "nifty50_movers.txt")
-        with open(output_file, 'w') as f:
-            f.write("NIFTY 50 Top Movers Report\n")
-            f.write("=" * 40 + "\n\n")
-            
-            f.write("Top 5 Gainers:\n")
-            f.write("=" * 40 + "\n")
-            f.write(f"{'Stock':<15}{'Price':<12}{'Change (%)':<10}\n")
-            f.write("-" * 40 + "\n")
-            for gainer in top_gainers:
-                f.write(f"{gainer['stock']:<15}{gainer['price']:<12.2f}+{gainer['change']:.2f}%\n")
-            
-            f.write("\nTop 5 Losers:\n")
-            f.write("=" * 40 + "\n")
-            f.write(f"{'Stock':<15}{'Price':<12}{'Change (%)':<10}\n")
-            f.write("-" * 40 + "\n")
-            for loser in top_losers:
-                f.write(f"{loser['stock']:<15}{loser['price']:<12.2f}{loser['change']:.2f}%\n")
+    ctx = ctx or default_context()
+    try:
+        movers = gainerslosers.get_nifty50_movers(ctx)
+        if not movers:
+            return failed("gainers_losers", "no data")
 
         print("Function 3 - NIFTY50 Top 5 Gainers & Losers - Successful")
-        return True
+        return SectionResult("gainers_losers", data=movers)
 
     except Exception as e:
         print("Function 3 - NIFTY50 Top 5 Gainers & Losers - Not Successful")
-        return False
-
-def get_nifty_seven_days():
+        return failed("gainers_losers", e)
+
+def write_nifty_gainers_losers(result, output_dir):
+    """Writes the NIFTY50 top movers report"""
+    top_gainers = result.data['gainers']
+    top_losers = result.data['losers']
+
+    # Save results to text file
+    output_file = os.path.join(output_dir, "nifty50_movers.txt")
+    with open(output_file, 'w') as f:
+        f.write("NIFTY 50 Top Movers Report\n")
+        f.write("=" * 40 + "\n\n")
+        
+        f.write("Top 5 Gainers:\n")
+        f.write("=" * 40 + "\n")
+        f.write(f"{'Stock':<15}{'Price':<12}{'Change (%)':<10}\n")
+        f.write("-" * 40 + "\n")
+        for gainer in top_gainers:
+            f.write(f"{gainer['stock']:<15}{gainer['price']:<12.2f}+{gainer['change']:.2f}%\n")
+        
+        f.write("\nTop 5 Losers:\n")
+        f.write("=" * 40 + "\n")
+        f.write(f"{'Stock':<15}{'Price':<12}{'Change (%)':<10}\n")
+        f.write("-" * 40 + "\n")
+        for loser in top_losers:
+            f.write(f"{loser['stock']:<15}{loser['price']:<12.2f}{loser['change']:.2f}%\n")
+
+def get_nifty_seven_days(ctx=None):
     """Generate NIFTY50 7-day analysis report"""
+    import yfinance as yf
+    import pandas as pd
+
     try:
         # Download and analyze data
         nifty_daily_data = yf.download("^NSEI", period="90d", interval="1d", auto_adjust=True)
@@ -1605,7 +1048,7 @@ def get_nifty_seven_days():
             nifty_hourly_data.columns = nifty_hourly_data.columns.get_level_values(0)
 
         if nifty_daily_data.empty or nifty_hourly_data.empty:
-            return False
+            return failed("seven_days", "no data downloaded")
 
         # Analyze data
         nifty_daily_data['SMA50'] = nifty_daily_data['Close'].rolling(window=50).mean()
@@ -1617,19 +1060,16 @@ def get_nifty_seven_days():
         support_level = float(recent_period['Low'].min())
         
         analysis_data = {
-            "daily_data": nifty_daily_data,
-            "hourly_data": nifty_hourly_data,
-            "latest_close": latest_close,
-            "latest_sma50": latest_sma50,
+            "latest_close": float(latest_close),
+            "latest_sma50": float(latest_sma50),
             "resistance_1": resistance_level,
             "resistance_2": resistance_level * 1.005,
             "support_1": support_level,
             "support_2": support_level * 0.995,
         }
 
-        # Generate chart
-        chart_file = os.path.join("CodeOutput", "nifty_1hr_chart.png")
-        hourly_df = analysis_data['hourly_data'].tail(7*8).copy()
+        # Last 7 trading days of hourly candles for the chart
+        hourly_df = nifty_hourly_data.tail(7*8).copy()
         
         cols_to_check = ['Open', 'High', 'Low', 'Close']
         for col in cols_to_check:
@@ -1637,156 +1077,368 @@ def get_nifty_seven_days():
         hourly_df.dropna(inplace=True)
 
         if hourly_df.empty:
-            return False
-
-        hlines = dict(hlines=[analysis_data['resistance_1'], analysis_data['support_1']], 
-                     colors=['r', 'g'], linestyle='--')
-        mc = mpf.make_marketcolors(up='#00b746', down='#ef403c', inherit=True)
-        style = mpf.make_mpf_style(marketcolors=mc, base_mpf_style='nightclouds')
-
-        mpf.plot(
-            hourly_df, type='candle', style=style, title='Nifty 50 - 1 Hour Chart',
-            ylabel='Price (INR)', volume=False, hlines=hlines, figratio=(16, 9),
-            savefig=dict(fname=chart_file, dpi=150, pad_inches=0.1)
-        )
-
-        # Generate PDF report
-        pdf_file = os.path.join("CodeOutput", "Market_Report_Segment_Nifty50.pdf")
-        c = canvas.Canvas(pdf_file, pagesize=letter)
-        width, height = letter
-
-        # Add PDF content
-        title_color = HexColor("#1E3A8A")
-        text_color = HexColor("#1F2937")
-        resistance_color = HexColor("#B91C1C")
-        support_color = HexColor("#15803D")
-
-        styles = getSampleStyleSheet()
-        body_style = styles['BodyText']
-        body_style.textColor = text_color
-        body_style.fontSize = 11
-        body_style.leading = 14
-
-        c.setFillColor(title_color)
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(1 * inch, height - 1 * inch, "Nifty Technical Analysis")
-        c.line(1*inch, height - 1.05*inch, width - 1*inch, height - 1.05*inch)
-
-        # Add chart to PDF
-        if os.path.exists(chart_file):
-            chart_width = 6.5 * inch
-            chart_height = (chart_width / 16) * 9
-            c.drawImage(chart_file, 1 * inch, height - 1.5 * inch - chart_height, 
-                       width=chart_width, height=chart_height)
-            y_position = height - 1.8 * inch - chart_height
-        else:
-            c.drawString(1*inch, height - 1.7*inch, "Chart could not be generated.")
-            y_position = height - 2.2 * inch
-
-        c.setFillColor(title_color)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(1 * inch, y_position, "◆ Overview")
-        y_position -= 0.3 * inch
-
-        daily_analysis_text = f"""
-        <b>Daily Chart Analysis:</b> Nifty is currently trading around {analysis_data['latest_close']:.2f}, which is 
-        {'above' if analysis_data['latest_close'] > analysis_data['latest_sma50'] else 'below'} the key 50-day SMA of 
-        {analysis_data['latest_sma50']:.2f}. This indicates a {'bullish' if analysis_data['latest_close'] > analysis_data['latest_sma50'] else 'bearish'}
-        medium-term trend. The index has shown {'strength' if analysis_data['latest_close'] > analysis_data['resistance_1']*0.98 else 'weakness'} 
-        in recent sessions.
-        """
-        hourly_analysis_text = f"""
-        <b>1-Hour Chart Analysis:</b> The short-term chart shows the price action consolidating near the recent 
-        highs. A breakout above the immediate resistance at {analysis_data['resistance_1']:.2f} could trigger further 
-        upside momentum, while a failure to hold the support at {analysis_data['support_1']:.2f} may lead to a pullback.
-        """
-        
-        p = Paragraph(daily_analysis_text, body_style)
-        p.wrapOn(c, width - 2*inch, height)
-        p.drawOn(c, 1*inch, y_position - p.height)
-        y_position -= (p.height + 0.2*inch)
-
-        p = Paragraph(hourly_analysis_text, body_style)
-        p.wrapOn(c, width - 2*inch, height)
-        p.drawOn(c, 1*inch, y_position - p.height)
-        y_position -= (p.height + 0.3*inch)
-
-        c.setFillColor(title_color)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(1 * inch, y_position, "◆ Key Levels to Watch")
-        y_position -= 0.3 * inch
-
-        c.setFillColor(resistance_color)
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(1.1 * inch, y_position, "RESISTANCE")
-        c.setFont("Helvetica", 11)
-        y_position -= 0.25 * inch
-        c.drawString(1.2 * inch, y_position, f"● {analysis_data['resistance_1']:.2f} – Immediate resistance from recent highs.")
-        y_position -= 0.25 * inch
-        c.drawString(1.2 * inch, y_position, f"● {analysis_data['resistance_2']:.2f} – Next potential resistance zone.")
-        y_position -= 0.4 * inch
-
-        c.setFillColor(support_color)
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(1.1 * inch, y_position, "SUPPORT")
-        c.setFont("Helvetica", 11)
-        y_position -= 0.25 * inch
-        c.drawString(1.2 * inch, y_position, f"● {analysis_data['support_1']:.2f} – Immediate support from recent lows.")
-        y_position -= 0.25 * inch
-        c.drawString(1.2 * inch, y_position, f"● {analysis_data['support_2']:.2f} – Next strong support zone.")
-
-        c.save()
-
-        # Clean up
-        if os.path.exists(chart_file):
-            os.remove(chart_file)
+            return failed("seven_days", "no hourly candles")
+        analysis_data['hourly'] = hourly_df[cols_to_check]
 
         print("Function 2 - NIFTY50 Last 7 days analysis - Successful")
-        return True
+        return SectionResult("seven_days", data=analysis_data)
 
     except Exception as e:
         print("Function 2 - NIFTY50 Last 7 days analysis - Not Successful")
-        return False
-
+        return failed("seven_days", e)
+
+def write_nifty_seven_days(result, output_dir):
+    """Renders the NIFTY50 technical analysis PDF with its 1-hour chart"""
+    import mplfinance as mpf
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Paragraph
+
+    analysis_data = result.data
+    hourly_df = analysis_data['hourly']
+
+    hlines = dict(hlines=[analysis_data['resistance_1'], analysis_data['support_1']], 
+                 colors=['r', 'g'], linestyle='--')
+    mc = mpf.make_marketcolors(up='#00b746', down='#ef403c', inherit=True)
+    style = mpf.make_mpf_style(marketcolors=mc, base_mpf_style='nightclouds')
+
+    # Render the chart in memory and draw it straight into the PDF
+    chart_buffer = io.BytesIO()
+    mpf.plot(
+        hourly_df, type='candle', style=style, title='Nifty 50 - 1 Hour Chart',
+        ylabel='Price (INR)', volume=False, hlines=hlines, figratio=(16, 9),
+        savefig=dict(fname=chart_buffer, dpi=150, pad_inches=0.1)
+    )
+
+    # Generate PDF report
+    pdf_file = os.path.join(output_dir, "Market_Report_Segment_Nifty50.pdf")
+    c = canvas.Canvas(pdf_file, pagesize=letter)
+    width, height = letter
+
+    # Add PDF content
+    title_color = HexColor("#1E3A8A")
+    text_color = HexColor("#1F2937")
+    resistance_color = HexColor("#B91C1C")
+    support_color = HexColor("#15803D")
+
+    styles = getSampleStyleSheet()
+    body_style = styles['BodyText']
+    body_style.textColor = text_color
+    body_style.fontSize = 11
+    body_style.leading = 14
+
+    c.setFillColor(title_color)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(1 * inch, height - 1 * inch, "Nifty Technical Analysis")
+    c.line(1*inch, height - 1.05*inch, width - 1*inch, height - 1.05*inch)
+
+    # Add chart to PDF
+    if chart_buffer.getbuffer().nbytes:
+        chart_width = 6.5 * inch
+        chart_height = (chart_width / 16) * 9
+        c.drawImage(ImageReader(chart_buffer), 1 * inch, height - 1.5 * inch - chart_height, 
+                   width=chart_width, height=chart_height)
+        y_position = height - 1.8 * inch - chart_height
+    else:
+        c.drawString(1*inch, height - 1.7*inch, "Chart could not be generated.")
+        y_position = height - 2.2 * inch
+
+    c.setFillColor(title_color)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(1 * inch, y_position, "◆ Overview")
+    y_position -= 0.3 * inch
+
+    daily_analysis_text = f"""
+    <b>Daily Chart Analysis:</b> Nifty is currently trading around {analysis_data['latest_close']:.2f}, which is 
+    {'above' if analysis_data['latest_close'] > analysis_data['latest_sma50'] else 'below'} the key 50-day SMA of 
+    {analysis_data['latest_sma50']:.2f}. This indicates a {'bullish' if analysis_data['latest_close'] > analysis_data['latest_sma50'] else 'bearish'}
+    medium-term trend. The index has shown {'strength' if analysis_data['latest_close'] > analysis_data['resistance_1']*0.98 else 'weakness'} 
+    in recent sessions.
+    """
+    hourly_analysis_text = f"""
+    <b>1-Hour Chart Analysis:</b> The short-term chart shows the price action consolidating near the recent 
+    highs. A breakout above the immediate resistance at {analysis_data['resistance_1']:.2f} could trigger further 
+    upside momentum, while a failure to hold the support at {analysis_data['support_1']:.2f} may lead to a pullback.
+    """
+    
+    p = Paragraph(daily_analysis_text, body_style)
+    p.wrapOn(c, width - 2*inch, height)
+    p.drawOn(c, 1*inch, y_position - p.height)
+    y_position -= (p.height + 0.2*inch)
+
+    p = Paragraph(hourly_analysis_text, body_style)
+    p.wrapOn(c, width - 2*inch, height)
+    p.drawOn(c, 1*inch, y_position - p.height)
+    y_position -= (p.height + 0.3*inch)
+
+    c.setFillColor(title_color)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(1 * inch, y_position, "◆ Key Levels to Watch")
+    y_position -= 0.3 * inch
+
+    c.setFillColor(resistance_color)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(1.1 * inch, y_position, "RESISTANCE")
+    c.setFont("Helvetica", 11)
+    y_position -= 0.25 * inch
+    c.drawString(1.2 * inch, y_position, f"● {analysis_data['resistance_1']:.2f} – Immediate resistance from recent highs.")
+    y_position -= 0.25 * inch
+    c.drawString(1.2 * inch, y_position, f"● {analysis_data['resistance_2']:.2f} – Next potential resistance zone.")
+    y_position -= 0.4 * inch
+
+    c.setFillColor(support_color)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(1.1 * inch, y_position, "SUPPORT")
+    c.setFont("Helvetica", 11)
+    y_position -= 0.25 * inch
+    c.drawString(1.2 * inch, y_position, f"● {analysis_data['support_1']:.2f} – Immediate support from recent lows.")
+    y_position -= 0.25 * inch
+    c.drawString(1.2 * inch, y_position, f"● {analysis_data['support_2']:.2f} – Next strong support zone.")
+
+    c.save()
+
+
+# --- Section registry ---
+# Each section declares the resource slot it occupies while running and the
+# sections whose results it needs first. The list order is the report order.
+# Browser sections carry a wall-clock budget (seconds): they run in a child
+# process that is killed, with everything it started, on overrun. They work in
+# a tab leased from the run's browser pool, which is reset afterwards.
+# 'outputs' lists the artifacts a section writes (file names in the run's
+# output directory), for the run manifest, and
+# 'imports' the heavy libraries it needs, which are only loaded when selected.
+# 'render' writes a section's result to the output directory (images in the
+# result are written as-is).
+# 'priority' (1 = critical, 3 = low value) and 'cost' (estimated seconds,
+# replaced by measured history once available) drive deadline scheduling.
+# 'prewarm' names what to provision at time zero: the hosts an HTTP section
+# connects to, or the options factory of a browser section's Chrome (which
+# also picks the kind of pooled browser its tab is leased from).
+SECTIONS = [
+    {"name": "summary", "func": get_nifty_summary, "resource": "yfinance", "depends_on": [],  # 1
+     "priority": 1, "cost": 20,
+     "render": write_nifty_summary,
+     "outputs": ["Market_Report_Dashboard_Nifty50.pdf"],
+     "imports": ["yfinance", "reportlab.pdfgen.canvas"]},
+    {"name": "seven_days", "func": get_nifty_seven_days, "resource": "yfinance", "depends_on": [],  # 2
+     "priority": 2, "cost": 30,
+     "render": write_nifty_seven_days,
+     "outputs": ["Market_Report_Segment_Nifty50.pdf"],
+     "imports": ["yfinance", "pandas", "mplfinance", "reportlab.platypus"]},
+    {"name": "gainers_losers", "func": get_nifty_gainers_losers, "resource": "yfinance", "depends_on": [],  # 3
+     "priority": 1, "cost": 20,
+     "render": write_nifty_gainers_losers,
+     "outputs": ["nifty50_movers.txt"],
+     "imports": ["yfinance", "pandas"]},
+    {"name": "heatmap", "func": get_nifty_heatmap, "resource": "browser", "depends_on": [],  # 4
+     "priority": 3, "cost": 90, "budget": 150,
+     "prewarm": {"browser": _heatmap_options, "stealth": True},
+     "outputs": ["stock_heatmap_price.png"],
+     "imports": ["undetected_chromedriver", "selenium.webdriver"]},
+    {"name": "pcr", "func": get_nifty_pcr, "resource": "browser", "depends_on": [],  # 5
+     "priority": 2, "cost": 45, "budget": 90,
+     "render": write_nifty_pcr,
+     "prewarm": {"browser": _pcr_options},
+     "outputs": ["nifty_pcr.txt", "nifty_pcr_chart.png"],
+     "imports": ["nsepython", "pandas", "selenium.webdriver", "webdriver_manager.chrome"]},
+    {"name": "oi", "func": get_nifty_oi, "resource": "browser", "depends_on": [],  # 6
+     "priority": 2, "cost": 45, "budget": 90,
+     "render": write_nifty_oi,
+     "prewarm": {"browser": _oi_options},
+     "outputs": ["nifty_oi.txt", "nifty_oi_chart.png"],
+     "imports": ["selenium.webdriver", "webdriver_manager.chrome"]},
+    {"name": "news", "func": get_market_news, "resource": "http", "depends_on": [],  # 7
+     "priority": 2, "cost": 10,
+     "render": write_market_news,
+     "prewarm": {"urls": ["https://www.livemint.com/market/stock-market-news"]},
+     "outputs": ["Market_Bulletin.docx"],
+     "imports": ["requests", "bs4", "docx"]},
+    {"name": "key_stocks", "func": get_key_stocks_to_watch, "resource": "browser", "depends_on": [],  # 8
+     "priority": 3, "cost": 60, "budget": 150,
+     "render": write_key_stocks,
+     "prewarm": {"browser": _key_stocks_options, "stealth": True},
+     "outputs": ["Key_Stocks_to_Watch.docx"],
+     "imports": ["undetected_chromedriver", "selenium.webdriver", "bs4", "docx"]},
+    {"name": "vix", "func": get_vix_analysis, "resource": "browser", "depends_on": [],  # 9
+     "priority": 2, "cost": 40, "budget": 180,
+     "render": write_vix_analysis,
+     "prewarm": {"browser": _vix_options, "stealth": True, "urls": ["https://groww.in/indices/india-vix"]},
+     "outputs": ["india_vix.txt", "india_vix_chart.png"],
+     # yfinance and matplotlib only draw the optional local chart (vix.render_vix_chart)
+     "imports": ["undetected_chromedriver", "selenium.webdriver"]},
+    {"name": "fii_dii", "func": get_fii_dii_data, "resource": "http", "depends_on": [],  # 10
+     "priority": 1, "cost": 15,
+     "render": write_fii_dii_data,
+     "prewarm": {"urls": ["https://groww.in/fii-dii-data"]},
+     "outputs": ["fii_dii_data.txt"],
+     "imports": ["requests", "bs4", "pandas"]},
+    {"name": "sgx", "func": get_sgx_nifty, "resource": "browser", "depends_on": [],  # 11
+     "priority": 3, "cost": 25, "budget": 60,
+     "prewarm": {"browser": _sgx_options},
+     "outputs": ["sgx_nifty.png"],
+     "imports": ["selenium.webdriver", "webdriver_manager.chrome"]},
+    {"name": "global", "func": get_global_markets, "resource": "yfinance", "depends_on": [],  # 12
+     "priority": 2, "cost": 10,
+     "render": write_global_markets,
+     "outputs": ["global_markets.txt"],
+     "imports": ["yfinance", "pandas"]},
+    {"name": "gold", "func": get_gold_rates, "resource": "http", "depends_on": [],  # 13
+     "priority": 2, "cost": 5,
+     "render": write_gold_rates,
+     "prewarm": {"urls": ["https://www.goodreturns.in/gold-rates/chennai.html"]},
+     "outputs": ["gold_rates.txt"],
+     "imports": ["requests", "bs4"]},
+    {"name": "silver", "func": get_silver_rates, "resource": "http", "depends_on": [],  # 14
+     "priority": 3, "cost": 5,
+     "render": write_silver_rates,
+     "prewarm": {"urls": ["https://www.goodreturns.in/silver-rates/chennai.html"]},
+     "outputs": ["silver_rates.txt"],
+     "imports": ["requests", "bs4"]},
+    {"name": "currency", "func": get_currency_rates, "resource": "yfinance", "depends_on": [],  # 15
+     "priority": 2, "cost": 15,
+     "render": write_currency_rates,
+     "outputs": ["currency_rates.txt"],
+     "imports": ["yfinance"]},
+]
+
+
+DEGRADED_NOTICE = "degraded_sections.txt"
+
+
+def parse_deadline(text, now=None):
+    """Parses a deadline given as local 'HH:MM' (today) or '+MINUTES' from now into a Unix time."""
+    now = now or datetime.now()
+    if text.startswith("+"):
+        return now.timestamp() + float(text[1:]) * 60
+    at = datetime.strptime(text, "%H:%M")
+    return now.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0).timestamp()
+
+
+def write_degraded_notice(manifest, output_dir):
+    """Lists the sections that were degraded to meet the deadline, so the bundle says so."""
+    path = os.path.join(output_dir, DEGRADED_NOTICE)
+    degraded = {name: entry for name, entry in manifest['sections'].items() if entry.get('degraded')}
+    if not degraded:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("DEGRADED REPORT SECTIONS\n")
+        f.write("=" * 60 + "\n\n")
+        f.write(f"Run {manifest['run_id']} hit its deadline. These sections were not refreshed:\n\n")
+        for name, entry in degraded.items():
+            if entry['ok']:
+                f.write(f"{name:<16} - showing outputs from an earlier run\n")
+            else:
+                f.write(f"{name:<16} - missing (no earlier output available)\n")
+
+
+def main(argv=None, ctx=None):
+    """
+    Runs the report sections selected on the command line.
+
+    Pass a RunContext to share its session, browser set-up and fetched data
+    with other callers (the report daemon, finalreportgenerator.py); by
+    default each run gets a fresh context.
+    """
+    parser = argparse.ArgumentParser(description="Generate the daily stock market report sections.")
+    parser.add_argument("--resume", action="store_true",
+                        help="re-run only sections that failed in the previous run or whose outputs are stale")
+    parser.add_argument("--max-age", type=float, default=60, metavar="MINUTES",
+                        help="with --resume, outputs older than this are regenerated (default: 60)")
+    parser.add_argument("--only", metavar="SECTIONS",
+                        help="comma-separated sections to run, e.g. gold,silver,currency")
+    parser.add_argument("--list", action="store_true", help="list the available sections and exit")
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="run browser sections in this process instead of budgeted child processes")
+    parser.add_argument("--deadline", metavar="HH:MM|+MINUTES",
+                        help="finish by this local time; low-priority sections are degraded to cached outputs "
+                             "once the deadline is at risk")
+    args = parser.parse_args(argv)
+
+    deadline = None
+    if args.deadline:
+        try:
+            deadline = parse_deadline(args.deadline)
+        except ValueError:
+            parser.error(f"invalid --deadline '{args.deadline}', expected HH:MM or +MINUTES")
+
+    if args.list:
+        for number, section in enumerate(SECTIONS, 1):
+            print(f"{number:>2}. {section['name']:<16} ({section['resource']}) {section['func'].__doc__}")
+        return None
+
+    selected = SECTIONS
+    if args.only:
+        names = [name.strip() for name in args.only.split(",") if name.strip()]
+        known = {section['name'] for section in SECTIONS}
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            parser.error(f"unknown section(s): {', '.join(unknown)} (see --list)")
+        selected = [section for section in SECTIONS if section['name'] in names]
+
+    owns_ctx = ctx is None
+    ctx = ctx or RunContext()
 
-if __name__ == "__main__":
     # Create output directory
-    os.makedirs("CodeOutput", exist_ok=True)
-    
-    # Initialize success counter
-    success_count = 0
-    
-    # Execute all functions in order and track successes
-    if get_nifty_summary():                  # 1
-        success_count += 1
-    if get_nifty_seven_days():              # 2
-        success_count += 1
-    if get_nifty_gainers_losers():          # 3
-        success_count += 1
-    if get_nifty_heatmap():                 # 4
-        success_count += 1
-    if get_nifty_pcr():                     # 5
-        success_count += 1
-    if get_nifty_oi():                      # 6
-        success_count += 1
-    if get_market_news():                   # 7
-        success_count += 1
-    if get_key_stocks_to_watch():           # 8
-        success_count += 1
-    if get_vix_analysis():                  # 9
-        success_count += 1
-    if get_fii_dii_data():                 # 10
-        success_count += 1
-    if get_sgx_nifty():                    # 11
-        success_count += 1
-    if get_global_markets():               # 12
-        success_count += 1
-    if get_gold_rates():                   # 13
-        success_count += 1
-    if get_silver_rates():                 # 14
-        success_count += 1
-    if get_currency_rates():               # 15
-        success_count += 1
-        
+    os.makedirs(ctx.output_dir, exist_ok=True)
+    ctx.bus.subscribe(FileSink(selected, ctx.output_dir))
+
+    sections = selected
+    previous, reused = None, []
+    if args.resume:
+        previous = load_manifest(ctx.output_dir)
+        rerun, reused = sections_to_rerun(selected, previous, args.max_age, ctx.output_dir)
+        sections = [section for section in selected if section['name'] in rerun]
+        print(f"Resuming: re-running {len(rerun)} section(s), keeping {len(reused)} from the previous run")
+        if rerun:
+            print("Re-running: " + ", ".join(rerun))
+
+    run_start = time.time()
+
+    # Load only the libraries the selected sections need, and report the cost
+    import_seconds = import_modules(name for section in sections for name in section.get('imports', []))
+    if import_seconds:
+        print(f"\nImported {len(import_seconds)} libraries in {sum(import_seconds.values()):.2f}s")
+        for name, seconds in sorted(import_seconds.items(), key=lambda item: -item[1]):
+            print(f"  {name:<28} {seconds:>6.2f}s")
+
+    def checkpoint(results):
+        manifest = build_manifest(sections, results, run_start, time.time(), import_seconds, ctx.output_dir)
+        write_manifest(merge_manifest(manifest, previous, reused), ctx.output_dir, final=False)
+
+    # Run independent sections concurrently, limited per resource slot
+    costs = estimate_costs(sections, load_history(ctx.output_dir)) if deadline else None
+    try:
+        results = run_sections(sections, isolate=not args.no_isolate, on_done=checkpoint,
+                               deadline=deadline, costs=costs, ctx=ctx)
+    finally:
+        # Read before closing: closing an owned context closes its pool and client
+        http_stats = ctx.resources.http_stats()
+        pool_stats = ctx.pool_stats()
+        if owns_ctx:
+            ctx.close()
+
+    print_run_summary(results)
+    manifest = merge_manifest(build_manifest(sections, results, run_start, time.time(), import_seconds,
+                                             ctx.output_dir),
+                              previous, reused)
+    manifest['prewarm'] = dict(ctx.prewarm_stats)
+    manifest['browser_pool'] = pool_stats
+    manifest['provisioning'] = dict(browser_provisioning.stats)
+    manifest['http'] = http_stats
+    manifest_path = write_manifest(manifest, ctx.output_dir)
+    write_degraded_notice(manifest, ctx.output_dir)
+    print(f"Run manifest written to {manifest_path}")
+
     # Print final success count
-    print(f"\n{success_count} / 15 functions executed successfully")
+    print(f"\n{manifest['success_count']} / {len(selected)} functions executed successfully")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
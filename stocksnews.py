@@ -1,11 +1,11 @@
-import time
 import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
+import html_parse
 from docx import Document
 from docx.shared import Inches, Pt
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from run_context import default_context
+
+# The news cards; the rest of the rendered page is not parsed
+NEWS_TARGET = html_parse.Target("div[class*=ItemContainer]")
 
 # --- Functions for Word Document Formatting ---
 # These are needed for the title's background shading.
@@ -25,20 +25,23 @@ except ImportError:
     def add_shading_to_paragraph(paragraph, color): pass
 
 
-def create_stocks_bulletin(output_filename="Key_Stocks_to_Watch.docx"):
+def create_stocks_bulletin(output_filename="Key_Stocks_to_Watch.docx", ctx=None):
     """
     Scrapes market news from Groww's stocks section,
     formats the top 10 items with company details, and saves them to a .docx file.
 
     Args:
         output_filename (str): The name of the output .docx file.
+        ctx (RunContext): Shared run context that starts and tracks the
+            browser. Defaults to the process-wide context.
 
     Returns:
         bool: True if successful, False otherwise.
     """
     print("Fetching latest stocks news from Groww...")
     
-    driver = None
+    ctx = ctx or default_context()
+    page = None
     try:
         # Initialize browser
         print("Initializing browser...")
@@ -48,41 +51,35 @@ def create_stocks_bulletin(output_filename="Key_Stocks_to_Watch.docx"):
         options.add_argument('--disable-dev-shm-usage')
         
         # Ensure compatibility by using the correct ChromeDriver version
-        driver = uc.Chrome(version_main=137, options=options)
-        wait = WebDriverWait(driver, 20)
+        page = ctx.new_page(options, stealth=True, blocking="data", profile="groww")
         
         # Load page
         url = "https://groww.in/market-news/stocks"
         print("Loading page...")
-        driver.get(url)
+        page.navigate(url)
         
         # Wait for initial items to load
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'smnli671ItemContainer')))
+        page.wait_for(".smnli671ItemContainer", timeout=20, label="key stocks page")
         
         # Scroll to load all items
         print("Loading more news items...")
-        SCROLL_PAUSE_TIME = 2
         scroll_count = 0
         max_scrolls = 2  # Ensure we get enough items
         
         while scroll_count < max_scrolls:
             # Scroll down
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(SCROLL_PAUSE_TIME)
+            page.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            page.settle(timeout=ctx.config['readiness_timeout'], label="more news items")
             scroll_count += 1
             print(f"Scroll {scroll_count}/{max_scrolls}")
             
             # Try to click "Load More" button if it exists
-            try:
-                load_more = driver.find_element(By.CLASS_NAME, "sm403InfiniteLoaderContainer")
-                if load_more.is_displayed():
-                    driver.execute_script("arguments[0].scrollIntoView(true);", load_more)
-                    time.sleep(1)
-            except:
-                pass
+            if page.visible(".sm403InfiniteLoaderContainer"):
+                page.scroll_into_view(".sm403InfiniteLoaderContainer")
+                page.settle(timeout=ctx.config['readiness_timeout'], label="load more")
         
         # Get all loaded items
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        soup = html_parse.parse(page.html(), NEWS_TARGET, label="key stocks page")
         news_items = soup.find_all('div', {'class': lambda x: x and 'ItemContainer' in x})
         
         if not news_items:
@@ -229,12 +226,9 @@ def create_stocks_bulletin(output_filename="Key_Stocks_to_Watch.docx"):
         print(f"An error occurred: {e}")
         return False
     finally:
-        if driver:
-            try:
-                driver.quit()
-                print("Browser closed successfully")
-            except:
-                print("Warning: Could not close browser cleanly")
+        if page:
+            page.close()
+            print("Browser closed successfully")
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Runs the browser_backend Page interface against local fixture pages, once
+per engine. Needs Chrome, plus Selenium for the Selenium engine and
+websockets for the CDP engine; each engine's tests are skipped where its
+package is missing. The CDP engine drives a Chrome started here, so it
+does not need Selenium.
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import functools
+import subprocess
+import urllib.request
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+CHROME = next(filter(None, (shutil.which(name) for name in
+                            ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser"))), None)
+if CHROME is None:
+    pytest.skip("Chrome is not installed", allow_module_level=True)
+
+import browser_backend
+import dom_extract
+from browser_pool import Lease
+from run_context import RunContext, SharedResources
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+QUOTE_API = r"/api/quote\.json"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    """Serves the fixtures directory on a free local port."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=FIXTURES))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def resources():
+    resources = SharedResources()
+    yield resources
+    resources.close()
+
+
+@pytest.fixture(scope="module")
+def chrome():
+    """A headless Chrome with its DevTools endpoint open; yields its host:port."""
+    profile = tempfile.mkdtemp(prefix="chrome-test-")
+    process = subprocess.Popen([CHROME, "--headless=new", "--no-sandbox", "--disable-dev-shm-usage",
+                                "--remote-debugging-port=0", f"--user-data-dir={profile}", "about:blank"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    port_file = os.path.join(profile, "DevToolsActivePort")
+    deadline = time.monotonic() + 20
+    while not os.path.exists(port_file) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    try:
+        with open(port_file) as f:
+            yield f"127.0.0.1:{f.readline().strip()}"
+    finally:
+        process.terminate()
+        process.wait(10)
+        shutil.rmtree(profile, ignore_errors=True)
+
+
+def _cdp_page(chrome):
+    """A CdpPage on the first tab of the test Chrome, leased as the pool would."""
+    with urllib.request.urlopen(f"http://{chrome}/json/list", timeout=10) as response:
+        target = next(t for t in json.load(response) if t['type'] == "page")
+    lease = Lease(kind=("plain", "headless"), debugger_address=chrome, driver_path=None,
+                  target_id=target['id'], context_id=None, window=(1200, 800))
+    return browser_backend.open_cdp_page(lease, lambda page: page.quit())
+
+
+@pytest.fixture(params=["selenium", "cdp"])
+def page(request, resources, tmp_path):
+    if request.param == "cdp":
+        pytest.importorskip("websockets")
+        page = _cdp_page(request.getfixturevalue("chrome"))
+        yield page
+        page.close()
+        return
+    pytest.importorskip("selenium")
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1200,800")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    ctx = RunContext(resources, str(tmp_path), {
+        "browser_engine": "selenium",
+        "warm_profiles": False,
+        "prewarm_browsers": 0,
+        "async_prefetch": False,
+    })
+    page = ctx.new_page(options, network_log=True)
+    assert isinstance(page, browser_backend.SeleniumPage)
+    yield page
+    page.close()
+    ctx.close()
+
+
+def test_navigate(page, server):
+    page.navigate(f"{server}/quote.html")
+    assert page.url == f"{server}/quote.html"
+    assert "Quote fixture" in page.html()
+
+
+def test_navigate_fragment(page, server):
+    # A fragment-only change stays in the document and fires no load event
+    page.navigate(f"{server}/quote.html")
+    page.navigate(f"{server}/quote.html#view")
+    assert page.url == f"{server}/quote.html#view"
+
+
+def test_wait_for(page, server):
+    page.navigate(f"{server}/quote.html")
+    assert page.wait_for("#chart svg path", timeout=5, label="fixture chart")
+    assert page.wait_for("//td[@id='current'][text()='14.25']", xpath=True, timeout=5, label="fixture quote")
+    assert not page.wait_for("#missing", timeout=0.5, label="missing element")
+
+
+def test_extract(page, server):
+    page.navigate(f"{server}/quote.html")
+    page.wait_for("//td[@id='current'][text()='14.25']", xpath=True, timeout=5, label="fixture quote")
+    values = page.extract({
+        "current": dom_extract.Field("#current", parse=dom_extract.number),
+        "prev_close": dom_extract.Field("body", after="Prev. Close", parse=dom_extract.first_number),
+        "missing": dom_extract.Field("#missing", parse=dom_extract.number),
+    })
+    assert values == {"current": 14.25, "prev_close": 13.9, "missing": None}
+
+
+def test_screenshot_element(page, server):
+    from page_capture import to_image
+
+    page.navigate(f"{server}/quote.html")
+    page.wait_for_stable_svg("#chart svg", timeout=5, label="fixture chart")
+    png = page.screenshot_element("#chart")
+    assert png.startswith(b"\x89PNG")
+    width, height = to_image(png).size
+    assert abs(width - 400) <= 2 and abs(height - 200) <= 2
+
+
+def test_intercept(page, server):
+    capture = page.intercept([QUOTE_API])
+    page.navigate(f"{server}/quote.html")
+    quote = capture.wait_until(lambda data: data if isinstance(data, dict) and "ltp" in data else None,
+                               timeout=5, label="fixture api")
+    assert quote == {"ltp": 14.25, "prevClose": 13.9, "open": 14.0}
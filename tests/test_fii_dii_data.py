@@ -0,0 +1,54 @@
+"""
+fii_dii_data.fetch_all_pages returns as soon as the lookback is covered,
+without waiting for a slow table page it no longer needs.
+"""
+import time
+import threading
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import fii_dii_data
+
+
+def _table(first_day, days):
+    rows = []
+    for offset in range(days):
+        day = (first_day - timedelta(days=offset)).strftime("%d %b %Y")
+        rows.append(f"<tr><td>{day}</td><td>1</td><td>1</td><td>+1,200.5</td><td>1</td><td>1</td><td>−300</td></tr>")
+    return f"<html><body><table><tbody>{''.join(rows)}</tbody></table></body></html>".encode("utf-8")
+
+
+class _FakeHttp:
+    """Serves pages 1 and 2 at once and holds page 3 until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.requested = []
+        newest = date(2026, 3, 31)
+        self.pages = {1: _table(newest, 13), 2: _table(newest - timedelta(days=13), 13),
+                      3: _table(newest - timedelta(days=26), 13)}
+
+    def get(self, url):
+        page = int(url.split("page=")[1]) if "page=" in url else 1
+        self.requested.append(page)
+        if page == 3:
+            self.release.wait(10)
+        return SimpleNamespace(content=self.pages[page], raise_for_status=lambda: None)
+
+    def parsed(self, response, name, parse):
+        return parse(response)
+
+
+def test_returns_once_lookback_is_covered():
+    http = _FakeHttp()
+    start = time.monotonic()
+    try:
+        df = fii_dii_data.fetch_all_pages(SimpleNamespace(http=http), min_unique_days=25, max_pages=4)
+        elapsed = time.monotonic() - start
+    finally:
+        http.release.set()
+    assert 3 in http.requested  # The slow page was requested up front...
+    assert elapsed < 2          # ...but not waited for
+    assert len(df) == 26
+    assert df['Date'].is_monotonic_decreasing
+    assert df.iloc[0]['FII_Net'] == 1200.5 and df.iloc[0]['DII_Net'] == -300
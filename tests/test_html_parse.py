@@ -0,0 +1,51 @@
+"""
+html_parse targets: each rule form, and a targeted parse keeping only the
+containers a scraper reads.
+"""
+import pytest
+
+import html_parse
+
+PAGE = b"""
+<html><head><script>var big = 1;</script></head><body>
+<div class="nav">Menu</div>
+<div class="gold-rate-container wide"><span>22K</span><span>7,150</span></div>
+<ul id="cagetory"><li>News one</li><li>News two</li></ul>
+<div class="sc-ItemContainer-x1"><p>Item</p></div>
+<table><tr><td>1</td></tr></table>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("rule, name, attrs, expected", [
+    ("table", "table", {}, True),
+    ("table", "div", {}, False),
+    ("div.gold-rate-container", "div", {"class": "gold-rate-container wide"}, True),
+    ("div.gold-rate-container", "div", {"class": "nav"}, False),
+    ("ul#cagetory", "ul", {"id": "cagetory"}, True),
+    ("ul#cagetory", "ul", {"id": "other"}, False),
+    ("div[class*=ItemContainer]", "div", {"class": ["sc-ItemContainer-x1"]}, True),
+    ("div[class*=ItemContainer]", "div", {"class": "nav"}, False),
+])
+def test_target_rules(rule, name, attrs, expected):
+    assert html_parse.Target(rule).matches(name, attrs) is expected
+
+
+def test_unsupported_rule():
+    with pytest.raises(ValueError):
+        html_parse.Target("div > span")
+
+
+def test_targeted_parse_keeps_only_the_containers():
+    soup = html_parse.parse(PAGE, html_parse.Target("div.gold-rate-container", "ul#cagetory"))
+    assert [span.get_text() for span in soup.select("div.gold-rate-container span")] == ["22K", "7,150"]
+    assert [li.get_text() for li in soup.find_all("li")] == ["News one", "News two"]
+    assert soup.find("table") is None
+    assert soup.find("script") is None
+    assert "Menu" not in soup.get_text()
+
+
+def test_full_parse():
+    soup = html_parse.parse(PAGE)
+    assert soup.find("table") is not None
+    assert "Menu" in soup.get_text()
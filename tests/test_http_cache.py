@@ -0,0 +1,87 @@
+"""
+HttpCache under HttpClient: fresh entries are served from disk, stale ones
+are revalidated with their ETag, and parsed results are reused for an
+unchanged body.
+"""
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from http_cache import HttpCache
+from http_client import HttpClient
+
+BODY = b"<html><body><table><tr><td>1</td></tr></table></body></html>"
+ETAG = '"v1"'
+
+
+class _EtagHandler(BaseHTTPRequestHandler):
+    statuses = []
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            self.statuses.append(304)
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _EtagHandler.statuses = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _EtagHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/page"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(directory, ttl):
+    return HttpClient(cache=HttpCache(str(directory), ttls=[(r"127\.0\.0\.1", ttl)]))
+
+
+def test_fresh_entry_is_served_from_disk(server, tmp_path):
+    client = _client(tmp_path, 60)
+    assert client.get(server).content == BODY
+    cached = client.get(server)
+    assert cached.content == BODY and cached.from_cache
+    assert _EtagHandler.statuses == [200]
+    assert client.cache.stats['hits'] == 1
+
+
+def test_stale_entry_is_revalidated(server, tmp_path):
+    client = _client(tmp_path, 0)
+    client.get(server)
+    revalidated = client.get(server)
+    assert revalidated.status_code == 200 and revalidated.content == BODY
+    assert _EtagHandler.statuses == [200, 304]
+    assert client.cache.stats['revalidated'] == 1
+    # A new client (the next run) finds the entry on disk
+    assert _client(tmp_path, 0).get(server).content == BODY
+    assert _EtagHandler.statuses == [200, 304, 304]
+
+
+def test_unchanged_body_is_not_parsed_again(server, tmp_path):
+    client = _client(tmp_path, 0)
+    parses = []
+
+    def parse(response):
+        parses.append(response.url)
+        return response.text.count("<td>")
+
+    assert client.parsed(client.get(server), "cells", parse) == 1
+    assert client.parsed(client.get(server), "cells", parse) == 1
+    assert _client(tmp_path, 0).parsed(client.get(server), "cells", parse) == 1
+    assert len(parses) == 1
@@ -0,0 +1,102 @@
+"""
+The section scheduler: dependencies, resource limits and, for isolated
+sections, killing the whole process tree on overrun.
+"""
+import os
+import time
+import threading
+import functools
+import subprocess
+
+import pytest
+
+import section_runner
+
+
+def _section(name, func, **spec):
+    return dict({"name": name, "func": func, "resource": "http", "depends_on": []}, **spec)
+
+
+def test_dependencies_run_first():
+    order = []
+
+    def step(name, ok=True):
+        order.append(name)
+        return ok
+
+    results = section_runner.run_sections([
+        _section("report", functools.partial(step, "report"), depends_on=["quotes", "news"]),
+        _section("quotes", functools.partial(step, "quotes")),
+        _section("news", functools.partial(step, "news")),
+    ], isolate=False)
+    assert order[-1] == "report"
+    assert all(record['status'] == "ok" for record in results.values())
+
+
+def test_failed_dependency_skips_dependents():
+    results = section_runner.run_sections([
+        _section("quotes", lambda: False),
+        _section("report", lambda: True, depends_on=["quotes"]),
+    ], isolate=False)
+    assert results['quotes']['status'] == "failed"
+    assert results['report']['status'] == "skipped"
+
+
+def test_unknown_dependency():
+    with pytest.raises(ValueError):
+        section_runner.run_sections([_section("report", lambda: True, depends_on=["missing"])], isolate=False)
+
+
+def test_resource_limits():
+    lock = threading.Lock()
+    running = []
+    peak = [0]
+
+    def browse():
+        with lock:
+            running.append(1)
+            peak[0] = max(peak[0], len(running))
+        time.sleep(0.1)
+        with lock:
+            running.pop()
+        return True
+
+    section_runner.run_sections([_section(f"chart{i}", browse, resource="browser") for i in range(4)],
+                                limits={"browser": 2}, isolate=False)
+    assert peak[0] == 2
+
+
+def _start_and_hang(pid_file):
+    """An isolated section that starts a grandchild process and never finishes."""
+    child = subprocess.Popen(["sleep", "60"])
+    with open(pid_file, "w") as f:
+        f.write(str(child.pid))
+    time.sleep(60)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"  # A killed, not yet reaped process is a zombie
+    except OSError:
+        return True
+
+
+@pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX only")
+def test_overrun_kills_process_tree(tmp_path):
+    pid_file = str(tmp_path / "grandchild.pid")
+    section = _section("hang", functools.partial(_start_and_hang, pid_file), budget=3)
+    start = time.monotonic()
+    results = section_runner.run_sections([section])
+    assert results['hang']['status'] == "timed_out"
+    assert time.monotonic() - start < 3 + section_runner.KILL_GRACE_SECONDS
+    with open(pid_file) as f:
+        grandchild = int(f.read())
+    deadline = time.monotonic() + 2
+    while _alive(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(grandchild)
@@ -1,10 +1,9 @@
-import os
-import time
-from PIL import Image
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import io
+import dom_extract
+import network_capture
+import page_state
+import run_manifest
+from run_context import default_context
 
 # ANSI color codes
 GREEN = '\033[32m'
@@ -12,61 +11,210 @@ RED = '\033[31m'
 RESET = '\033[0m'
 
 
-def get_vix_data_and_chart(output_filename="india_vix_chart.png"):
+VIX_PAGE_URL = "https://groww.in/indices/india-vix"
+VIX_TICKER = "^INDIAVIX"
+
+# What the browser path waits on: the VIX row of the indices table, the
+# chart's timeframe button, and the SVG inside the chart container (its
+# paths stop changing once the chart has drawn; the page's icons are SVGs
+# too, so a bare "svg" would match those first)
+VIX_ROW_XPATH = "//tr[contains(., 'INDIA VIX')]"
+TIMEFRAME_XPATH = "//button[text()='1M']"
+CHART_SELECTOR = "[class*='chart' i] svg"
+
+# The Groww API call returning the VIX quote, and the keys of the quote
+# record (specific names only: generic ones such as 'value' or 'close' also
+# appear in the page's other records)
+VIX_API_PATTERNS = [r"groww\.in/v1/api/.*/latest_indices_ohlc/INDIAVIX"]
+CURRENT_KEYS = ("ltp", "lastPrice")
+OPEN_KEYS = ("open",)
+PREV_CLOSE_KEYS = ("prevClose", "previousClose")
+
+
+def quote_from(data):
+    """
+    The VIX values of the first record in a JSON document holding a
+    current value, a previous close and an open together.
+
+    Returns:
+        A tuple (current, prev_close, open), or None when there is no such
+        record.
+    """
+    for record in network_capture.find_records(data, CURRENT_KEYS, PREV_CLOSE_KEYS, OPEN_KEYS):
+        values = (network_capture.field_number(record, *CURRENT_KEYS),
+                  network_capture.field_number(record, *PREV_CLOSE_KEYS),
+                  network_capture.field_number(record, *OPEN_KEYS))
+        if None not in values and values[2] > 0:
+            return values
+    return None
+
+
+def vix_from_api(capture, timeout=10):
+    """
+    Reads the VIX values from the quote the Groww page fetches.
+
+    Args:
+        capture (NetworkCapture): Recording the page's API responses.
+        timeout (float): How long to wait for a usable response.
+
+    Returns:
+        A tuple (current, prev_close, open), or None when no complete
+        quote arrived in time.
+    """
+    values = capture.wait_until(quote_from, timeout=timeout, label="vix api")
+    run_manifest.count("network_capture_hits" if values is not None else "dom_fallbacks")
+    return values
+
+
+def _value_after_name(row_text):
+    """The number following 'INDIA VIX' in its table row."""
+    parts = row_text.split('\n') if '\n' in row_text else row_text.split()
+    return float(parts[parts.index('INDIA VIX') + 1])
+
+
+# The VIX row of the indices table, and the figures following their labels
+VIX_FIELDS = {
+    "current": dom_extract.Field("tr", contains="INDIA VIX", parse=_value_after_name),
+    "prev_close": dom_extract.Field("body", after="Prev. Close", parse=dom_extract.first_number),
+    "open": dom_extract.Field("body", after="Open", parse=dom_extract.first_number),
+}
+
+
+def vix_from_dom(page):
+    """
+    Scrapes the VIX values from the rendered Groww page, in one script call.
+
+    Returns:
+        A tuple (current, prev_close, open); values that were not found are None.
+    """
+    values = page.extract(VIX_FIELDS)
+    return values['current'], values['prev_close'], values['open']
+
+
+# --- HTTP fast path ---
+# The Groww VIX page is server-rendered with its quote in the embedded page
+# state, so the values need no browser. The chart is still Groww's, taken in
+# the browser, unless config 'vix_local_chart' asks for the one-month chart
+# to be drawn locally from daily closes instead.
+
+def vix_from_page_state(ctx):
+    """
+    Reads the VIX values from the state embedded in the Groww page, fetched
+    over plain HTTP.
+
+    Returns:
+        A tuple (current, prev_close, open), or None when the page state
+        could not be fetched or holds no complete quote.
+    """
+    state = page_state.fetch_page_state(ctx, VIX_PAGE_URL)
+    if state is None:
+        return None
+    values = quote_from(state)
+    if values is None:
+        print("Warning: no VIX quote in the Groww page state")
+    return values
+
+
+def render_vix_chart(period="1mo"):
+    """
+    Draws the India VIX daily closes over `period` (Yahoo Finance data).
+    The download takes the yfinance lock, as the VIX section does not run
+    in the yfinance slot. yfinance and matplotlib are only imported here, so
+    runs without 'vix_local_chart' do not need them.
+
+    Returns:
+        bytes: The PNG of the chart, or None when no data was available.
     """
-    Gets both VIX data and chart in a single browser session.
+    try:
+        import yfinance as yf
+        from matplotlib.figure import Figure
+        from section_runner import YFINANCE_LOCK
+        with YFINANCE_LOCK:
+            closes = yf.Ticker(VIX_TICKER).history(period=period)['Close'].dropna()
+    except Exception as e:
+        print(f"Warning: could not download the VIX history: {e}")
+        return None
+    if len(closes) < 2:
+        return None
+
+    # Figure rather than pyplot: no global state, safe on worker threads
+    fig = Figure(figsize=(10, 5), dpi=100)
+    ax = fig.subplots()
+    ax.plot(closes.index, closes.values, color="#5367ff", linewidth=2)
+    ax.fill_between(closes.index, closes.values, closes.values.min() * 0.98, color="#5367ff", alpha=0.08)
+    ax.set_title(f"India VIX - last {period.replace('mo', ' month')}")
+    ax.grid(True, alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def vix_fast_path(ctx):
+    """
+    Gets the VIX values, and with config 'vix_local_chart' the chart,
+    without a browser, recording whether the values came from the fast
+    path. Taking only the chart in the browser is not a fallback.
+
+    Returns:
+        A tuple ((current, prev_close, open), chart_png), where chart_png is
+        None when the chart has to be taken in the browser; or None when
+        the values could not be read either.
+    """
+    if not page_state.enabled(ctx):
+        return None
+    values = vix_from_page_state(ctx)
+    if values is None:
+        page_state.record(False)
+        print("VIX fast path unavailable - falling back to the browser")
+        return None
+    page_state.record(True)
+    chart_png = render_vix_chart() if ctx.config['vix_local_chart'] else None
+    return values, chart_png
+
+
+def chrome_options():
+    """Browser options for the Groww VIX page."""
+    import undetected_chromedriver as uc
+
+    options = uc.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    return options
+
+
+def get_vix_data_and_chart(output_filename="india_vix_chart.png", ctx=None):
+    """
+    Gets both VIX data and chart in a single browser session, taking what
+    it can over HTTP first (vix_fast_path).
     """
     print("Fetching VIX data and chart...")
-    driver = None
+    ctx = ctx or default_context()
+    fast = vix_fast_path(ctx)
+    known = fast[0] if fast is not None else None
+    if fast is not None and fast[1] is not None:
+        (current_value, prev_close, open_value), chart_png = fast
+        with open(output_filename, 'wb') as f:
+            f.write(chart_png)
+        change_value = current_value - open_value
+        return (current_value, change_value, (change_value / open_value) * 100), True
+
+    page = None
     try:
-        # Initialize browser
-        options = uc.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--no-sandbox")
-        
-        # Ensure compatibility by using the correct ChromeDriver version
-        driver = uc.Chrome(version_main=137, options=options, use_subprocess=True)
-        page_url = 'https://groww.in/indices/india-vix'
-        driver.get(page_url)
+        page = ctx.new_page(chrome_options(), stealth=True, network_log=True, blocking="chart", profile="groww")
+        capture = page.intercept(VIX_API_PATTERNS)
+        page.navigate(VIX_PAGE_URL)
         
-        wait = WebDriverWait(driver, 30)
-        time.sleep(5)
-        
-        # First get the VIX data
+        # First get the VIX data, from the page's API response when possible
         vix_data = None
         try:
-            # Find VIX value
-            table_rows = driver.find_elements(By.TAG_NAME, "tr")
-            for row in table_rows:
-                row_text = row.text
-                if 'INDIA VIX' in row_text:
-                    parts = row_text.split('\n') if '\n' in row_text else row_text.split()
-                    for i, part in enumerate(parts):
-                        if part == 'INDIA VIX':
-                            current_value = float(parts[i+1])
-                            break
-            
-            # Find Prev.Close and Open values
-            all_text = driver.find_element(By.TAG_NAME, "body").text
-            
-            # Find Prev.Close
-            prev_close_idx = all_text.find("Prev. Close")
-            if prev_close_idx != -1:
-                lines = all_text[prev_close_idx:].split('\n')
-                for line in lines[:3]:
-                    if line.replace('.', '').replace(',', '').strip().isdigit():
-                        prev_close = float(line.strip())
-                        break
-            
-            # Find Open
-            open_idx = all_text.find("Open")
-            if open_idx != -1:
-                lines = all_text[open_idx:].split('\n')
-                for line in lines[:3]:
-                    if line.replace('.', '').replace(',', '').strip().isdigit():
-                        open_value = float(line.strip())
-                        break
+            values = known or vix_from_api(capture, ctx.config['readiness_timeout'])
+            if values is None:
+                page.wait_for(VIX_ROW_XPATH, xpath=True, timeout=ctx.config['readiness_timeout'], label="vix page")
+                values = vix_from_dom(page)
+            current_value, prev_close, open_value = values
             
             print(f"Prev Close: {prev_close}, Open: {open_value}")
             
@@ -81,33 +229,22 @@ def get_vix_data_and_chart(output_filename="india_vix_chart.png"):
         # Then capture the chart
         chart_success = False
         try:
+            page.wait_for(TIMEFRAME_XPATH, xpath=True, visible=True, timeout=ctx.config['readiness_timeout'],
+                          label="vix chart")
+
             # Switch to 1M view
-            driver.execute_script("""
+            page.execute_script("""
                 document.querySelectorAll('.modal, .overlay').forEach(el => el.style.display = 'none');
                 document.documentElement.setAttribute('data-theme', 'light');
             """)
+            if page.click(TIMEFRAME_XPATH, xpath=True):
+                page.wait_for_stable_svg(CHART_SELECTOR, timeout=ctx.config['readiness_timeout'],
+                                         label="vix 1M chart")
             
-            timeframe_buttons = driver.find_elements(By.XPATH, "//button[text()='1M']")
-            if timeframe_buttons:
-                driver.execute_script("arguments[0].click();", timeframe_buttons[0])
-                time.sleep(2)
-            
-            # Take and crop screenshot
-            temp_screenshot = "temp_full_page.png"
-            driver.save_screenshot(temp_screenshot)
-            
-            img = Image.open(temp_screenshot)
-            width, height = img.size
-            
-            left = width * 0.15
-            right = width * 0.65
-            top = height * 0.25
-            bottom = height * 0.80
-            
-            chart_area = img.crop((left, top, right, bottom))
-            chart_area.save(output_filename)
-            
-            os.remove(temp_screenshot)
+            # Capture the chart region of the page in memory
+            png = page.screenshot_fraction(0.15, 0.25, 0.65, 0.80)
+            with open(output_filename, 'wb') as f:
+                f.write(png)
             chart_success = True
             
         except Exception as e:
@@ -120,8 +257,8 @@ def get_vix_data_and_chart(output_filename="india_vix_chart.png"):
         return None, False
         
     finally:
-        if driver:
-            driver.quit()
+        if page:
+            page.close()
 
 # --- Main Execution Block for Demonstration ---
 if __name__ == "__main__":